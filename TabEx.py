@@ -1,8 +1,12 @@
 ﻿# 全局搜索缓存（LRU缓存，最多缓存50个搜索结果）
 
-from collections import OrderedDict
+from abc import ABC, abstractmethod
+from array import array
+from collections import OrderedDict, deque
 import hashlib
 import os
+import struct
+import threading
 
 # 应用版本号（单一来源）：窗口标题与打包脚本 2_build_exe.bat 均引用此处。
 # 修改版本时只改这一行；2_build_exe.bat 会自动解析。
@@ -95,6 +99,14 @@ _LANG_EN = {
     "搜索文件内容": "Search Content",
     "区分大小写": "Case Sensitive",
     "全词匹配": "Whole Word",
+    "单个关键词": "Single Keyword",
+    "任一关键词(OR)": "Any Keyword (OR)",
+    "全部关键词(AND)": "All Keywords (AND)",
+    "正则表达式": "Regex",
+    "多关键词用空格、逗号或分号分隔，含空格的短语请加英文双引号": "Separate keywords with spaces, commas or semicolons; quote phrases containing spaces",
+    "正则表达式无效: {}": "Invalid regular expression: {}",
+    "使用内容索引": "Use Content Index",
+    "为该目录建立内容 trigram 索引，重复搜索时只读取可能包含关键词的文件\n新增或修改的文件会在搜索后自动补录": "Build a content trigram index for this folder so repeat searches only read files that may contain the keyword\nNew or modified files are indexed after each search",
     "使用 Everything (极速)": "Use Everything (Ultra-fast)",
     "轻量模式(更快)": "Lightweight (Faster)",
     "输入搜索关键词...": "Enter search keyword...",
@@ -111,10 +123,33 @@ _LANG_EN = {
     "列举文件中{}... (最多显示{}个结果)": "Listing files {}... (max {} results)",
     "搜索中... (最多显示{}个结果)": "Searching... (max {} results)",
     "搜索中... 已扫描 {} 个文件，找到 {} 个结果": "Searching... scanned {} files, {} found",
-    "搜索完成（缓存），共显示 {} 个结果": "Search complete (cache), {} results",
+    "搜索完成（{}），共显示 {} 个结果": "Search complete ({}), {} results",
+    "缓存": "cache",
+    "持久化缓存": "persistent cache",
+    "在上次结果中筛选": "refined from previous results",
+    "筛选结果（路径包含的文字）...": "Filter results (text in path)...",
+    "筛选显示 {} / {} 个结果": "Showing {} of {} results",
+    "匹配行: {}": "Matching lines: {}",
+    "选中内容命中的结果后，在此预览匹配行": "Select a content match to preview the matching lines here",
+    "{} — {} 处匹配": "{} — {} matches",
+    "无法读取文件: {}": "Cannot read file: {}",
+    "排除目录:": "Exclude folders:",
+    "例如: .git,node_modules,build* (逗号分隔，支持通配符，留空表示不排除)": "e.g. .git,node_modules,build* (comma separated, wildcards allowed, empty = none)",
+    "最大深度:": "Max depth:",
+    "不限": "Unlimited",
+    "1 表示只搜索当前文件夹本身，0 表示不限制": "1 searches only this folder itself, 0 means unlimited",
+    "遵循 .gitignore": "Respect .gitignore",
+    "跳过 .gitignore / .ignore 中忽略的目录和文件（如 build、out 等构建输出）": "Skip folders and files ignored by .gitignore / .ignore (e.g. build output such as build, out)",
+    "监视变化": "Watch changes",
+    "搜索完成后监视搜索路径下的目录，文件增删改时只重新评估变化的目录并增量更新结果": "After the search completes, watch the folders under the search path and incrementally update results by re-evaluating only the folders that changed",
+    "；正在监视 {} 个目录的变化": "; watching {} folders for changes",
+    "（目录过多，另有 {} 个未监视）": " (too many folders, {} not watched)",
+    "源文件在复制过程中变小: {}": "Source file shrank during copy: {}",
+    "后台复制/删除的并发文件任务数。0=自动（按实测吞吐动态调节，并记住每个磁盘的最佳值），建议机械盘 2-4，SSD 4-8": "Concurrent file tasks for background copy/delete. 0 = auto (tuned from measured throughput and remembered per disk); 2-4 suggested for HDD, 4-8 for SSD",
+    "监视: 新增 {} 个，移除 {} 个结果，当前共 {} 个结果": "Watch: {} added, {} removed, {} results now",
     "搜索完成，共找到 {} 个结果（扫描了 {} 个文件）": "Search complete, {} results ({} files scanned)",
     "搜索完成（已限制），显示前 {} 个结果（扫描了 {} 个文件）⚠️": "Search limited, showing first {} results ({} files scanned) ⚠️",
-    "Everything搜索完成，共找到 {} 个结果{}": "Everything search done, {} results{}",
+    "Everything搜索完成，共找到 {} 个结果": "Everything search done, {} results",
     # ── Search log messages ───────────────────────────────────────────────
     "[Search] 开始搜索路径: {}": "[Search] Start path: {}",
     "[Search] 搜索关键词: {}": "[Search] Keyword: {}",
@@ -379,6 +414,8 @@ _LANG_EN = {
     "修改(Commit)": "Modified (Commit)",
     "未跟踪(待Add)": "Untracked (Pending Add)",
     "，元数据降级 {} 条": ", {} items degraded",
+    "（来自文件名索引）": " (from filename index)",
+    "，内容索引排除 {} 个文件": ", {} files excluded by content index",
     # ── Main window toolbar / menus ───────────────────────────────────────
     "后退 (Alt+←)": "Back (Alt+←)",
     "前进 (Alt+→)": "Forward (Alt+→)",
@@ -691,17 +728,56 @@ def translate_common_path(path):
 # 性能优化配置常量
 MAX_SEARCH_CACHE_SIZE = 50  # 搜索缓存最大数量
 MAX_SEARCH_RESULTS = 1000000  # 单次搜索最大结果数
-MAX_CACHED_RESULTS_PER_QUERY = 5000  # 单次搜索最多缓存结果数（控制内存占用）
+MAX_CACHED_RESULTS_PER_QUERY = 5000  # 单次搜索最多在内存中缓存的结果数（控制内存占用）
+SEARCH_RESULT_CACHE_PERSISTENT = True  # 搜索结果持久化到索引目录（SQLite），重启后按目录 mtime 校验复用
+SEARCH_RESULT_CACHE_MAX_BYTES = 64 * 1024 * 1024  # 持久化结果缓存总大小上限（压缩后），超出按最近最少使用淘汰
+SEARCH_RESULT_CACHE_MAX_RESULTS = 100000  # 结果数超过该值的搜索不写入持久化缓存（搜索中途即停止保留结果副本）
 CONTENT_SEARCH_CHUNK_SIZE = 10 * 1024 * 1024  # 内容搜索分块大小（10MB）
 CONTENT_SEARCH_MAX_BYTES_PER_FILE = 64 * 1024 * 1024  # 单文件最多扫描64MB，避免超大文件拖慢整体
 CONTENT_SEARCH_IN_MEMORY_THRESHOLD = 2 * 1024 * 1024  # 小文件（<=2MB）一次性读入内存后多编码匹配
 CONTENT_SEARCH_ENCODINGS = ['utf-8', 'utf-8-sig', 'utf-16', 'utf-16-le', 'utf-16-be', 'gbk', 'gb2312', 'latin-1']
+CONTENT_SEARCH_DETECT_ENCODING = True  # 按 BOM/NULL 分布/解码校验探测文件编码，代替逐个尝试 CONTENT_SEARCH_ENCODINGS
+FILE_ENCODING_CACHE_MAX_ENTRIES = 200000  # 持久化的文件编码缓存最大条目数（按 路径+mtime+大小 失效）
+CONTENT_SEARCH_WORKERS = 0  # 内容搜索进程数：0=自动（CPU核数-1，最多8），1=单进程串行
+CONTENT_SEARCH_TASK_FILES = 32  # 每个进程池任务打包的文件数（摊薄进程间通信开销）
+CONTENT_SEARCH_HIT_LOCATIONS = 20  # 每个内容命中文件记录前 N 处匹配的行号/字节偏移（供预览窗格定位）；0=不记录
+SEARCH_PREVIEW_CONTEXT_LINES = 2  # 预览窗格中每处匹配前后显示的行数
+SEARCH_PREVIEW_OPEN_FILES = 4  # 预览窗格保持映射的文件数（LRU，新搜索/关闭对话框时释放）
+CONTENT_SEARCH_BINARY_EXT_LEARN = 8  # 同一扩展名连续判为二进制达到该数量（且无文本）后，本次搜索其余同扩展名文件不再读取；0=关闭
+SEARCH_FILENAME_INDEX_ENABLED = True  # 非 Everything 的纯文件名搜索优先使用持久化文件名索引
+SEARCH_FILENAME_INDEX_DIR = "search_index"  # 文件名索引目录（位于 config.json 同目录）
+SEARCH_FILENAME_INDEX_REFRESH_SECONDS = 30  # 文件名索引在此时间内刷新过时，搜索结束后不再后台刷新
+SEARCH_INDEX_MAX_BYTES = 256 * 1024 * 1024  # 索引目录中各搜索根目录的 .fidx/.tgm 总大小上限，超出按最近最少使用淘汰
+SEARCH_EXCLUDE_DIR_PATTERNS = []  # 搜索对话框默认排除的目录名（支持通配符，如 .git,node_modules）；默认不排除，保持原有搜索范围
+SEARCH_MAX_DEPTH = 0  # 搜索对话框默认最大目录深度：0=不限，1=只搜索根目录本身
+SEARCH_RESPECT_GITIGNORE = False  # 搜索对话框默认是否遵循 .gitignore/.ignore（遍历时跳过被忽略的目录和文件）；默认关闭，保持原有搜索范围
+GITIGNORE_CACHE_MAX_ENTRIES = 4096  # 已编译忽略规则的缓存条目上限（按忽略文件路径，随文件 mtime/大小失效）
+SEARCH_WATCH_MAX_DIRS = 2000  # 监视模式最多订阅的目录数（每个目录占用一个系统监视句柄），超出部分不监视
+SEARCH_WATCH_DEBOUNCE_MS = 500  # 监视模式目录变化事件防抖：合并这段时间内的事件后再重新评估
+SEARCH_WATCH_POLL_MS = 10000  # 监视模式兜底轮询间隔（后台比较目录快照，补上未触发事件的文件修改）；0=关闭
+CONTENT_INDEX_MAX_FILE_BYTES = 2 * 1024 * 1024  # 内容 trigram 索引只收录不超过此大小的文本文件，更大的文件始终直接扫描
+EVERYTHING_FIRST_PAGE_SIZE = 500  # es.exe 首页结果数（小页尽快出首批结果）
+EVERYTHING_PAGE_SIZE = 20000  # es.exe 后续每页结果数（-offset/-n 分页读取）
+EVERYTHING_BACKEND = "auto"  # Everything 后端：auto=优先 SDK(IPC)，sdk=仅 SDK，es=仅 es.exe
 SEARCH_RESULT_QUEUE_MAXSIZE = 3000  # 搜索结果队列容量（降低高吞吐时溢出概率）
 SEARCH_RESULT_BATCH_BASE = 100  # 搜索线程默认批量发送大小
 SEARCH_RESULT_BATCH_MIN = 50  # 低积压时最小批量发送大小
 SEARCH_RESULT_BATCH_MAX = 400  # 高积压时最大批量发送大小
 SEARCH_METADATA_DEGRADE_ENABLED = True  # 队列高压时降级元数据(stat)获取
 SEARCH_METADATA_DEGRADE_QUEUE_RATIO = 0.75  # 触发降级的队列占用比例
+SEARCH_METADATA_HYDRATE_WORKERS = 4  # 后台补齐结果大小/修改时间的线程数
+SEARCH_METADATA_PREFETCH_ROWS = 200  # 补齐元数据时在可见区域之后额外预取的行数
+FILE_OP_MAX_INFLIGHT_TASKS = 1024  # 后台复制/删除边遍历边提交，线程池中同时排队的文件任务上限（限制大目录的内存占用）
+FILE_OP_ADAPTIVE_CONCURRENCY = True  # 并发数设为自动时，按实测吞吐/单文件延迟动态增减 I/O 并发（AIMD），并按卷记住最佳值
+FILE_OP_MAX_IO_WORKERS = 32  # 自适应并发的上限（线程池大小）
+FILE_OP_CONCURRENCY_FILENAME = "file_op_concurrency.json"  # 各卷最佳 I/O 并发数记录（位于 config.json 同目录）
+FILE_OP_SMALL_FILE_BYTES = 64 * 1024  # 小于此大小的文件合并成批提交给 I/O 线程（摊薄逐文件的调度开销）
+FILE_OP_SMALL_FILE_BATCH = 64  # 每批最多文件数（删除不区分大小按此数量成批）；1=不合并
+FILE_OP_CHUNKED_COPY_THRESHOLD = 64 * 1024 * 1024  # 不小于此大小的文件分块复制（块间可取消、上报字节进度、断点续传）
+FILE_OP_COPY_CHUNK_SIZE = 8 * 1024 * 1024  # 分块复制每块大小（页对齐缓冲区，按 64KB 取整）
+FILE_OP_COPY_CHECKPOINT_MS = 1000  # 分块复制落盘并写断点日志的间隔
+FILE_OP_PART_SUFFIX = ".tabex-part"  # 分块复制中的临时文件后缀，断点日志为 <目标>.tabex-part.json
+FILE_OP_RESUME_MARKER = ".tabex-copy.json"  # 目录复制进行中标记（记录源目录），再次复制同一目录时据此续传
 MAX_CLOSED_TABS_HISTORY = 20  # 关闭标签页历史最大数量（从10增加到20）
 MAX_SEARCH_HISTORY = 30  # 搜索历史最大数量（从20增加到30）
 MAX_NAVIGATION_HISTORY = 50  # 导航历史最大数量
@@ -723,6 +799,9 @@ APP_INTERNAL_CHANGE_FILENAMES = {
     'runtime_health.log',
     'runtime_health.log.1',
     'tabex_debug_latest.log',
+    FILE_OP_CONCURRENCY_FILENAME,
+    FILE_OP_CONCURRENCY_FILENAME + '.tmp',
+    SEARCH_FILENAME_INDEX_DIR,
 }
 
 # 大文件夹异步加载配置
@@ -810,12 +889,39 @@ def apply_runtime_performance_config(perf_cfg=None):
     global CONTENT_SEARCH_CHUNK_SIZE
     global CONTENT_SEARCH_MAX_BYTES_PER_FILE
     global CONTENT_SEARCH_IN_MEMORY_THRESHOLD
+    global CONTENT_SEARCH_WORKERS
+    global CONTENT_SEARCH_DETECT_ENCODING
+    global CONTENT_SEARCH_BINARY_EXT_LEARN
+    global CONTENT_SEARCH_HIT_LOCATIONS
+    global SEARCH_PREVIEW_CONTEXT_LINES
+    global SEARCH_RESULT_CACHE_PERSISTENT
+    global SEARCH_RESULT_CACHE_MAX_BYTES
+    global SEARCH_RESULT_CACHE_MAX_RESULTS
+    global SEARCH_FILENAME_INDEX_ENABLED
+    global SEARCH_FILENAME_INDEX_REFRESH_SECONDS
+    global SEARCH_INDEX_MAX_BYTES
+    global SEARCH_EXCLUDE_DIR_PATTERNS
+    global SEARCH_MAX_DEPTH
+    global SEARCH_RESPECT_GITIGNORE
+    global GITIGNORE_CACHE_MAX_ENTRIES
+    global SEARCH_WATCH_MAX_DIRS
+    global SEARCH_WATCH_POLL_MS
+    global CONTENT_INDEX_MAX_FILE_BYTES
+    global EVERYTHING_BACKEND
     global SEARCH_RESULT_QUEUE_MAXSIZE
     global SEARCH_RESULT_BATCH_BASE
     global SEARCH_RESULT_BATCH_MIN
     global SEARCH_RESULT_BATCH_MAX
     global SEARCH_METADATA_DEGRADE_ENABLED
     global SEARCH_METADATA_DEGRADE_QUEUE_RATIO
+    global SEARCH_METADATA_HYDRATE_WORKERS
+    global FILE_OP_MAX_INFLIGHT_TASKS
+    global FILE_OP_ADAPTIVE_CONCURRENCY
+    global FILE_OP_MAX_IO_WORKERS
+    global FILE_OP_SMALL_FILE_BYTES
+    global FILE_OP_SMALL_FILE_BATCH
+    global FILE_OP_CHUNKED_COPY_THRESHOLD
+    global FILE_OP_COPY_CHUNK_SIZE
 
     if not isinstance(perf_cfg, dict):
         return
@@ -873,6 +979,108 @@ def apply_runtime_performance_config(perf_cfg=None):
         64 * 1024,
         16 * 1024 * 1024,
     )
+    CONTENT_SEARCH_WORKERS = _clamp_int(
+        perf_cfg.get("content_search_workers", CONTENT_SEARCH_WORKERS),
+        CONTENT_SEARCH_WORKERS,
+        0,
+        32,
+    )
+    CONTENT_SEARCH_DETECT_ENCODING = _to_bool(
+        perf_cfg.get("content_search_detect_encoding", CONTENT_SEARCH_DETECT_ENCODING),
+        CONTENT_SEARCH_DETECT_ENCODING,
+    )
+    CONTENT_SEARCH_BINARY_EXT_LEARN = _clamp_int(
+        perf_cfg.get("content_search_binary_ext_learn", CONTENT_SEARCH_BINARY_EXT_LEARN),
+        CONTENT_SEARCH_BINARY_EXT_LEARN,
+        0,
+        100000,
+    )
+    CONTENT_SEARCH_HIT_LOCATIONS = _clamp_int(
+        perf_cfg.get("content_search_hit_locations", CONTENT_SEARCH_HIT_LOCATIONS),
+        CONTENT_SEARCH_HIT_LOCATIONS,
+        0,
+        1000,
+    )
+    SEARCH_PREVIEW_CONTEXT_LINES = _clamp_int(
+        perf_cfg.get("search_preview_context_lines", SEARCH_PREVIEW_CONTEXT_LINES),
+        SEARCH_PREVIEW_CONTEXT_LINES,
+        0,
+        20,
+    )
+    SEARCH_RESULT_CACHE_PERSISTENT = _to_bool(
+        perf_cfg.get("search_result_cache_persistent", SEARCH_RESULT_CACHE_PERSISTENT),
+        SEARCH_RESULT_CACHE_PERSISTENT,
+    )
+    SEARCH_RESULT_CACHE_MAX_BYTES = _clamp_int(
+        perf_cfg.get("search_result_cache_max_bytes", SEARCH_RESULT_CACHE_MAX_BYTES),
+        SEARCH_RESULT_CACHE_MAX_BYTES,
+        1024 * 1024,
+        2 * 1024 * 1024 * 1024,
+    )
+    SEARCH_RESULT_CACHE_MAX_RESULTS = _clamp_int(
+        perf_cfg.get("search_result_cache_max_results", SEARCH_RESULT_CACHE_MAX_RESULTS),
+        SEARCH_RESULT_CACHE_MAX_RESULTS,
+        1000,
+        1000000,
+    )
+    SEARCH_FILENAME_INDEX_ENABLED = _to_bool(
+        perf_cfg.get("search_filename_index_enabled", SEARCH_FILENAME_INDEX_ENABLED),
+        SEARCH_FILENAME_INDEX_ENABLED,
+    )
+    SEARCH_FILENAME_INDEX_REFRESH_SECONDS = _clamp_int(
+        perf_cfg.get("search_filename_index_refresh_seconds", SEARCH_FILENAME_INDEX_REFRESH_SECONDS),
+        SEARCH_FILENAME_INDEX_REFRESH_SECONDS,
+        0,
+        24 * 3600,
+    )
+    SEARCH_INDEX_MAX_BYTES = _clamp_int(
+        perf_cfg.get("search_index_max_bytes", SEARCH_INDEX_MAX_BYTES),
+        SEARCH_INDEX_MAX_BYTES,
+        16 * 1024 * 1024,
+        16 * 1024 * 1024 * 1024,
+    )
+    exclude_dirs = perf_cfg.get("search_exclude_dirs", SEARCH_EXCLUDE_DIR_PATTERNS)
+    if isinstance(exclude_dirs, str):
+        exclude_dirs = parse_dir_exclude_patterns(exclude_dirs)
+    if isinstance(exclude_dirs, (list, tuple)):
+        SEARCH_EXCLUDE_DIR_PATTERNS = [str(p).strip() for p in exclude_dirs if str(p).strip()]
+    SEARCH_MAX_DEPTH = _clamp_int(
+        perf_cfg.get("search_max_depth", SEARCH_MAX_DEPTH),
+        SEARCH_MAX_DEPTH,
+        0,
+        1000,
+    )
+    SEARCH_RESPECT_GITIGNORE = _to_bool(
+        perf_cfg.get("search_respect_gitignore", SEARCH_RESPECT_GITIGNORE),
+        SEARCH_RESPECT_GITIGNORE,
+    )
+    GITIGNORE_CACHE_MAX_ENTRIES = _clamp_int(
+        perf_cfg.get("gitignore_cache_max_entries", GITIGNORE_CACHE_MAX_ENTRIES),
+        GITIGNORE_CACHE_MAX_ENTRIES,
+        64,
+        1000000,
+    )
+    SEARCH_WATCH_MAX_DIRS = _clamp_int(
+        perf_cfg.get("search_watch_max_dirs", SEARCH_WATCH_MAX_DIRS),
+        SEARCH_WATCH_MAX_DIRS,
+        1,
+        100000,
+    )
+    SEARCH_WATCH_POLL_MS = _clamp_int(
+        perf_cfg.get("search_watch_poll_ms", SEARCH_WATCH_POLL_MS),
+        SEARCH_WATCH_POLL_MS,
+        0,
+        600000,
+    )
+    CONTENT_INDEX_MAX_FILE_BYTES = _clamp_int(
+        perf_cfg.get("content_index_max_file_bytes", CONTENT_INDEX_MAX_FILE_BYTES),
+        CONTENT_INDEX_MAX_FILE_BYTES,
+        64 * 1024,
+        16 * 1024 * 1024,
+    )
+    everything_backend = str(perf_cfg.get("everything_backend", EVERYTHING_BACKEND)).strip().lower()
+    if everything_backend in ('auto', 'sdk', 'es'):
+        EVERYTHING_BACKEND = everything_backend
     SEARCH_RESULT_QUEUE_MAXSIZE = _clamp_int(
         perf_cfg.get("search_result_queue_maxsize", SEARCH_RESULT_QUEUE_MAXSIZE),
         SEARCH_RESULT_QUEUE_MAXSIZE,
@@ -907,6 +1115,52 @@ def apply_runtime_performance_config(perf_cfg=None):
         0.1,
         0.98,
     )
+    SEARCH_METADATA_HYDRATE_WORKERS = _clamp_int(
+        perf_cfg.get("search_metadata_hydrate_workers", SEARCH_METADATA_HYDRATE_WORKERS),
+        SEARCH_METADATA_HYDRATE_WORKERS,
+        1,
+        16,
+    )
+    FILE_OP_MAX_INFLIGHT_TASKS = _clamp_int(
+        perf_cfg.get("file_op_max_inflight_tasks", FILE_OP_MAX_INFLIGHT_TASKS),
+        FILE_OP_MAX_INFLIGHT_TASKS,
+        16,
+        100000,
+    )
+    FILE_OP_ADAPTIVE_CONCURRENCY = _to_bool(
+        perf_cfg.get("file_op_adaptive_concurrency", FILE_OP_ADAPTIVE_CONCURRENCY),
+        FILE_OP_ADAPTIVE_CONCURRENCY,
+    )
+    FILE_OP_MAX_IO_WORKERS = _clamp_int(
+        perf_cfg.get("file_op_max_io_workers", FILE_OP_MAX_IO_WORKERS),
+        FILE_OP_MAX_IO_WORKERS,
+        1,
+        256,
+    )
+    FILE_OP_SMALL_FILE_BYTES = _clamp_int(
+        perf_cfg.get("file_op_small_file_bytes", FILE_OP_SMALL_FILE_BYTES),
+        FILE_OP_SMALL_FILE_BYTES,
+        0,
+        16 * 1024 * 1024,
+    )
+    FILE_OP_SMALL_FILE_BATCH = _clamp_int(
+        perf_cfg.get("file_op_small_file_batch", FILE_OP_SMALL_FILE_BATCH),
+        FILE_OP_SMALL_FILE_BATCH,
+        1,
+        4096,
+    )
+    FILE_OP_CHUNKED_COPY_THRESHOLD = _clamp_int(
+        perf_cfg.get("file_op_chunked_copy_threshold", FILE_OP_CHUNKED_COPY_THRESHOLD),
+        FILE_OP_CHUNKED_COPY_THRESHOLD,
+        1024 * 1024,
+        64 * 1024 * 1024 * 1024,
+    )
+    FILE_OP_COPY_CHUNK_SIZE = _clamp_int(
+        perf_cfg.get("file_op_copy_chunk_size", FILE_OP_COPY_CHUNK_SIZE),
+        FILE_OP_COPY_CHUNK_SIZE,
+        64 * 1024,
+        256 * 1024 * 1024,
+    ) // (64 * 1024) * (64 * 1024)
 
     # 保证内存阈值不大于单文件扫描上限
     if CONTENT_SEARCH_IN_MEMORY_THRESHOLD > CONTENT_SEARCH_MAX_BYTES_PER_FILE:
@@ -923,12 +1177,31 @@ def apply_runtime_performance_config(perf_cfg=None):
         f"chunk={CONTENT_SEARCH_CHUNK_SIZE}",
         f"max_file={CONTENT_SEARCH_MAX_BYTES_PER_FILE}",
         f"in_memory={CONTENT_SEARCH_IN_MEMORY_THRESHOLD}",
+        f"workers={CONTENT_SEARCH_WORKERS}",
+        f"detect_encoding={CONTENT_SEARCH_DETECT_ENCODING}",
+        f"binary_ext_learn={CONTENT_SEARCH_BINARY_EXT_LEARN}",
+        f"hit_locations={CONTENT_SEARCH_HIT_LOCATIONS}",
+        f"preview_context={SEARCH_PREVIEW_CONTEXT_LINES}",
+        f"exclude_dirs={SEARCH_EXCLUDE_DIR_PATTERNS}",
+        f"max_depth={SEARCH_MAX_DEPTH}",
+        f"respect_gitignore={SEARCH_RESPECT_GITIGNORE}",
+        f"gitignore_cache={GITIGNORE_CACHE_MAX_ENTRIES}",
+        f"watch={SEARCH_WATCH_MAX_DIRS}/{SEARCH_WATCH_POLL_MS}ms",
+        f"file_op=inflight:{FILE_OP_MAX_INFLIGHT_TASKS}/adaptive:{FILE_OP_ADAPTIVE_CONCURRENCY}/max:{FILE_OP_MAX_IO_WORKERS}",
+        f"small_file_batch={FILE_OP_SMALL_FILE_BATCH}x<{FILE_OP_SMALL_FILE_BYTES}",
+        f"chunked_copy={FILE_OP_CHUNKED_COPY_THRESHOLD}/{FILE_OP_COPY_CHUNK_SIZE}",
+        f"result_cache={SEARCH_RESULT_CACHE_PERSISTENT}/{SEARCH_RESULT_CACHE_MAX_BYTES}/{SEARCH_RESULT_CACHE_MAX_RESULTS}",
+        f"filename_index={SEARCH_FILENAME_INDEX_ENABLED}/{SEARCH_FILENAME_INDEX_REFRESH_SECONDS}s",
+        f"index_max={SEARCH_INDEX_MAX_BYTES}",
+        f"content_index_max={CONTENT_INDEX_MAX_FILE_BYTES}",
+        f"everything_backend={EVERYTHING_BACKEND}",
         f"queue={SEARCH_RESULT_QUEUE_MAXSIZE}",
         f"batch_base={SEARCH_RESULT_BATCH_BASE}",
         f"batch_min={SEARCH_RESULT_BATCH_MIN}",
         f"batch_max={SEARCH_RESULT_BATCH_MAX}",
         f"meta_degrade={SEARCH_METADATA_DEGRADE_ENABLED}",
         f"meta_ratio={SEARCH_METADATA_DEGRADE_QUEUE_RATIO}",
+        f"meta_hydrate={SEARCH_METADATA_HYDRATE_WORKERS}",
     )
 
 class SearchCache:
@@ -937,9 +1210,9 @@ class SearchCache:
         self.cache = OrderedDict()
         self.max_size = max_size
     
-    def get_key(self, search_path, keyword, search_filename, search_content, file_types, force_metadata_degrade=False, match_case=False, match_whole_word=False):
+    def get_key(self, search_path, keyword, search_filename, search_content, file_types, force_metadata_degrade=False, match_case=False, match_whole_word=False, match_mode='literal', exclude_dirs=(), max_depth=0, respect_gitignore=False):
         """生成缓存键"""
-        key_str = f"{search_path}|{keyword}|{search_filename}|{search_content}|{file_types}|{force_metadata_degrade}|{match_case}|{match_whole_word}"
+        key_str = f"{search_path}|{keyword}|{search_filename}|{search_content}|{file_types}|{force_metadata_degrade}|{match_case}|{match_whole_word}|{match_mode}|{','.join(exclude_dirs or ())}|{max_depth}|{respect_gitignore}"
         return hashlib.md5(key_str.encode()).hexdigest()
     
     def get(self, key):
@@ -960,6 +1233,34 @@ class SearchCache:
             if len(self.cache) > self.max_size:
                 self.cache.popitem(last=False)
     
+    def find_refinable(self, query):
+        """查找可被 query 细化的已缓存完整结果集，返回 (key, value) 或 None。
+
+        要求：路径/文件名与内容开关/类型过滤/大小写等条件全部相同，字面模式且非全词匹配，
+        旧关键词非空且是新关键词的子串——此时新查询的命中必然是旧结果集的子集。
+        多条候选时取旧关键词最长（结果集最小）的一条。"""
+        if query.get('mode') != 'literal' or query.get('word'):
+            return None
+        keyword = query['keyword'] if query.get('case') else query['keyword'].lower()
+        best = None
+        best_len = 0
+        for key, value in self.cache.items():
+            fingerprint = value[1]
+            old = fingerprint.get('query') if isinstance(fingerprint, dict) else None
+            if not old or fingerprint.get('limited'):
+                continue
+            if any(old.get(name) != query.get(name) for name in query if name != 'keyword'):
+                continue
+            old_keyword = old['keyword'] if query.get('case') else old['keyword'].lower()
+            if old_keyword and old_keyword != keyword and old_keyword in keyword and len(old_keyword) > best_len:
+                best = (key, value)
+                best_len = len(old_keyword)
+        return best
+
+    def discard(self, key):
+        """移除单条缓存（校验失效时调用）"""
+        self.cache.pop(key, None)
+
     def clear(self):
         """清空缓存"""
         self.cache.clear()
@@ -967,6 +1268,128 @@ class SearchCache:
 # 全局搜索缓存实例（使用配置常量）
 _search_cache = SearchCache(max_size=MAX_SEARCH_CACHE_SIZE)
 
+
+def search_fingerprint_is_fresh(fingerprint, results):
+    """校验缓存结果是否仍然有效：只重新 stat 搜索时遍历过的目录。
+
+    目录 mtime 变化即说明有文件增删/重命名；内容搜索额外核对每个命中文件的大小与修改时间
+    （缺少元数据的内容命中不会进入缓存）。注意：原地修改未命中的文件不会改变目录 mtime，
+    此类新增命中要到目录变化或重新搜索时才会出现，因此内容搜索结果只缓存在内存中，不写入持久化缓存。"""
+    base = fingerprint.get('root') or ''
+    try:
+        for rel_dir, mtime_ns in fingerprint.get('dirs', ()):
+            if os.stat(base + rel_dir).st_mtime_ns != mtime_ns:
+                return False
+        if fingerprint.get('check_files'):
+            for item in results:
+                if item.get('full_path', '').startswith('📁') or item.get('sort_size_bytes') is None:
+                    continue  # 文件夹与仅文件名命中的结果（未取元数据）已由目录 mtime 覆盖
+                st = os.stat(item['path'])
+                if st.st_size != item['sort_size_bytes'] or st.st_mtime != item['sort_date_ts']:
+                    return False
+    except OSError:
+        return False
+    return True
+
+
+class PersistentSearchCache:
+    """跨重启的搜索结果缓存（SQLite，位于索引目录下的 search_cache.db）。
+
+    每条记录保存完整结果集（zlib 压缩的 JSON）及遍历目录的 mtime 指纹，只保存文件名搜索的结果；
+    复用时由调用方用 search_fingerprint_is_fresh 校验，总大小超过 SEARCH_RESULT_CACHE_MAX_BYTES
+    时按最近使用时间淘汰。缓存只是加速手段，读写失败一律视为未命中。"""
+
+    FILENAME = 'search_cache.db'
+
+    def __init__(self):
+        self.path = get_app_data_path(SEARCH_FILENAME_INDEX_DIR, self.FILENAME)
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect_locked(self):
+        if self._conn is None:
+            import sqlite3
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, last_used REAL NOT NULL, nbytes INTEGER NOT NULL, "
+                "fingerprint BLOB NOT NULL, payload BLOB NOT NULL)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key):
+        """返回 (results, fingerprint)；未命中或读取失败返回 None。"""
+        import zlib
+        with self._lock:
+            try:
+                conn = self._connect_locked()
+                row = conn.execute("SELECT fingerprint, payload FROM results WHERE key=?", (key,)).fetchone()
+                if row is None:
+                    return None
+                conn.execute("UPDATE results SET last_used=? WHERE key=?", (time.time(), key))
+                conn.commit()
+                fingerprint = json.loads(zlib.decompress(row[0]).decode('utf-8'))
+                results = json.loads(zlib.decompress(row[1]).decode('utf-8'))
+                return results, fingerprint
+            except Exception as e:
+                debug_print(f"[SearchCache] Read failed {self.path}: {e}")
+                return None
+
+    def put(self, key, results, fingerprint):
+        import zlib
+        try:
+            fp_blob = zlib.compress(json.dumps(fingerprint, ensure_ascii=False).encode('utf-8'), 6)
+            payload = zlib.compress(json.dumps(results, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), 6)
+        except Exception as e:
+            debug_print(f"[SearchCache] Encode failed: {e}")
+            return
+        nbytes = len(fp_blob) + len(payload)
+        if nbytes > SEARCH_RESULT_CACHE_MAX_BYTES:
+            return
+        with self._lock:
+            try:
+                conn = self._connect_locked()
+                conn.execute(
+                    "INSERT OR REPLACE INTO results (key, last_used, nbytes, fingerprint, payload) VALUES (?, ?, ?, ?, ?)",
+                    (key, time.time(), nbytes, fp_blob, payload),
+                )
+                # 按总字节预算淘汰最久未使用的记录
+                total = conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM results").fetchone()[0]
+                if total > SEARCH_RESULT_CACHE_MAX_BYTES:
+                    for old_key, old_bytes in conn.execute(
+                            "SELECT key, nbytes FROM results WHERE key<>? ORDER BY last_used", (key,)).fetchall():
+                        conn.execute("DELETE FROM results WHERE key=?", (old_key,))
+                        total -= old_bytes
+                        if total <= SEARCH_RESULT_CACHE_MAX_BYTES:
+                            break
+                conn.commit()
+            except Exception as e:
+                debug_print(f"[SearchCache] Write failed {self.path}: {e}")
+
+    def discard(self, key):
+        with self._lock:
+            try:
+                conn = self._connect_locked()
+                conn.execute("DELETE FROM results WHERE key=?", (key,))
+                conn.commit()
+            except Exception as e:
+                debug_print(f"[SearchCache] Delete failed {self.path}: {e}")
+
+
+_persistent_search_cache = None
+_persistent_search_cache_lock = threading.Lock()
+
+
+def get_persistent_search_cache():
+    global _persistent_search_cache
+    with _persistent_search_cache_lock:
+        if _persistent_search_cache is None:
+            _persistent_search_cache = PersistentSearchCache()
+        return _persistent_search_cache
+
 from PyQt5.QtWidgets import QDialog, QTreeWidget, QTreeWidgetItem, QVBoxLayout, QPushButton
 # 多层结构书签弹窗
 class BookmarkDialog(QDialog):
@@ -1084,7 +1507,7 @@ class QuickFindResultsDialog(QDialog):
 
 # 自定义委托：在文件名列实现省略号在开头
 from PyQt5.QtWidgets import QStyledItemDelegate, QTableView, QAbstractItemView
-from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal
 from PyQt5.QtGui import QPainter
 
 class ElideLeftDelegate(QStyledItemDelegate):
@@ -1104,12 +1527,414 @@ class ElideLeftDelegate(QStyledItemDelegate):
             super().paint(painter, option, index)
 
 
+class SearchResultChannel:
+    """搜索线程 → UI 的结果通道，接口与 queue.Queue 兼容（put/get_nowait/qsize/maxsize）。
+
+    有界环形缓冲（deque）保存消息；通道由空变为非空时调用 wakeup 回调唤醒 UI（边沿触发，
+    UI 每轮消费前 rearm），UI 不再空转轮询。同时统计吞吐、深度、丢弃、生产者等待与 UI 应用耗时，
+    用于定位大搜索卡在生产端还是界面端。"""
+
+    def __init__(self, maxsize, wakeup=None):
+        self.maxsize = maxsize
+        self._items = deque()
+        self._cond = threading.Condition(threading.Lock())
+        self._wakeup = wakeup
+        self._armed = True
+        self.reset_stats()
+
+    def set_wakeup(self, callback):
+        self._wakeup = callback
+
+    def reset_stats(self):
+        """新一次搜索开始时清零统计。"""
+        self._started = time.monotonic()
+        self.messages_in = 0
+        self.rows_in = 0
+        self.rows_out = 0
+        self.dropped_messages = 0
+        self.dropped_rows = 0
+        self.max_depth = 0
+        self.put_wait_s = 0.0
+        self.max_latency_s = 0.0
+        self.apply_count = 0
+        self.apply_rows = 0
+        self.apply_total_s = 0.0
+        self.apply_max_s = 0.0
+
+    @staticmethod
+    def _row_count(item):
+        kind = item.get('type')
+        if kind == 'result_batch':
+            return len(item.get('items') or ())
+        return 1 if kind == 'result' else 0
+
+    def put(self, item, block=True, timeout=None):
+        """放入一条消息；满时最多等待 timeout 秒，仍满则计入丢弃并抛出 queue.Full。"""
+        rows = self._row_count(item)
+        wake = False
+        with self._cond:
+            if len(self._items) >= self.maxsize:
+                wait_start = time.monotonic()
+                deadline = None if timeout is None else wait_start + timeout
+                while len(self._items) >= self.maxsize:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if not block or (remaining is not None and remaining <= 0):
+                        self.put_wait_s += time.monotonic() - wait_start
+                        self.dropped_messages += 1
+                        self.dropped_rows += rows
+                        raise queue.Full
+                    self._cond.wait(remaining)
+                self.put_wait_s += time.monotonic() - wait_start
+            self._items.append((time.monotonic(), item))
+            self.messages_in += 1
+            self.rows_in += rows
+            if len(self._items) > self.max_depth:
+                self.max_depth = len(self._items)
+            if self._armed:
+                self._armed = False
+                wake = True
+        if wake and self._wakeup is not None:
+            try:
+                self._wakeup()
+            except Exception:
+                pass
+
+    def get_nowait(self):
+        with self._cond:
+            if not self._items:
+                raise queue.Empty
+            enqueued, item = self._items.popleft()
+            self._cond.notify()
+            latency = time.monotonic() - enqueued
+            if latency > self.max_latency_s:
+                self.max_latency_s = latency
+            self.rows_out += self._row_count(item)
+        return item
+
+    def rearm(self):
+        """消费方开始一轮消费前调用：之后的第一次 put 会再次触发唤醒。"""
+        with self._cond:
+            self._armed = True
+
+    def qsize(self):
+        return len(self._items)
+
+    def empty(self):
+        return not self._items
+
+    def record_apply(self, seconds, rows):
+        """记录 UI 把一批结果（rows 行）写入表格的耗时。"""
+        with self._cond:
+            self.apply_count += 1
+            self.apply_rows += rows
+            self.apply_total_s += seconds
+            if seconds > self.apply_max_s:
+                self.apply_max_s = seconds
+
+    def stats(self):
+        elapsed = max(1e-6, time.monotonic() - self._started)
+        with self._cond:
+            return {
+                'rows_in': self.rows_in,
+                'rows_out': self.rows_out,
+                'rows_per_s': self.rows_in / elapsed,
+                'depth': len(self._items),
+                'max_depth': self.max_depth,
+                'dropped_rows': self.dropped_rows,
+                'dropped_messages': self.dropped_messages,
+                'put_wait_s': self.put_wait_s,
+                'max_latency_ms': self.max_latency_s * 1000,
+                'apply_avg_ms': (self.apply_total_s / self.apply_count * 1000) if self.apply_count else 0.0,
+                'apply_max_ms': self.apply_max_s * 1000,
+                'apply_rows_per_s': (self.apply_rows / self.apply_total_s) if self.apply_total_s > 0 else 0.0,
+            }
+
+    def stats_text(self):
+        st = self.stats()
+        return (
+            f"rows={st['rows_in']}/{st['rows_out']} ({st['rows_per_s']:.0f}/s) "
+            f"depth={st['depth']}/{st['max_depth']}/{self.maxsize} "
+            f"dropped={st['dropped_rows']} put_wait={st['put_wait_s']:.2f}s "
+            f"latency_max={st['max_latency_ms']:.0f}ms "
+            f"apply_avg={st['apply_avg_ms']:.1f}ms apply_max={st['apply_max_ms']:.1f}ms "
+            f"apply_rate={st['apply_rows_per_s']:.0f}/s"
+        )
+
+
+class MetadataHydrator:
+    """后台补齐搜索结果元数据（大小/修改时间）的有界线程池。
+
+    搜索线程先只发出路径，表格模型把可见行（紧急）或排序前需要的行（批量）提交到这里；
+    工作线程 stat 后通过 on_ready(generation, [(key, size, mtime), ...]) 回传（在工作线程中调用，
+    由调用方转回 UI 线程）。stat 失败的条目 size/mtime 为 None。reset() 后旧请求的结果作废。
+    工作线程空闲 IDLE_SECONDS 后自行退出（有新请求时再按需启动）；close() 后全部退出且不再接受请求。"""
+
+    CHUNK = 64
+    IDLE_SECONDS = 30
+
+    def __init__(self, on_ready, workers=None):
+        self._on_ready = on_ready
+        self._workers = workers or SEARCH_METADATA_HYDRATE_WORKERS
+        self._urgent = deque()
+        self._bulk = deque()
+        self._cond = threading.Condition(threading.Lock())
+        self._threads = []
+        self._stopped = False
+        self.generation = 0
+
+    def submit(self, items, urgent=True):
+        """items 为 [(key, path), ...]。"""
+        if not items:
+            return
+        with self._cond:
+            if self._stopped:
+                return
+            (self._urgent if urgent else self._bulk).extend(items)
+            if len(self._threads) < self._workers:
+                thread = threading.Thread(target=self._run, name="SearchMetaHydrate", daemon=True)
+                self._threads.append(thread)
+                thread.start()
+            self._cond.notify_all()
+
+    def reset(self):
+        with self._cond:
+            self.generation += 1
+            self._urgent.clear()
+            self._bulk.clear()
+
+    def close(self):
+        """停止全部工作线程（对话框关闭时调用），之后的 submit 被忽略。"""
+        with self._cond:
+            self._stopped = True
+            self.generation += 1
+            self._urgent.clear()
+            self._bulk.clear()
+            self._cond.notify_all()
+
+    def _take_chunk(self):
+        """取一批待补齐条目；已关闭或空闲超时返回 None，调用线程随即退出。"""
+        with self._cond:
+            while not self._urgent and not self._bulk:
+                if self._stopped or not self._cond.wait(self.IDLE_SECONDS):
+                    if self._urgent or self._bulk:
+                        break
+                    self._retire_current_locked()
+                    return None
+            if self._stopped:
+                self._retire_current_locked()
+                return None
+            source = self._urgent if self._urgent else self._bulk
+            chunk = [source.popleft() for _ in range(min(self.CHUNK, len(source)))]
+            return self.generation, chunk
+
+    def _retire_current_locked(self):
+        current = threading.current_thread()
+        if current in self._threads:
+            self._threads.remove(current)
+
+    def _run(self):
+        while True:
+            taken = self._take_chunk()
+            if taken is None:
+                return
+            generation, chunk = taken
+            results = []
+            for key, path in chunk:
+                try:
+                    st = os.stat(path)
+                    results.append((key, st.st_size, st.st_mtime))
+                except OSError:
+                    results.append((key, None, None))
+            if generation == self.generation:
+                try:
+                    self._on_ready(generation, results)
+                except Exception as e:
+                    debug_print(f"[Search] Metadata hydrate callback failed: {e}")
+
+
+class SearchPreviewReader:
+    """结果预览窗格的上下文读取：按路径缓存少量只读 mmap（LRU），只读取命中行附近的字节。
+
+    文件大小/mtime 变化时重新映射。容量很小，并在新搜索或关闭对话框时 clear()，
+    避免长时间占用文件句柄（Windows 上被映射的文件无法删除或重命名）。"""
+
+    MAX_LINE_BYTES = 4096  # 向前/向后查找换行的最大跨度（超长行只取命中附近的片段）
+    MAX_LINE_CHARS = 400  # 单行显示上限，超出时截取命中附近的部分
+
+    def __init__(self, capacity=None):
+        self.capacity = capacity or SEARCH_PREVIEW_OPEN_FILES
+        self._views = OrderedDict()  # path -> ((mtime_ns, size), file, mmap)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _close_view(view):
+        _stamp, f, mm = view
+        try:
+            mm.close()
+        finally:
+            f.close()
+
+    def clear(self):
+        with self._lock:
+            views = list(self._views.values())
+            self._views.clear()
+        for view in views:
+            self._close_view(view)
+
+    def _open(self, path):
+        import mmap
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        stale = None
+        with self._lock:
+            view = self._views.get(path)
+            if view is not None:
+                if view[0] == stamp:
+                    self._views.move_to_end(path)
+                    return view[2]
+                stale = self._views.pop(path)
+        if stale is not None:
+            self._close_view(stale)
+        if st.st_size == 0:
+            return b''
+        f = open(path, 'rb')
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            f.close()
+            raise
+        evicted = []
+        with self._lock:
+            self._views[path] = (stamp, f, mm)
+            while len(self._views) > self.capacity:
+                evicted.append(self._views.popitem(last=False)[1])
+        for view in evicted:
+            self._close_view(view)
+        return mm
+
+    @staticmethod
+    def _rfind_newline(data, newline, unit, lo, hi, base):
+        pos = data.rfind(newline, lo, hi)
+        while pos != -1 and unit > 1 and (pos - base) % unit:
+            pos = data.rfind(newline, lo, pos + len(newline) - 1)
+        return pos
+
+    def read_context(self, path, encoding, hits, context_lines):
+        """读取各命中行及前后 context_lines 行，返回按行号排序的 [(行号, 文本, 是否命中行), ...]。
+
+        hits 为 ((行号, 字节偏移), ...)；相邻命中的上下文合并，不重复读取。"""
+        data = self._open(path)
+        codec, start, newline, unit = text_layout(encoding or 'utf-8', data[:4])
+        end = len(data)
+        nl_len = len(newline)
+        span = self.MAX_LINE_BYTES * (context_lines + 1)
+        lines = {}
+        for line_no, offset in hits:
+            offset = min(max(int(offset), start), end)
+            # 向前：命中行行首，再往前 context_lines 行
+            lo = max(start, offset - span)
+            begin = offset
+            first_line = line_no
+            hit_line_start = None
+            for k in range(context_lines + 1):
+                # k=0 找命中行行首；之后每轮越过上一行的换行，再往前一行
+                nl = self._rfind_newline(data, newline, unit, lo, begin - (nl_len if k else 0), start)
+                if nl == -1:
+                    if lo == start and (k == 0 or begin > start):
+                        begin = start
+                        first_line -= 1 if k else 0
+                    elif k == 0:
+                        begin = lo + (lo - start) % unit  # 超长行：从命中前的片段开始（保持字符对齐）
+                    break
+                begin = nl + nl_len
+                first_line -= 1 if k else 0
+                if k == 0:
+                    hit_line_start = begin
+            if hit_line_start is None:
+                hit_line_start = begin
+            # 向后：命中行结尾，再往后 context_lines 行
+            hi = min(end, offset + span)
+            stop = offset
+            for _k in range(context_lines + 1):
+                nl = find_newline(data, newline, unit, stop, hi, start)
+                if nl == -1:
+                    stop = hi
+                    break
+                stop = nl + nl_len
+            parts = data[begin:stop].decode(codec, errors='replace').split('\n')
+            if len(parts) > 1 and not parts[-1]:
+                parts.pop()  # 以换行结尾
+            for i, line_text in enumerate(parts):
+                number = first_line + i
+                line_text = line_text.rstrip('\r')
+                if len(line_text) > self.MAX_LINE_CHARS:
+                    center = 0
+                    if number == line_no:
+                        center = len(data[hit_line_start:offset].decode(codec, errors='replace'))
+                    left = max(0, center - self.MAX_LINE_CHARS // 3)
+                    line_text = ('…' if left else '') + line_text[left:left + self.MAX_LINE_CHARS] + '…'
+                previous = lines.get(number)
+                lines[number] = (line_text, number == line_no or (previous is not None and previous[1]))
+        return [(number, text, is_hit) for number, (text, is_hit) in sorted(lines.items())]
+
+
+_numpy_module = None
+_numpy_checked = False
+
+
+def _get_numpy():
+    """按需导入 NumPy（可选依赖，未安装时返回 None；首次调用才导入，不拖慢启动）。"""
+    global _numpy_module, _numpy_checked
+    if not _numpy_checked:
+        _numpy_checked = True
+        try:
+            import numpy
+            _numpy_module = numpy
+        except ImportError:
+            _numpy_module = None
+    return _numpy_module
+
+
 class SearchResultsTableModel(QAbstractTableModel):
+    """搜索结果表格模型（列式存储 + 下标视图）。
+
+    每行只保存 目录编号、文件名、文件夹标志、修改时间、大小 五列：目录前缀去重共享，
+    时间/大小放在 array 中（未知分别记为 NaN / -1）；名称、类型、日期、大小等显示文本
+    在 data() 中按需格式化，百万级结果时内存约为逐行保存 dict 的十分之一。
+
+    行数据只追加不移动：排序只计算存储下标的排列（数值列可用 NumPy argsort），
+    快速筛选在排列上再取子集，两者都不复制行数据。"""
     _HEADER_KEYS = ["文件名", "类型", "修改日期", "大小"]
+    _META_KNOWN = 0
+    _META_MISSING = 1
+    _META_REQUESTED = 2
+    metadata_ready = pyqtSignal(object)  # (generation, [(storage_row, size, mtime), ...])，由补齐线程发出
 
     def __init__(self, parent=None):
         super().__init__(parent)
-        self._rows = []
+        self._filter_text = ''
+        self._sort_spec = None  # 最近一次排序的 (column, order)
+        self._resort_after_hydrate = False
+        self._hydrator = MetadataHydrator(lambda generation, results: self.metadata_ready.emit((generation, results)))
+        self.metadata_ready.connect(self._apply_metadata)
+        self._reset_columns()
+
+    def _reset_columns(self):
+        self._dir_prefixes = []  # 目录前缀（含末尾分隔符），按编号去重
+        self._dir_lookup = {}  # 目录前缀 -> 编号
+        self._dir_ids = array('I')
+        self._names = []
+        self._folder_flags = bytearray()
+        self._mtimes = array('d')
+        self._sizes = array('q')
+        self._meta_state = bytearray()  # 每行元数据状态：已知 / 缺失 / 已提交补齐
+        self._hits = {}  # 存储下标 -> (编码, ((行号, 字节偏移), ...))，只有内容命中的行才有
+        self._name_keys = None  # 小写显示名称，首次按名称排序时生成，之后随追加维护
+        self._order = None  # 排序后的存储下标排列；None 表示按追加顺序
+        self._view = None  # 筛选后可见的存储下标（按 _order 顺序）；None 表示不筛选
+
+    def _storage_row(self, row):
+        return self._view[row] if self._view is not None else (self._order[row] if self._order is not None else row)
 
     @property
     def HEADERS(self):
@@ -1118,34 +1943,69 @@ class SearchResultsTableModel(QAbstractTableModel):
     def rowCount(self, parent=QModelIndex()):
         if parent.isValid():
             return 0
-        return len(self._rows)
+        return len(self._view) if self._view is not None else len(self._names)
+
+    def total_count(self):
+        """已保存的结果总数（不受快速筛选影响）。"""
+        return len(self._names)
 
     def columnCount(self, parent=QModelIndex()):
         if parent.isValid():
             return 0
         return len(self.HEADERS)
 
+    # ---- 按需格式化 ----
+    def _display_name(self, row):
+        name = self._names[row]
+        if self._folder_flags[row]:
+            return f"📁 {name}"
+        return f"📄 {self._dir_prefixes[self._dir_ids[row]]}{os.path.splitext(name)[0]}"
+
+    def _display_type(self, row):
+        if self._folder_flags[row]:
+            return tr('文件夹')
+        ext = os.path.splitext(self._names[row])[1]
+        return ext[1:].upper() if ext else tr("无")
+
+    def _display_date(self, row):
+        mtime = self._mtimes[row]
+        if mtime != mtime:  # NaN：未获取（元数据降级或 stat 失败）
+            return "-"
+        return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(mtime))
+
+    def _display_size(self, row):
+        size = self._sizes[row]
+        if size < 0 or self._folder_flags[row]:
+            return "-"
+        return format_file_size(size)
+
     def data(self, index, role=Qt.DisplayRole):
         if not index.isValid():
             return None
-        row = self._rows[index.row()]
+        row = self._storage_row(index.row())
         column = index.column()
 
         if role == Qt.DisplayRole:
             if column == 0:
-                return row.get('name', '')
+                return self._display_name(row)
             if column == 1:
-                return row.get('file_type', '')
+                return self._display_type(row)
             if column == 2:
-                return row.get('date', '')
+                return self._display_date(row)
             if column == 3:
-                return row.get('size', '')
+                return self._display_size(row)
         elif role == Qt.ToolTipRole:
             if column == 0:
-                return row.get('full_path') or row.get('path', '')
-            return row.get('path', '')
+                tip = f"{'📁' if self._folder_flags[row] else '📄'} {self._path_at(row)}"
+                hits = self._hits.get(row)
+                if hits:
+                    line_numbers = sorted({line for line, _offset in hits[1]})
+                    shown = ", ".join(str(line) for line in line_numbers[:10])
+                    tip += "\n" + tr("匹配行: {}").format(shown + (" …" if len(line_numbers) > 10 else ""))
+                return tip
+            return self._path_at(row)
         elif role == Qt.UserRole:
-            return row.get('path', '')
+            return self._path_at(row)
         elif role == Qt.TextAlignmentRole and column == 0:
             return int(Qt.AlignLeft | Qt.AlignVCenter)
         return None
@@ -1157,48 +2017,291 @@ class SearchResultsTableModel(QAbstractTableModel):
             return self.HEADERS[section]
         return super().headerData(section, orientation, role)
 
+    def _sorted_numeric(self, values, missing, descending):
+        """数值列排序，返回存储下标排列。缺失值升序时排在最后、降序时排在最前（与原排序键一致）。"""
+        np = _get_numpy()
+        if np is not None:
+            if values.typecode == 'd':
+                keys = np.frombuffer(values, dtype=np.float64)
+                absent = np.isnan(keys)
+            else:
+                keys = np.frombuffer(values, dtype=np.int64)
+                absent = keys < 0
+            keys = -keys if descending else keys.copy()
+            fill = np.finfo(np.float64).max if values.typecode == 'd' else np.iinfo(np.int64).max
+            keys[absent] = -fill if descending else fill
+            return array('I', np.argsort(keys, kind='stable').astype(np.uint32).tobytes())
+        key_fn = lambda i: (missing(values[i]), values[i] if not missing(values[i]) else 0)
+        return array('I', sorted(range(len(values)), key=key_fn, reverse=descending))
+
     def sort(self, column, order=Qt.AscendingOrder):
-        key_map = {
-            0: lambda row: str(row.get('name', '')).lower(),
-            1: lambda row: str(row.get('file_type', '')).lower(),
-            2: lambda row: (row.get('sort_date_ts') is None, row.get('sort_date_ts') if row.get('sort_date_ts') is not None else 0, str(row.get('date', ''))),
-            3: lambda row: (row.get('sort_size_bytes') is None, row.get('sort_size_bytes') if row.get('sort_size_bytes') is not None else -1, str(row.get('size', ''))),
-        }
-        key_fn = key_map.get(column)
-        if key_fn is None or len(self._rows) <= 1:
+        count = len(self._names)
+        if column not in (0, 1, 2, 3) or count <= 1:
             return
+        self._sort_spec = (column, order)
+        if column in (2, 3):
+            # 按日期/大小排序前先把缺失元数据的行交给后台补齐，补齐完成后自动重排
+            self._resort_after_hydrate = self._request_rows(
+                [row for row in range(count) if self._meta_state[row] == self._META_MISSING], urgent=False) > 0
+        descending = (order == Qt.DescendingOrder)
         self.layoutAboutToBeChanged.emit()
-        self._rows.sort(key=key_fn, reverse=(order == Qt.DescendingOrder))
+        if column == 2:
+            self._order = self._sorted_numeric(self._mtimes, lambda v: v != v, descending)
+        elif column == 3:
+            self._order = self._sorted_numeric(self._sizes, lambda v: v < 0, descending)
+        else:
+            if column == 0:
+                if self._name_keys is None:
+                    self._name_keys = [self._display_name(i).lower() for i in range(count)]
+                keys = self._name_keys
+            else:
+                keys = [self._display_type(i).lower() for i in range(count)]
+            self._order = array('I', sorted(range(count), key=keys.__getitem__, reverse=descending))
+        self._view = self._filtered(self._order) if self._filter_text else None
         self.layoutChanged.emit()
 
+    # ---- 快速筛选 ----
+    def _row_passes_filter(self, row, dir_hits):
+        dir_id = self._dir_ids[row]
+        hit = dir_hits.get(dir_id)
+        if hit is None:
+            hit = dir_hits[dir_id] = self._filter_text in self._dir_prefixes[dir_id].lower()
+        return hit or self._filter_text in self._path_at(row).lower()
+
+    def _filtered(self, rows):
+        dir_hits = {}
+        return array('I', [row for row in rows if self._row_passes_filter(row, dir_hits)])
+
+    def set_filter_text(self, text):
+        """按路径包含的文字（不区分大小写）筛选可见行，空文本恢复全部；不复制行数据。"""
+        text = (text or '').strip().lower()
+        if text == self._filter_text:
+            return
+        self.beginResetModel()
+        self._filter_text = text
+        if text:
+            rows = self._order if self._order is not None else range(len(self._names))
+            self._view = self._filtered(rows)
+        else:
+            self._view = None
+        self.endResetModel()
+
+    def close(self):
+        """停止后台元数据补齐线程（对话框关闭时调用），释放线程对模型的引用。"""
+        self._hydrator.close()
+
     def clear(self):
         self.beginResetModel()
-        self._rows = []
+        self._hydrator.reset()
+        self._sort_spec = None
+        self._filter_text = ''  # _reset_columns 同时清掉 _view，筛选状态须一起复位
+        self._resort_after_hydrate = False
+        self._reset_columns()
         self.endResetModel()
 
+    # ---- 元数据补齐 ----
+    def _request_rows(self, storage_rows, urgent):
+        items = []
+        for row in storage_rows:
+            if self._meta_state[row] == self._META_MISSING:
+                self._meta_state[row] = self._META_REQUESTED
+                items.append((row, self._path_at(row)))
+        self._hydrator.submit(items, urgent=urgent)
+        return len(items)
+
+    def request_metadata(self, first_row, last_row):
+        """补齐视图行 first_row..last_row（含）中缺失的大小/修改时间（可见区域优先）。"""
+        last_row = min(last_row, self.rowCount() - 1)
+        if first_row > last_row or self._META_MISSING not in self._meta_state:
+            return
+        self._request_rows([self._storage_row(row) for row in range(max(0, first_row), last_row + 1)], urgent=True)
+
+    def _apply_metadata(self, payload):
+        generation, results = payload
+        if generation != self._hydrator.generation or not results:
+            return
+        mtimes = self._mtimes
+        sizes = self._sizes
+        for row, size, mtime in results:
+            if row >= len(self._names):
+                continue
+            self._meta_state[row] = self._META_KNOWN
+            if mtime is not None:
+                mtimes[row] = mtime
+                if not self._folder_flags[row]:
+                    sizes[row] = size
+        count = self.rowCount()
+        if count:
+            self.dataChanged.emit(self.index(0, 2), self.index(count - 1, 3))
+        if self._resort_after_hydrate and self._META_REQUESTED not in self._meta_state:
+            self._resort_after_hydrate = False
+            if self._sort_spec is not None and self._sort_spec[0] in (2, 3):
+                self.sort(*self._sort_spec)
+
     def append_results(self, rows):
+        """追加搜索线程产出的结果 dict：只拆出路径/文件夹标志/时间/大小，不保留 dict 本身。
+
+        已排序或筛选时，新行追加在当前视图末尾（需通过筛选）。返回保存的行数。"""
+        rows = [row for row in rows if isinstance(row, dict)] if rows else []
         if not rows:
             return 0
-        start_row = len(self._rows)
-        end_row = start_row + len(rows) - 1
-        self.beginInsertRows(QModelIndex(), start_row, end_row)
-        normalized_rows = []
+        first_id = len(self._names)
+        if self._view is None:
+            self.beginInsertRows(QModelIndex(), first_id, first_id + len(rows) - 1)
+        dir_lookup = self._dir_lookup
         for row in rows:
-            if not isinstance(row, dict):
-                continue
-            row_copy = dict(row)
-            row_copy.setdefault('sort_date_ts', None)
-            row_copy.setdefault('sort_size_bytes', None)
-            normalized_rows.append(row_copy)
-        self._rows.extend(normalized_rows)
-        self.endInsertRows()
-        return len(normalized_rows)
+            path = row.get('path', '')
+            name = os.path.basename(path)
+            prefix = path[:len(path) - len(name)]
+            dir_id = dir_lookup.get(prefix)
+            if dir_id is None:
+                dir_id = dir_lookup[prefix] = len(self._dir_prefixes)
+                self._dir_prefixes.append(prefix)
+            mtime = row.get('sort_date_ts')
+            size = row.get('sort_size_bytes')
+            self._dir_ids.append(dir_id)
+            self._names.append(name)
+            self._folder_flags.append(1 if str(row.get('full_path', '')).startswith('📁') else 0)
+            self._mtimes.append(float('nan') if mtime is None else mtime)
+            self._sizes.append(-1 if size is None else int(size))
+            self._meta_state.append(self._META_MISSING if mtime is None else self._META_KNOWN)
+            hit_lines = row.get('hit_lines')
+            if hit_lines:
+                self._hits[len(self._names) - 1] = (row.get('hit_encoding'), tuple((int(line), int(offset)) for line, offset in hit_lines))
+        new_ids = range(first_id, len(self._names))
+        if self._name_keys is not None:
+            self._name_keys.extend(self._display_name(i).lower() for i in new_ids)
+        if self._order is not None:
+            self._order.extend(new_ids)
+        if self._view is not None:
+            visible = self._filtered(new_ids)
+            if visible:
+                start_row = len(self._view)
+                self.beginInsertRows(QModelIndex(), start_row, start_row + len(visible) - 1)
+                self._view.extend(visible)
+                self.endInsertRows()
+        else:
+            self.endInsertRows()
+        return len(rows)
+
+    # ---- 监视模式增量更新 ----
+    def _rows_in_dirs(self, dir_ids):
+        return [row for row, dir_id in enumerate(self._dir_ids) if dir_id in dir_ids]
+
+    def _update_row(self, storage_row, row):
+        """用重新评估得到的结果 dict 更新已有行的时间/大小/命中位置，返回是否有变化。"""
+        mtime = row.get('sort_date_ts')
+        size = row.get('sort_size_bytes')
+        mtime = float('nan') if mtime is None else float(mtime)
+        size = -1 if size is None else int(size)
+        hit_lines = row.get('hit_lines')
+        hits = (row.get('hit_encoding'), tuple((int(line), int(offset)) for line, offset in hit_lines)) if hit_lines else None
+        old_mtime = self._mtimes[storage_row]
+        same_mtime = mtime == old_mtime or (mtime != mtime and old_mtime != old_mtime)
+        if same_mtime and size == self._sizes[storage_row] and hits == self._hits.get(storage_row):
+            return False
+        self._mtimes[storage_row] = mtime
+        self._sizes[storage_row] = size
+        self._meta_state[storage_row] = self._META_MISSING if mtime != mtime else self._META_KNOWN
+        if hits:
+            self._hits[storage_row] = hits
+        else:
+            self._hits.pop(storage_row, None)
+        return True
+
+    def _remove_storage_rows(self, doomed):
+        """删除存储下标集合 doomed 中的行，返回删除行数。
+
+        先把当前可见顺序固定为 _view，按可见位置从后往前分段发出行删除通知（保留其余行的选中状态），
+        再压缩列存储并重映射排列、筛选视图与命中位置。"""
+        if not doomed:
+            return 0
+        count = len(self._names)
+        if self._view is None:
+            self._view = array('I', self._order) if self._order is not None else array('I', range(count))
+        positions = [i for i, row in enumerate(self._view) if row in doomed]
+        end = len(positions)
+        while end:
+            start = end - 1
+            while start and positions[start - 1] == positions[start] - 1:
+                start -= 1
+            first, last = positions[start], positions[end - 1]
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self._view[first:last + 1]
+            self.endRemoveRows()
+            end = start
+
+        keep = [row for row in range(count) if row not in doomed]
+        remap = array('l', [-1]) * count
+        for new_row, old_row in enumerate(keep):
+            remap[old_row] = new_row
+        self._dir_ids = array('I', (self._dir_ids[row] for row in keep))
+        self._names = [self._names[row] for row in keep]
+        self._folder_flags = bytearray(self._folder_flags[row] for row in keep)
+        self._mtimes = array('d', (self._mtimes[row] for row in keep))
+        self._sizes = array('q', (self._sizes[row] for row in keep))
+        # 补齐线程按旧下标回传：作废在途请求，已提交的行改回“缺失”，由可见行补齐重新请求
+        self._hydrator.reset()
+        self._resort_after_hydrate = False
+        self._meta_state = bytearray(
+            self._META_MISSING if self._meta_state[row] == self._META_REQUESTED else self._meta_state[row] for row in keep)
+        self._hits = {remap[row]: hits for row, hits in self._hits.items() if row not in doomed}
+        if self._name_keys is not None:
+            self._name_keys = [self._name_keys[row] for row in keep]
+        if self._order is not None:
+            self._order = array('I', (remap[row] for row in self._order if row not in doomed))
+        self._view = array('I', (remap[row] for row in self._view)) if self._filter_text else None
+        return len(doomed)
+
+    def sync_directory(self, dir_path, rows, limit=None):
+        """用重新评估得到的结果替换目录 dir_path 的直接子项行：不再命中的删除，仍命中的原地更新，新命中的追加。
+
+        limit 为最多还能保存的行数（None 表示不限）。返回 (新增行数, 删除行数)。"""
+        incoming = {os.path.basename(row['path']): row for row in rows}
+        dir_id = self._dir_lookup.get(os.path.join(dir_path, ''))
+        existing = {}
+        if dir_id is not None:
+            existing = {self._names[row]: row for row in self._rows_in_dirs({dir_id})}
+        changed = False
+        for name, storage_row in existing.items():
+            row = incoming.get(name)
+            if row is not None and self._update_row(storage_row, row):
+                changed = True
+        doomed = {storage_row for name, storage_row in existing.items() if name not in incoming}
+        added = [row for name, row in incoming.items() if name not in existing]
+        if limit is not None:
+            added = added[:max(0, limit + len(doomed))]
+        removed = self._remove_storage_rows(doomed)
+        if changed and self.rowCount():
+            self.dataChanged.emit(self.index(0, 0), self.index(self.rowCount() - 1, 3))
+        return self.append_results(added), removed
+
+    def remove_under(self, dir_path):
+        """删除目录 dir_path 之下（任意深度）的所有行，返回删除行数。"""
+        prefix = os.path.join(dir_path, '')
+        dir_ids = {dir_id for dir_id, dir_prefix in enumerate(self._dir_prefixes) if dir_prefix.startswith(prefix)}
+        if not dir_ids:
+            return 0
+        return self._remove_storage_rows(set(self._rows_in_dirs(dir_ids)))
+
+    def _path_at(self, storage_row):
+        return self._dir_prefixes[self._dir_ids[storage_row]] + self._names[storage_row]
 
     def path_for_row(self, row):
-        if 0 <= row < len(self._rows):
-            return self._rows[row].get('path', '')
+        if 0 <= row < self.rowCount():
+            return self._path_at(self._storage_row(row))
         return ''
 
+    def hits_for_row(self, row):
+        """视图行的内容命中位置：(路径, 编码, ((行号, 字节偏移), ...))；无记录时返回 None。"""
+        if not 0 <= row < self.rowCount():
+            return None
+        storage_row = self._storage_row(row)
+        hits = self._hits.get(storage_row)
+        if not hits:
+            return None
+        return self._path_at(storage_row), hits[0], hits[1]
+
 # Everything 搜索引擎集成
 def detect_everything():
     """检测系统中是否安装了Everything"""
@@ -1223,126 +2326,2671 @@ def detect_everything():
     return None
 
 
-def detect_notepad_plus_plus():
-    """检测系统中是否安装了 Notepad++。"""
-    import shutil
-
-    exe_path = shutil.which('notepad++.exe')
-    if exe_path:
-        return exe_path
+def detect_everything_sdk(es_path=None):
+    """检测 Everything SDK 动态库（Everything64.dll / Everything32.dll），返回路径或 None。
 
-    common_paths = [
-        r'C:\Program Files\Notepad++\notepad++.exe',
-        r'C:\Program Files (x86)\Notepad++\notepad++.exe',
-        os.path.expandvars(r'%PROGRAMFILES%\Notepad++\notepad++.exe'),
-        os.path.expandvars(r'%PROGRAMFILES(X86)%\Notepad++\notepad++.exe'),
-        os.path.expandvars(r'%LOCALAPPDATA%\Programs\Notepad++\notepad++.exe'),
-    ]
-    for path in common_paths:
-        if os.path.exists(path):
+    SDK 通过 IPC 与正在运行的 Everything 通信；DLL 需放在程序目录、es.exe 同目录或 Everything 安装目录。"""
+    import struct as _struct
+    dll_name = 'Everything64.dll' if _struct.calcsize('P') == 8 else 'Everything32.dll'
+    candidate_dirs = [get_app_base_dir()]
+    if es_path:
+        candidate_dirs.append(os.path.dirname(es_path))
+    candidate_dirs.extend([
+        r'C:\Program Files\Everything',
+        r'C:\Program Files (x86)\Everything',
+        os.path.expandvars(r'%PROGRAMFILES%\Everything'),
+    ])
+    for folder in candidate_dirs:
+        path = os.path.join(folder, dll_name)
+        if os.path.isfile(path):
             return path
     return None
 
 
-def format_file_size(size_bytes):
-    """将字节数格式化为带单位的人类可读字符串。"""
-    if size_bytes < 1024:
-        return f"{size_bytes} B"
-    if size_bytes < 1024 * 1024:
-        return f"{size_bytes / 1024:.1f} KB"
-    if size_bytes < 1024 * 1024 * 1024:
-        return f"{size_bytes / (1024 * 1024):.1f} MB"
-    return f"{size_bytes / (1024 * 1024 * 1024):.1f} GB"
+def build_everything_query(keyword, search_path, file_types=""):
+    """构建 Everything 搜索表达式（路径限定 + 扩展名过滤），es.exe 与 SDK 共用。"""
+    # 如果指定了搜索路径，添加路径过滤
+    if search_path and os.path.exists(search_path):
+        # Everything使用path:语法指定路径
+        search_pattern = f'path:"{search_path}" {keyword}'
+    else:
+        search_pattern = keyword
 
+    # 添加文件类型过滤
+    if file_types:
+        extensions = []
+        for ft in file_types.split(','):
+            ft = ft.strip()
+            if ft.startswith('*.'):
+                ft = ft[2:]  # 移除 *.
+            extensions.append(f'ext:{ft}')
+        if extensions:
+            search_pattern += ' ' + ' | '.join(extensions)
+    return search_pattern
 
-def is_text_file(file_path, sample_size=1024):
-    """智能检测文件是否为文本文件（读取前N字节检测）。
 
-    模块级实现：避免在每次搜索时重新定义闭包，且可独立复用/测试。
-    """
-    try:
-        with open(file_path, 'rb') as f:
-            sample = f.read(sample_size)
-            if not sample:
-                return True  # 空文件视为文本文件
+class SearchBackend(ABC):
+    """文件名搜索后端接口（Everything es.exe / SDK / 进程内替身）。
 
-            # UTF-16/UTF-32 BOM 视为文本，避免被 NULL 字节规则误判
-            if sample.startswith((b'\xff\xfe', b'\xfe\xff', b'\xff\xfe\x00\x00', b'\x00\x00\xfe\xff')):
-                return True
+    search() 接收 ContentMatcher，返回生成器，逐条产出 (path, is_dir, size, mtime)；后端未提供的字段为 None，
+    由调用方按需 stat 补齐。cancel() 可在任意线程调用，使正在进行的搜索尽快结束；后端实例跨搜索复用，
+    取消标记在调用 search() 时（而不是生成器首次迭代时）清除，调用之后、迭代之前的 cancel() 不会丢失。
+    子类实现 _iter_results()。"""
 
-            # NULL 字节几乎总是二进制特征
-            if b'\x00' in sample:
-                return False
+    name = 'base'
 
-            # 仅统计 ASCII 控制字符（排除 \t\n\r），避免把 UTF-8 非 ASCII 文本误判为二进制
-            control_count = 0
-            for byte in sample:
-                if byte < 9 or (13 < byte < 32):
-                    control_count += 1
+    def __init__(self):
+        self._cancelled = False
 
-            # 控制字符占比过高，判定为二进制
-            if control_count / len(sample) > 0.1:
-                return False
+    def describe(self):
+        return self.name
 
-            return True
-    except Exception:
-        return False  # 无法读取则视为二进制
+    def cancel(self):
+        self._cancelled = True
 
-# 搜索对话框
-class SearchDialog(QDialog):    
-    def __init__(self, search_path, parent=None, search_history=None):
-        super().__init__(parent)
-        self.setWindowTitle(tr("搜索 - {}").format(search_path))
-        # 设置为可调整大小，并显示最小化/最大化按钮
-        self.setWindowFlags(
-            Qt.Dialog
-            | Qt.WindowTitleHint
-            | Qt.WindowCloseButtonHint
-            | Qt.WindowMinimizeButtonHint
-            | Qt.WindowMaximizeButtonHint
-            | Qt.WindowSystemMenuHint
-        )
-        # 关闭时立即销毁 C++ 对象（释放所有 Qt 子控件占用的内存）
-        self.setAttribute(Qt.WA_DeleteOnClose)
-        self.resize(800, 500)  # 初始大小，但允许调整
-        self.search_path = search_path
-        self.main_window = parent
-        self.search_thread = None
-        self.is_searching = False
-        self.search_history = search_history or []  # 搜索历史列表
-        
-        # 检测Everything
-        self.everything_path = detect_everything()
-        self.notepad_plus_plus_path = detect_notepad_plus_plus()
-        debug_print(f"[Search] Everything detected: {self.everything_path}")
-        
-        # 线程安全的结果队列（限制大小防止内存溢出）
-        import queue
-        self.result_queue = queue.Queue(maxsize=SEARCH_RESULT_QUEUE_MAXSIZE)  # 结果队列容量
-        self.ui_update_timer = None
-        self.queue_overflow_count = 0  # 队列溢出计数
-        self._queue_idle_ticks = 0
-        
-        # 结果限制配置（使用虚拟滚动优化，支持更多结果）
-        self.max_results = 1000000  # 最多显示100万个结果（虚拟滚动优化）
-        self.current_result_count = 0
-        self.batch_insert_size = 500  # 批量插入大小
-        
-        layout = QVBoxLayout(self)
-        
-        # 搜索选项区域
-        search_options = QHBoxLayout()
-        search_options.setSpacing(5)  # 设置控件间距为5像素
-        
-        # 搜索关键词（改为QComboBox支持历史记录）
-        search_label = QLabel(tr("搜索:"))
-        search_label.setFixedWidth(40)  # 固定标签宽度
-        search_options.addWidget(search_label)
-        from PyQt5.QtWidgets import QComboBox
-        self.search_input = QComboBox()
-        self.search_input.setEditable(True)
-        self.search_input.setInsertPolicy(QComboBox.NoInsert)  # 不自动插入新条目
-        self.search_input.setMinimumWidth(300)  # 设置最小宽度300像素
+    def search(self, matcher, search_path, file_types="", max_results=None):
+        self._cancelled = False
+        return self._iter_results(matcher, search_path, file_types, max_results)
+
+    @abstractmethod
+    def _iter_results(self, matcher, search_path, file_types, max_results):
+        """逐条产出 (path, is_dir, size, mtime)，须定期检查 self._cancelled。"""
+
+
+class EsExeSearchBackend(SearchBackend):
+    """通过 es.exe 命令行搜索：逐行读取输出，按 -offset/-n 分页，停止时结束子进程。"""
+
+    name = 'es.exe'
+
+    def __init__(self, es_path):
+        super().__init__()
+        self.es_path = es_path
+        self._proc = None
+
+    def describe(self):
+        return self.es_path
+
+    def cancel(self):
+        super().cancel()
+        proc = self._proc
+        if proc is not None and proc.poll() is None:
+            try:
+                proc.kill()
+            except Exception:
+                pass
+
+    def _iter_results(self, matcher, search_path, file_types, max_results):
+        import subprocess
+
+        search_pattern = build_everything_query(matcher.everything_search_text(), search_path, file_types)
+        case_args = ['-case'] if matcher.match_case else []
+        offset = 0
+        page_size = EVERYTHING_FIRST_PAGE_SIZE
+        produced = 0
+        while not self._cancelled:
+            cmd = [self.es_path] + case_args + ['-offset', str(offset), '-n', str(page_size), search_pattern]
+            if _DEBUG_MODE:
+                debug_print(f"[Everything] Executing: {' '.join(cmd)}")
+            try:
+                proc = subprocess.Popen(
+                    cmd,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    text=True,
+                    encoding='utf-8',
+                    errors='ignore',
+                    creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0),
+                )
+            except Exception as e:
+                debug_print(f"[Everything] Error: {e}")
+                return
+            self._proc = proc
+            line_count = 0
+            stderr_text = ''
+            try:
+                for line in proc.stdout:
+                    line_count += 1
+                    if self._cancelled:
+                        break
+                    line = line.strip()
+                    # es.exe 输出本身来自索引，避免逐条 exists 造成大量额外 I/O
+                    if line and matcher.match_text(os.path.basename(line)):
+                        produced += 1
+                        yield line, None, None, None
+                        if max_results and produced >= max_results:
+                            break
+            finally:
+                if proc.poll() is None:
+                    try:
+                        proc.kill()
+                    except Exception:
+                        pass
+                try:
+                    _stdout, stderr_text = proc.communicate(timeout=5)
+                except Exception:
+                    pass
+                self._proc = None
+
+            if self._cancelled or (max_results and produced >= max_results):
+                break
+            if proc.returncode != 0:
+                debug_print(f"[Everything] Error: {stderr_text}")
+                break
+            if line_count < page_size:
+                break  # 最后一页
+            offset += page_size
+            page_size = EVERYTHING_PAGE_SIZE
+
+        debug_print(f"[Everything] Found {produced} results")
+
+
+class EverythingSdkBackend(SearchBackend):
+    """通过 Everything SDK（IPC）搜索：不启动子进程，同一次查询直接返回大小与修改时间。
+
+    SDK 的查询状态是进程级全局的，所有实例共用一把锁串行查询；分页读取以便及时响应取消。"""
+
+    name = 'Everything SDK'
+
+    REQUEST_FULL_PATH_AND_FILE_NAME = 0x00000004
+    REQUEST_SIZE = 0x00000010
+    REQUEST_DATE_MODIFIED = 0x00000040
+    _FILETIME_UNIX_EPOCH = 116444736000000000
+
+    _dll = None
+    _dll_path = None
+    _query_lock = threading.Lock()
+
+    def __init__(self, dll_path):
+        super().__init__()
+        self.dll_path = dll_path
+
+    def describe(self):
+        return self.dll_path
+
+    @classmethod
+    def _load(cls, dll_path):
+        import ctypes
+        from ctypes import wintypes
+        if cls._dll is not None and cls._dll_path == dll_path:
+            return cls._dll
+        dll = ctypes.WinDLL(dll_path)
+        dll.Everything_SetSearchW.argtypes = [wintypes.LPCWSTR]
+        dll.Everything_SetRequestFlags.argtypes = [wintypes.DWORD]
+        dll.Everything_SetMatchCase.argtypes = [wintypes.BOOL]
+        dll.Everything_SetMatchWholeWord.argtypes = [wintypes.BOOL]
+        dll.Everything_SetOffset.argtypes = [wintypes.DWORD]
+        dll.Everything_SetMax.argtypes = [wintypes.DWORD]
+        dll.Everything_QueryW.argtypes = [wintypes.BOOL]
+        dll.Everything_QueryW.restype = wintypes.BOOL
+        dll.Everything_GetNumResults.restype = wintypes.DWORD
+        dll.Everything_GetLastError.restype = wintypes.DWORD
+        dll.Everything_GetMajorVersion.restype = wintypes.DWORD
+        dll.Everything_IsFolderResult.argtypes = [wintypes.DWORD]
+        dll.Everything_IsFolderResult.restype = wintypes.BOOL
+        dll.Everything_GetResultFullPathNameW.argtypes = [wintypes.DWORD, wintypes.LPWSTR, wintypes.DWORD]
+        dll.Everything_GetResultFullPathNameW.restype = wintypes.DWORD
+        dll.Everything_GetResultSize.argtypes = [wintypes.DWORD, ctypes.POINTER(ctypes.c_longlong)]
+        dll.Everything_GetResultSize.restype = wintypes.BOOL
+        dll.Everything_GetResultDateModified.argtypes = [wintypes.DWORD, ctypes.POINTER(ctypes.c_ulonglong)]
+        dll.Everything_GetResultDateModified.restype = wintypes.BOOL
+        cls._dll = dll
+        cls._dll_path = dll_path
+        return dll
+
+    def is_available(self):
+        """DLL 可加载且 Everything 正在运行（IPC 可用）。"""
+        try:
+            with self._query_lock:
+                return self._load(self.dll_path).Everything_GetMajorVersion() > 0
+        except Exception as e:
+            debug_print(f"[Everything] SDK unavailable: {e}")
+            return False
+
+    def _query_page(self, search_pattern, match_case, match_whole_word, offset, count):
+        import ctypes
+        dll = self._load(self.dll_path)
+        with self._query_lock:
+            dll.Everything_SetSearchW(search_pattern)
+            dll.Everything_SetRequestFlags(
+                self.REQUEST_FULL_PATH_AND_FILE_NAME | self.REQUEST_SIZE | self.REQUEST_DATE_MODIFIED
+            )
+            dll.Everything_SetMatchCase(bool(match_case))
+            dll.Everything_SetMatchWholeWord(bool(match_whole_word))
+            dll.Everything_SetOffset(offset)
+            dll.Everything_SetMax(count)
+            if not dll.Everything_QueryW(True):
+                raise OSError(f"Everything_QueryW failed: error {dll.Everything_GetLastError()}")
+            rows = []
+            buf = ctypes.create_unicode_buffer(32768)
+            size = ctypes.c_longlong()
+            filetime = ctypes.c_ulonglong()
+            for i in range(dll.Everything_GetNumResults()):
+                dll.Everything_GetResultFullPathNameW(i, buf, len(buf))
+                is_dir = bool(dll.Everything_IsFolderResult(i))
+                file_size = None
+                if not is_dir and dll.Everything_GetResultSize(i, ctypes.byref(size)) and size.value >= 0:
+                    file_size = size.value
+                mtime = None
+                if dll.Everything_GetResultDateModified(i, ctypes.byref(filetime)) and filetime.value not in (0, 0xFFFFFFFFFFFFFFFF):
+                    mtime = (filetime.value - self._FILETIME_UNIX_EPOCH) / 1e7
+                rows.append((buf.value, is_dir, file_size, mtime))
+        return rows
+
+    def _iter_results(self, matcher, search_path, file_types, max_results):
+        search_pattern = build_everything_query(matcher.everything_search_text(), search_path, file_types)
+        match_whole_word = matcher.match_whole_word and matcher.mode != ContentMatcher.MODE_REGEX
+        offset = 0
+        page_size = EVERYTHING_FIRST_PAGE_SIZE
+        produced = 0
+        while not self._cancelled:
+            try:
+                rows = self._query_page(search_pattern, matcher.match_case, match_whole_word, offset, page_size)
+            except Exception as e:
+                debug_print(f"[Everything] SDK error: {e}")
+                break
+            for row in rows:
+                if self._cancelled:
+                    break
+                # 与 es.exe 后端保持一致的文件名二次过滤规则
+                if matcher.match_text(os.path.basename(row[0])):
+                    produced += 1
+                    yield row
+                    if max_results and produced >= max_results:
+                        break
+            if self._cancelled or (max_results and produced >= max_results) or len(rows) < page_size:
+                break
+            offset += page_size
+            page_size = EVERYTHING_PAGE_SIZE
+        debug_print(f"[Everything] SDK found {produced} results")
+
+
+class FakeSearchBackend(SearchBackend):
+    """进程内的 Everything 替身：对内存中的条目按相同规则过滤，用于无 Everything 环境下测试/压测结果管线。
+
+    entries 为 [(path, is_dir, size, mtime), ...]；只给 root 时首次搜索会遍历一次该目录建立条目。"""
+
+    name = 'in-process'
+
+    def __init__(self, entries=None, root=None):
+        super().__init__()
+        self.entries = list(entries) if entries is not None else None
+        self.root = root
+
+    def describe(self):
+        return f"in-process ({self.root or len(self.entries or [])})"
+
+    def _load_entries(self):
+        entries = []
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            for name in dirnames + filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                is_dir = name in dirnames
+                entries.append((path, is_dir, None if is_dir else st.st_size, st.st_mtime))
+        return entries
+
+    def _iter_results(self, matcher, search_path, file_types, max_results):
+        if self.entries is None:
+            self.entries = self._load_entries() if self.root else []
+        prefix = os.path.normcase(os.path.join(search_path, '')) if search_path else ''
+        extensions = set()
+        for ft in (file_types or '').split(','):
+            ft = ft.strip().lower()
+            if ft.startswith('*.'):
+                ft = ft[2:]
+            if ft:
+                extensions.add(ft)
+        produced = 0
+        for row in self.entries:
+            if self._cancelled:
+                break
+            path = row[0]
+            if prefix and not os.path.normcase(path).startswith(prefix):
+                continue
+            name = os.path.basename(path)
+            if extensions and os.path.splitext(name)[1][1:].lower() not in extensions:
+                continue
+            if matcher.match_text(name):
+                produced += 1
+                yield row
+                if max_results and produced >= max_results:
+                    break
+
+
+def create_everything_backend(es_path=None):
+    """按配置选择 Everything 后端：SDK(IPC) 可用时优先，其次 es.exe；都不可用返回 None。"""
+    if EVERYTHING_BACKEND in ('auto', 'sdk'):
+        dll_path = detect_everything_sdk(es_path)
+        if dll_path:
+            backend = EverythingSdkBackend(dll_path)
+            if backend.is_available():
+                return backend
+    if EVERYTHING_BACKEND in ('auto', 'es') and es_path:
+        return EsExeSearchBackend(es_path)
+    return None
+
+
+def detect_notepad_plus_plus():
+    """检测系统中是否安装了 Notepad++。"""
+    import shutil
+
+    exe_path = shutil.which('notepad++.exe')
+    if exe_path:
+        return exe_path
+
+    common_paths = [
+        r'C:\Program Files\Notepad++\notepad++.exe',
+        r'C:\Program Files (x86)\Notepad++\notepad++.exe',
+        os.path.expandvars(r'%PROGRAMFILES%\Notepad++\notepad++.exe'),
+        os.path.expandvars(r'%PROGRAMFILES(X86)%\Notepad++\notepad++.exe'),
+        os.path.expandvars(r'%LOCALAPPDATA%\Programs\Notepad++\notepad++.exe'),
+    ]
+    for path in common_paths:
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def format_file_size(size_bytes):
+    """将字节数格式化为带单位的人类可读字符串。"""
+    if size_bytes < 1024:
+        return f"{size_bytes} B"
+    if size_bytes < 1024 * 1024:
+        return f"{size_bytes / 1024:.1f} KB"
+    if size_bytes < 1024 * 1024 * 1024:
+        return f"{size_bytes / (1024 * 1024):.1f} MB"
+    return f"{size_bytes / (1024 * 1024 * 1024):.1f} GB"
+
+
+BINARY_SNIFF_BYTES = 1024  # 二进制探测只看文件开头这么多字节
+
+# bytes.translate 的删除表：删去非控制字符后剩余长度即 ASCII 控制字符数（不含 \t\n\v\f\r）
+_NON_CONTROL_BYTES = bytes(b for b in range(256) if not (b < 9 or 13 < b < 32))
+
+
+def sample_looks_binary(sample):
+    """按文件开头的字节样本判断是否为二进制文件（内容扫描在首次读取时直接复用，不再单独打开文件）。"""
+    if not sample:
+        return False  # 空文件视为文本文件
+
+    # UTF-16/UTF-32 BOM 视为文本，避免被 NULL 字节规则误判
+    if sample.startswith((b'\xff\xfe', b'\xfe\xff', b'\xff\xfe\x00\x00', b'\x00\x00\xfe\xff')):
+        return False
+
+    # NULL 字节几乎总是二进制特征
+    if b'\x00' in sample:
+        return True
+
+    # 仅统计 ASCII 控制字符（排除 \t\n\r），避免把 UTF-8 非 ASCII 文本误判为二进制；控制字符占比过高判定为二进制
+    control_count = len(sample.translate(None, _NON_CONTROL_BYTES))
+    return control_count / len(sample) > 0.1
+
+
+def is_text_file(file_path, sample_size=BINARY_SNIFF_BYTES):
+    """智能检测文件是否为文本文件（读取前N字节检测）。
+
+    模块级实现：避免在每次搜索时重新定义闭包，且可独立复用/测试。
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            return not sample_looks_binary(f.read(sample_size))
+    except Exception:
+        return False  # 无法读取则视为二进制
+
+
+# 二进制文件扩展名黑名单（这些文件肯定不搜索内容）
+SEARCH_BINARY_FILE_EXTENSIONS = frozenset({
+    # 可执行文件
+    'exe', 'dll', 'so', 'dylib', 'bin', 'com', 'app',
+    # 归档/压缩文件
+    'zip', 'rar', '7z', 'tar', 'gz', 'bz2', 'xz', 'iso', 'dmg',
+    # 图片文件
+    'jpg', 'jpeg', 'png', 'gif', 'bmp', 'ico', 'svg', 'webp', 'tiff', 'psd', 'ai',
+    # 音频文件
+    'mp3', 'wav', 'flac', 'aac', 'ogg', 'wma', 'm4a',
+    # 视频文件
+    'mp4', 'avi', 'mkv', 'mov', 'wmv', 'flv', 'webm', 'mpeg', 'mpg',
+    # Office文件（二进制格式）
+    'doc', 'xls', 'ppt', 'docx', 'xlsx', 'pptx', 'pdf',
+    # 数据库文件
+    'db', 'sqlite', 'mdb', 'accdb',
+    # 其他二进制
+    'obj', 'o', 'a', 'lib', 'pyc', 'pyo', 'class', 'jar', 'war',
+})
+
+# 文本扩展名白名单：命中时跳过二进制探测，减少一次额外文件读取
+SEARCH_TEXT_FILE_EXTENSIONS = frozenset({
+    'txt', 'md', 'rst', 'log', 'ini', 'cfg', 'conf', 'toml', 'yaml', 'yml', 'json', 'xml',
+    'csv', 'tsv', 'sql', 'bat', 'ps1', 'sh', 'c', 'h', 'cpp', 'hpp', 'cc', 'cs', 'java',
+    'py', 'js', 'ts', 'jsx', 'tsx', 'html', 'htm', 'css', 'scss', 'less', 'go', 'rs', 'php',
+    'rb', 'swift', 'kt', 'm', 'mm', 'vue', 'svelte', 'dockerfile', 'gitignore', 'arxml', 'xdm'
+})
+
+
+def split_search_keywords(text):
+    """拆分多关键词输入：空白/逗号/分号/竖线分隔，英文双引号包裹的短语保持整体。"""
+    import re
+    keywords = []
+    for quoted, bare in re.findall(r'"([^"]+)"|([^\s,;|"]+)', text or ''):
+        word = quoted or bare
+        if word and word not in keywords:
+            keywords.append(word)
+    return keywords
+
+
+class ContentMatcher:
+    """关键词匹配器：统一文件名/文本/字节三种匹配规则。
+
+    mode 为 literal（单关键词）、any（任一关键词）、all（全部关键词）或 regex（正则表达式）。
+    多关键词在每个分块上只做一次大小写归一化，再逐个做 C 层子串查找并提前退出；
+    全词匹配时仅对子串命中的关键词用预编译正则确认。all 模式通过 found 集合跨分块累计。
+    只持有字符串与已编译正则，可被 pickle 后传给内容搜索子进程。"""
+
+    MODE_LITERAL = 'literal'
+    MODE_ANY = 'any'
+    MODE_ALL = 'all'
+    MODE_REGEX = 'regex'
+    MODES = (MODE_LITERAL, MODE_ANY, MODE_ALL, MODE_REGEX)
+    REGEX_OVERLAP_CHARS = 4096  # 正则无法推算匹配长度，分块扫描时固定回退的重叠长度
+
+    def __init__(self, keyword, match_case=False, match_whole_word=False, mode=MODE_LITERAL):
+        import re
+
+        self.keyword = keyword or ''
+        self.match_case = bool(match_case)
+        self.match_whole_word = bool(match_whole_word)
+        self.mode = mode if mode in self.MODES else self.MODE_LITERAL
+        self.keyword_lower = self.keyword.lower()
+        if self.mode in (self.MODE_ANY, self.MODE_ALL):
+            self.keywords = split_search_keywords(self.keyword) or [self.keyword]
+        else:
+            self.keywords = [self.keyword]
+        self.require_all = self.mode == self.MODE_ALL and len(self.keywords) > 1
+        flags = 0 if self.match_case else re.IGNORECASE
+        self.keyword_is_ascii = all(k.isascii() for k in self.keywords)
+        # 兼容旧字段：单关键词的字节形式
+        self.keyword_bytes = self.keyword.encode('ascii', errors='ignore') if self.keyword_is_ascii else b''
+
+        self.regex = None
+        self.regex_bytes = None
+        self._needles = ()
+        self._needles_bytes = ()
+        self._word_patterns = ()
+        self._word_patterns_bytes = ()
+        if self.mode == self.MODE_REGEX:
+            self.regex = re.compile(self.keyword, flags)
+            if self.keyword_is_ascii and self.keyword:
+                try:
+                    self.regex_bytes = re.compile(self.keyword.encode('ascii'), flags)
+                except re.error:
+                    self.regex_bytes = None
+            self.overlap_chars = self.REGEX_OVERLAP_CHARS
+            self.bytes_fast_path = self.regex_bytes is not None
+        else:
+            self._needles = tuple(k if self.match_case else k.lower() for k in self.keywords)
+            if self.keyword_is_ascii:
+                self._needles_bytes = tuple(k.encode('ascii') for k in self._needles)
+            if self.match_whole_word:
+                self._word_patterns = tuple(re.compile(rf'\b{re.escape(k)}\b', flags) for k in self.keywords)
+                if self.keyword_is_ascii:
+                    self._word_patterns_bytes = tuple(
+                        re.compile(rb'\b' + re.escape(k.encode('ascii')) + rb'\b', flags) for k in self.keywords
+                    )
+            self.overlap_chars = max(len(k) for k in self.keywords) * 2
+            self.bytes_fast_path = self.keyword_is_ascii and all(self._needles_bytes)
+        # 定位匹配位置（行号/预览高亮）用的正则：各关键词按长度降序组成分支
+        if self.regex is not None:
+            self.span_regex = self.regex
+        elif any(self.keywords):
+            alternation = '|'.join(re.escape(k) for k in sorted(set(self.keywords), key=len, reverse=True) if k)
+            self.span_regex = re.compile(rf'\b(?:{alternation})\b' if self.match_whole_word else alternation, flags)
+        else:
+            self.span_regex = None
+        self._encoded_memo = {}
+
+    @staticmethod
+    def validate(keyword, mode):
+        """校验输入：正则模式下返回编译错误信息，合法时返回 None。"""
+        if mode != ContentMatcher.MODE_REGEX:
+            return None
+        import re
+        try:
+            re.compile(keyword or '')
+        except re.error as e:
+            return str(e)
+        return None
+
+    def _match(self, value, normalized, needles, word_patterns, found):
+        if self.require_all:
+            if found is None:
+                found = set()
+            for i, needle in enumerate(needles):
+                if i in found or needle not in normalized:
+                    continue
+                if word_patterns and not word_patterns[i].search(value):
+                    continue
+                found.add(i)
+            return len(found) == len(needles)
+        for i, needle in enumerate(needles):
+            if needle in normalized and (not word_patterns or word_patterns[i].search(value)):
+                return True
+        return False
+
+    def match_text(self, value, found=None):
+        """匹配一段文本；all 模式下 found 为跨分块累计的已命中关键词下标集合。"""
+        if not isinstance(value, str) or not value:
+            return False
+        if self.regex is not None:
+            return bool(self.regex.search(value))
+        normalized = value if self.match_case else value.lower()
+        return self._match(value, normalized, self._needles, self._word_patterns, found)
+
+    def match_bytes(self, value, found=None):
+        if not value:
+            return False
+        if self.regex is not None:
+            return self.regex_bytes is not None and bool(self.regex_bytes.search(value))
+        normalized = value if self.match_case else value.lower()
+        return self._match(value, normalized, self._needles_bytes, self._word_patterns_bytes, found)
+
+    def iter_spans(self, text):
+        """逐个产出文本中的匹配 (start, end)（字符下标），用于定位命中行与预览高亮。"""
+        if self.span_regex is None or not text:
+            return
+        for m in self.span_regex.finditer(text):
+            yield m.start(), m.end()
+
+    def encoded_needles(self, encodings):
+        """大文件直接按字节查找时，每个关键词在各候选编码下的字节形式。
+
+        返回 (groups, fold)：groups 为每个关键词一组 ((form, encoding), ...)，fold 表示需先对数据做
+        ASCII 小写化；正则、全词匹配或含大小写的非 ASCII 关键词无法按字节等价查找，返回 None。
+        ASCII 关键词的 UTF-16 LE/BE 形式代替了原先“去除 NULL 字节后再匹配”的做法。"""
+        if self.regex is not None or self.match_whole_word:
+            return None
+        memo_key = tuple(encodings)
+        if memo_key in self._encoded_memo:
+            return self._encoded_memo[memo_key]
+        fold = False
+        groups = []
+        for keyword in self.keywords:
+            if not keyword:
+                self._encoded_memo[memo_key] = None
+                return None
+            cased = keyword.lower() != keyword.upper()
+            if not self.match_case and cased:
+                if not keyword.isascii():
+                    self._encoded_memo[memo_key] = None
+                    return None
+                fold = True
+            text = keyword if self.match_case else keyword.lower()
+            codecs = [{'utf-16': 'utf-16-le', 'utf-8-sig': 'utf-8'}.get(enc, enc) for enc in encodings]
+            if text.isascii():
+                codecs += ['utf-16-le', 'utf-16-be']
+            forms = {}
+            for codec in codecs:
+                try:
+                    form = text.encode(codec)
+                except (UnicodeError, LookupError):
+                    continue
+                forms.setdefault(form, None if text.isascii() else codec)
+            groups.append(tuple(forms.items()))
+        if fold:
+            groups = [tuple((form.lower(), enc) for form, enc in group) for group in groups]
+        self._encoded_memo[memo_key] = (groups, fold)
+        return groups, fold
+
+    def everything_search_text(self):
+        """转换为 Everything 搜索语法的关键词部分（结果仍会用本匹配器二次过滤）。"""
+        if self.mode == self.MODE_REGEX:
+            import re
+            # 正则中的双引号会提前结束 Everything 的引号参数：改写为等价的 \x22（已转义的 \" 同样改写）
+            pattern = re.sub(r'(\\*)"', lambda m: m.group(1) + ('x22' if len(m.group(1)) % 2 else '\\x22'), self.keyword)
+            return f'regex:"{pattern}"'
+        if self.mode in (self.MODE_ANY, self.MODE_ALL) and len(self.keywords) > 1:
+            quoted = [f'"{k}"' if ' ' in k else k for k in self.keywords]
+            return ' '.join(quoted) if self.mode == self.MODE_ALL else '<' + '|'.join(quoted) + '>'
+        return self.keyword
+
+
+def current_content_scan_limits():
+    """打包当前生效的内容扫描参数（子进程中的模块常量不会随配置更新，需显式传入）。"""
+    return (
+        CONTENT_SEARCH_CHUNK_SIZE,
+        CONTENT_SEARCH_MAX_BYTES_PER_FILE,
+        CONTENT_SEARCH_IN_MEMORY_THRESHOLD,
+        tuple(CONTENT_SEARCH_ENCODINGS),
+        CONTENT_SEARCH_DETECT_ENCODING,
+        CONTENT_SEARCH_HIT_LOCATIONS,
+    )
+
+
+ENCODING_DETECT_SAMPLE_BYTES = 64 * 1024  # 大文件编码探测采样长度
+
+
+def _plausible_encoding(raw, encoding, complete):
+    """严格解码校验：末尾截断的多字节序列（采样不完整时）与极少量坏字节视为可接受。"""
+    try:
+        raw.decode(encoding)
+        return True
+    except UnicodeDecodeError as e:
+        if not complete and e.start >= len(raw) - 4:
+            return True
+    return raw.decode(encoding, errors='replace').count('\ufffd') <= max(1, len(raw) // 500)
+
+
+def detect_text_encodings(raw, complete=True):
+    """单次探测文本编码，返回按可能性排序的编码元组。
+
+    依次依据 BOM、NULL 字节在奇/偶位置的分布（无 BOM 的 UTF-16）、是否纯 ASCII，
+    以及 UTF-8 / GBK 严格解码校验判断。不是合法 UTF-8 时总在最后保留 latin-1（能解码任意字节，
+    与旧的逐编码尝试结果一致，避免 GBK 解码“勉强成立”的西文文件漏匹配）。
+    complete=False 表示 raw 只是文件开头的采样：无法排除后文出现 GBK/非 UTF-8 字节，三者都保留。"""
+    if raw.startswith(b'\xef\xbb\xbf'):
+        return ('utf-8-sig',)
+    if raw.startswith(b'\xff\xfe'):
+        return ('utf-16-le',)
+    if raw.startswith(b'\xfe\xff'):
+        return ('utf-16-be',)
+    if b'\x00' in raw:
+        even_nuls = raw[0::2].count(0)
+        odd_nuls = raw[1::2].count(0)
+        half = max(1, len(raw) // 2)
+        if odd_nuls >= half * 0.3 and odd_nuls > even_nuls * 4:
+            return ('utf-16-le',)
+        if even_nuls >= half * 0.3 and even_nuls > odd_nuls * 4:
+            return ('utf-16-be',)
+    if raw.isascii() and complete:
+        return ('utf-8',)
+    valid_utf8 = False
+    if complete:
+        try:
+            raw.decode('utf-8')
+            valid_utf8 = True
+        except UnicodeDecodeError:
+            pass
+    encodings = tuple(
+        enc for enc in ('utf-8', 'gbk')
+        if (enc == 'utf-8' and valid_utf8) or _plausible_encoding(raw, enc, complete)
+    )
+    if not valid_utf8:
+        encodings += ('latin-1',)
+    return encodings
+
+
+def _match_raw_content(raw, matcher, encodings):
+    """在已读入的字节上匹配：可按字节查找时搜索关键词的各编码形式，否则按给定编码解码匹配。"""
+    encoded = matcher.encoded_needles(encodings)
+    if encoded is not None:
+        groups, fold = encoded
+        data = raw.lower() if fold else raw
+        found = set()
+        for i, forms in enumerate(groups):
+            for form, encoding in forms:
+                if form in data:
+                    if not matcher.require_all:
+                        return True, encoding
+                    found.add(i)
+                    break
+        return matcher.require_all and len(found) == len(groups), None
+    for encoding in encodings:
+        try:
+            if matcher.match_text(raw.decode(encoding, errors='ignore'), set()):
+                return True, encoding
+        except (UnicodeError, LookupError):
+            continue
+    return False, None
+
+
+_TEXT_BOMS = ((b'\xef\xbb\xbf', 'utf-8'), (b'\xff\xfe', 'utf-16-le'), (b'\xfe\xff', 'utf-16-be'))
+
+
+def text_layout(encoding, head):
+    """返回 (codec, 正文起始字节, 换行符字节, 字符单元字节数)：BOM 决定 utf-8-sig/utf-16 的实际编码。"""
+    codec = encoding
+    start = 0
+    for bom, bom_codec in _TEXT_BOMS:
+        if head.startswith(bom) and encoding in ('utf-8-sig', 'utf-16', bom_codec):
+            codec, start = bom_codec, len(bom)
+            break
+    else:
+        codec = {'utf-8-sig': 'utf-8', 'utf-16': 'utf-16-le'}.get(encoding, encoding)
+    if codec == 'utf-16-le':
+        return codec, start, b'\n\x00', 2
+    if codec == 'utf-16-be':
+        return codec, start, b'\x00\n', 2
+    return codec, start, b'\n', 1
+
+
+def find_newline(data, newline, unit, begin, end, base=0):
+    """在 data[begin:end] 中查找与字符边界对齐的换行（UTF-16 下跳过奇数偏移的伪匹配），找不到返回 -1。"""
+    pos = data.find(newline, begin, end)
+    while pos != -1 and unit > 1 and (pos - base) % unit:
+        pos = data.find(newline, pos + 1, end)
+    return pos
+
+
+def locate_content_matches(data, matcher, encodings, limit, end=None, block_size=1024 * 1024):
+    """在已命中的文件内容中定位前 limit 处匹配，返回 (encoding, ((行号, 字节偏移), ...)) 或 None。
+
+    data 为整个文件开头的 bytes 或 mmap（只看前 end 字节）。按换行对齐的块解码后用匹配器定位，
+    行号按块内换行累计，字节偏移 = 行首字节偏移 + 行内前缀按该编码编码后的长度。
+    依次尝试候选编码，采用第一个能定位到匹配的编码。"""
+    end = len(data) if end is None else min(end, len(data))
+    head = data[:4]
+    for encoding in encodings:
+        try:
+            codec, start, newline, unit = text_layout(encoding, head)
+            ''.encode(codec)
+        except LookupError:
+            continue
+        hits = []
+        line = 1
+        pos = start
+        while pos < end and len(hits) < limit:
+            block_end = min(end, pos + block_size)
+            if block_end < end:
+                nl = find_newline(data, newline, unit, block_end, min(end, block_end + block_size), start)
+                block_end = nl + len(newline) if nl != -1 else min(end, block_end + block_size)
+            block = data[pos:block_end]
+            text = block.decode(codec, errors='replace')
+            line_no = line
+            text_cursor = 0  # 当前行在块内的字符下标
+            byte_cursor = 0  # 当前行在块内的字节下标
+            for span_start, _span_end in matcher.iter_spans(text):
+                while True:
+                    nl_char = text.find('\n', text_cursor, span_start)
+                    if nl_char == -1:
+                        break
+                    line_no += 1
+                    text_cursor = nl_char + 1
+                    nl = find_newline(block, newline, unit, byte_cursor, len(block))
+                    byte_cursor = nl + len(newline) if nl != -1 else len(block)
+                column = len(text[text_cursor:span_start].encode(codec, errors='replace'))
+                hits.append((line_no, pos + byte_cursor + column))
+                if len(hits) >= limit:
+                    break
+            line += text.count('\n')
+            pos = block_end
+        if hits:
+            return encoding, tuple(hits)
+    return None
+
+
+def _iter_file_windows(bf, mm, limit, chunk_size, overlap):
+    """按窗口切分文件前 limit 字节（相邻窗口重叠 overlap 字节，起点保持偶数以对齐 UTF-16）。
+
+    有映射时直接切片映射区，否则退化为 seek+read；每个字节只从磁盘读取一次。"""
+    overlap += overlap & 1
+    chunk_size = max(chunk_size, overlap * 2 + 2)
+    chunk_size -= chunk_size & 1
+    pos = 0
+    while pos < limit:
+        end = min(limit, pos + chunk_size)
+        if mm is not None:
+            yield mm[pos:end]
+        else:
+            bf.seek(pos)
+            yield bf.read(end - pos)
+        if end >= limit:
+            break
+        pos = end - overlap
+
+
+def _scan_large_file(file_path, read_limit, matcher, encodings, chunk_size, detect, sniff=False, locate_limit=0):
+    """大文件扫描：整个文件只映射/读取一次，不再按候选编码逐个以文本方式重新打开。
+
+    sniff=True 时先用文件开头做二进制探测，判为二进制返回 None；
+    detect=True 时先对文件开头采样探测编码（返回值第三项为探测结果，供持久化缓存）。
+    关键词可按字节等价查找时，在映射区上直接查找各编码形式（区分大小写/无大小写的关键词零拷贝）；
+    否则逐窗口在内存中按各候选编码解码匹配。命中且 locate_limit>0 时在同一映射上定位匹配行
+    （返回值第四项，见 locate_content_matches；无法映射时为 None）。"""
+    import mmap
+    with open(file_path, 'rb') as bf:
+        try:
+            mm = mmap.mmap(bf.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            mm = None
+        try:
+            result = _scan_opened_large_file(bf, mm, read_limit, matcher, encodings, chunk_size, detect, sniff)
+            if result is None:
+                return None
+            locations = None
+            if result[0] and locate_limit and mm is not None:
+                candidates = (result[1],) if result[1] else (result[2] or encodings)
+                locations = locate_content_matches(mm, matcher, candidates, locate_limit, read_limit)
+            return result + (locations,)
+        finally:
+            if mm is not None:
+                mm.close()
+
+
+def _scan_opened_large_file(bf, mm, read_limit, matcher, encodings, chunk_size, detect, sniff):
+    """_scan_large_file 的扫描部分（文件已打开/映射），返回 (matched, encoding, detected) 或 None（二进制）。"""
+    head = b''
+    if sniff or detect:
+        head_len = max(BINARY_SNIFF_BYTES, ENCODING_DETECT_SAMPLE_BYTES if detect else 0)
+        head = mm[:head_len] if mm is not None else bf.read(head_len)
+    if sniff and sample_looks_binary(head[:BINARY_SNIFF_BYTES]):
+        return None
+    detected = None
+    if detect:
+        sample = head[:ENCODING_DETECT_SAMPLE_BYTES]
+        detected = detect_text_encodings(sample, complete=read_limit <= len(sample))
+        encodings = detected
+    encoded = matcher.encoded_needles(encodings)
+    if encoded is None:
+        return _scan_decoded_windows(bf, mm, read_limit, matcher, encodings, chunk_size) + (detected,)
+    groups, fold = encoded
+    found = set()
+    if mm is not None and not fold:
+        for i, forms in enumerate(groups):
+            for form, encoding in forms:
+                if mm.find(form, 0, read_limit) != -1:
+                    if not matcher.require_all:
+                        return True, encoding, detected
+                    found.add(i)
+                    break
+        return matcher.require_all and len(found) == len(groups), None, detected
+    overlap = max(len(form) for forms in groups for form, _enc in forms) - 1
+    for window in _iter_file_windows(bf, mm, read_limit, chunk_size, overlap):
+        if fold:
+            window = window.lower()
+        for i, forms in enumerate(groups):
+            if i in found:
+                continue
+            for form, encoding in forms:
+                if form in window:
+                    if not matcher.require_all:
+                        return True, encoding, detected
+                    found.add(i)
+                    break
+        if matcher.require_all and len(found) == len(groups):
+            return True, None, detected
+    return False, None, detected
+
+
+def _scan_decoded_windows(bf, mm, read_limit, matcher, encodings, chunk_size):
+    found_bytes = set()
+    found_text = {encoding: set() for encoding in encodings}  # all 模式：每种编码独立累计
+    overlap = max(2, matcher.overlap_chars * 4)  # 按字符计的重叠换算为字节（UTF-8 最长 4 字节）
+    for window in _iter_file_windows(bf, mm, read_limit, chunk_size, overlap):
+        if matcher.bytes_fast_path:
+            if matcher.match_bytes(window, found_bytes):
+                return True, None
+            if b'\x00' in window and matcher.match_bytes(window.replace(b'\x00', b''), found_bytes):
+                return True, None
+        for encoding in encodings:
+            try:
+                if matcher.match_text(window.decode(encoding, errors='ignore'), found_text[encoding]):
+                    return True, encoding
+            except (UnicodeError, LookupError):
+                continue
+    return False, None
+
+
+def scan_file_content(file_path, file_size, matcher, known_encodings=None, scan_limits=None, sniff=False):
+    """扫描单个文件内容是否命中关键词，返回 (matched, encoding, detected_encodings, locations)。
+
+    每个文件只读取一次：小文件整体读入后先按字节匹配（ASCII 关键词，命中时 encoding 为 None），
+    再按文件编码匹配；大文件走 mmap 扫描（见 _scan_large_file）。
+    sniff=True 时二进制探测复用这次读取的开头字节，判为二进制时返回 None（不再单独打开文件探测）。
+    known_encodings 为持久化缓存中该文件（路径+mtime+大小未变）已知的编码；未知时单次探测，
+    探测结果作为第三项返回。关闭探测时退回逐个尝试 CONTENT_SEARCH_ENCODINGS。
+    命中时在已读入的内容上定位前 N 处匹配，第四项为 (encoding, ((行号, 字节偏移), ...)) 或 None。"""
+    chunk_size, max_scan_bytes, in_memory_threshold, encodings_all, detect, locate_limit = scan_limits or current_content_scan_limits()
+    detect = detect and not known_encodings
+    encodings = tuple(known_encodings) if known_encodings else tuple(encodings_all)
+
+    read_limit = min(file_size, max_scan_bytes)
+    try:
+        if read_limit > in_memory_threshold:
+            return _scan_large_file(file_path, read_limit, matcher, encodings, chunk_size, detect, sniff, locate_limit)
+
+        with open(file_path, 'rb') as bf:
+            raw_content = bf.read(read_limit)
+        if sniff and sample_looks_binary(raw_content[:BINARY_SNIFF_BYTES]):
+            return None
+
+        detected = detect_text_encodings(raw_content, complete=read_limit >= file_size) if detect else None
+
+        # ASCII关键词快速路径：直接按字节匹配，跳过多编码解码
+        matched = False
+        encoding = None
+        if matcher.bytes_fast_path:
+            found = set()
+            if matcher.match_bytes(raw_content, found):
+                matched = True
+            # 兼容 UTF-16(无BOM) 等含 NULL 字节文本：移除 NULL 后再匹配一次
+            elif b'\x00' in raw_content and matcher.match_bytes(raw_content.replace(b'\x00', b''), found):
+                matched = True
+
+        if not matched:
+            matched, encoding = _match_raw_content(raw_content, matcher, detected or encodings)
+        locations = None
+        if matched and locate_limit:
+            candidates = (encoding,) if encoding else (detected or encodings)
+            locations = locate_content_matches(raw_content, matcher, candidates, locate_limit)
+        return matched, encoding, detected, locations
+    except Exception as e:
+        # 如果无法以文本方式读取，记录日志并跳过该文件
+        debug_print(tr("[Search] 无法读取文件 {}: {}").format(file_path, e))
+    return False, None, None, None
+
+
+class FileEncodingCache:
+    """按 (路径, mtime_ns, 大小) 失效的文件编码缓存，持久化到索引目录下的 encodings.json。
+
+    只在主进程中使用：搜索时随任务把已知编码传给子进程，子进程回传新探测结果后统一记录并写盘。
+    每次搜索新增/变化的记录追加到 encodings.json.log（每行一条），日志超过全量条目的 1/4 时才合并重写主文件。"""
+
+    FILENAME = 'encodings.json'
+    LOG_SUFFIX = '.log'
+    COMPACT_MIN_ROWS = 1000
+
+    def __init__(self):
+        self.path = get_app_data_path(SEARCH_FILENAME_INDEX_DIR, self.FILENAME)
+        self.log_path = self.path + self.LOG_SUFFIX
+        self._lock = threading.Lock()
+        self._entries = None  # path -> [mtime_ns, size, "enc1|enc2"]
+        self._pending = []  # 尚未写盘的 (path, row)
+        self._log_rows = 0  # 日志文件中的记录数
+
+    def _ensure_loaded_locked(self):
+        if self._entries is not None:
+            return
+        self._entries = OrderedDict()
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for path, row in (data.get('entries') or {}).items():
+                if isinstance(row, list) and len(row) == 3:
+                    self._entries[path] = row
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            debug_print(f"[EncodingCache] Load failed {self.path}: {e}")
+        try:
+            with open(self.log_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        path, mtime_ns, size, encodings = json.loads(line)
+                    except (ValueError, TypeError):
+                        continue  # 写入中断的半行
+                    self._entries.pop(path, None)
+                    self._entries[path] = [mtime_ns, size, encodings]
+                    self._log_rows += 1
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            debug_print(f"[EncodingCache] Load failed {self.log_path}: {e}")
+        while len(self._entries) > FILE_ENCODING_CACHE_MAX_ENTRIES:
+            self._entries.popitem(last=False)
+
+    def lookup(self, file_path, mtime_ns, size):
+        with self._lock:
+            self._ensure_loaded_locked()
+            row = self._entries.get(file_path)
+        if row is None or row[0] != mtime_ns or row[1] != size:
+            return None
+        return tuple(row[2].split('|'))
+
+    def record_many(self, rows):
+        """rows 为 [(path, mtime_ns, size, encodings), ...]。"""
+        if not rows:
+            return
+        with self._lock:
+            self._ensure_loaded_locked()
+            for file_path, mtime_ns, size, encodings in rows:
+                old = self._entries.pop(file_path, None)
+                row = [mtime_ns, size, '|'.join(encodings)]
+                self._entries[file_path] = row
+                if row != old:
+                    self._pending.append((file_path, row))
+            while len(self._entries) > FILE_ENCODING_CACHE_MAX_ENTRIES:
+                self._entries.popitem(last=False)
+
+    def save(self):
+        """有变化时写盘：通常只向日志追加新记录，日志过长时原子重写主文件（先写临时文件再替换）并清空日志。"""
+        with self._lock:
+            if not self._pending or self._entries is None:
+                return
+            pending, self._pending = self._pending, []
+            compact = self._log_rows + len(pending) > max(self.COMPACT_MIN_ROWS, len(self._entries) // 4)
+            if compact:
+                payload = json.dumps({'version': 1, 'entries': self._entries}, ensure_ascii=False, separators=(',', ':'))
+                self._log_rows = 0
+            else:
+                payload = ''.join(
+                    json.dumps([path, row[0], row[1], row[2]], ensure_ascii=False, separators=(',', ':')) + '\n'
+                    for path, row in pending
+                )
+                self._log_rows += len(pending)
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            if compact:
+                tmp_path = self.path + '.tmp'
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(payload)
+                os.replace(tmp_path, self.path)
+                try:
+                    os.remove(self.log_path)
+                except FileNotFoundError:
+                    pass
+            else:
+                with open(self.log_path, 'a', encoding='utf-8') as f:
+                    f.write(payload)
+        except Exception as e:
+            debug_print(f"[EncodingCache] Save failed {self.path}: {e}")
+
+
+_file_encoding_cache = None
+_file_encoding_cache_lock = threading.Lock()
+
+
+def get_file_encoding_cache():
+    global _file_encoding_cache
+    with _file_encoding_cache_lock:
+        if _file_encoding_cache is None:
+            _file_encoding_cache = FileEncodingCache()
+        return _file_encoding_cache
+
+
+def _content_search_worker(tasks, matcher, scan_limits):
+    """内容搜索批任务（可在子进程执行）。
+
+    tasks 为 [(file_path, file_size, file_ext, mtime_ns, known_encodings), ...]；
+    返回 ([(path, encoding, locations), ...], 跳过的二进制文件数, [(path, mtime_ns, size, encodings), ...],
+    {扩展名: [文本数, 二进制数]})，第三项为本批新探测到的文件编码，由主进程写入持久化缓存；
+    第四项为本批非白名单扩展名的二进制探测结论，由主进程汇总学习。"""
+    matches = []
+    skipped_binary = 0
+    detected_rows = []
+    ext_verdicts = {}
+    for file_path, file_size, file_ext, mtime_ns, known_encodings in tasks:
+        # 文本白名单直接扫描；其余文件在扫描的首次读取中顺带探测二进制
+        sniff = file_ext not in SEARCH_TEXT_FILE_EXTENSIONS
+        result = scan_file_content(
+            file_path, file_size, matcher,
+            known_encodings=known_encodings,
+            scan_limits=scan_limits,
+            sniff=sniff,
+        )
+        if sniff:
+            ext_verdicts.setdefault(file_ext, [0, 0])[result is None] += 1
+        if result is None:
+            skipped_binary += 1
+            continue
+        matched, encoding, detected, locations = result
+        if detected and mtime_ns is not None:
+            detected_rows.append((file_path, mtime_ns, file_size, detected))
+        if matched:
+            matches.append((file_path, encoding, locations))
+    return matches, skipped_binary, detected_rows, ext_verdicts
+
+
+# 内容搜索进程池：跨搜索复用，避免每次搜索都重新拉起子进程（Windows spawn 启动成本高）
+_content_search_pool = None
+_content_search_pool_workers = 0
+_content_search_pool_lock = threading.Lock()
+
+
+def resolve_content_search_workers():
+    """解析内容搜索进程数：配置为 0 时按 CPU 核数自动选择（保留一个核给 UI）。"""
+    if CONTENT_SEARCH_WORKERS > 0:
+        return CONTENT_SEARCH_WORKERS
+    cpu = os.cpu_count() or 2
+    return max(1, min(8, cpu - 1))
+
+
+def get_content_search_pool(workers):
+    """按需创建/复用内容搜索进程池；进程数变化时重建。"""
+    global _content_search_pool, _content_search_pool_workers
+    with _content_search_pool_lock:
+        if _content_search_pool is not None and _content_search_pool_workers != workers:
+            _content_search_pool.shutdown(wait=False, cancel_futures=True)
+            _content_search_pool = None
+        if _content_search_pool is None:
+            from concurrent.futures import ProcessPoolExecutor
+            _content_search_pool = ProcessPoolExecutor(max_workers=workers)
+            _content_search_pool_workers = workers
+            debug_print(f"[Search] Content search pool started: workers={workers}")
+        return _content_search_pool
+
+
+def shutdown_content_search_pool(wait=False):
+    """关闭内容搜索进程池（程序退出或进程池损坏时调用）。"""
+    global _content_search_pool, _content_search_pool_workers
+    with _content_search_pool_lock:
+        pool = _content_search_pool
+        _content_search_pool = None
+        _content_search_pool_workers = 0
+    if pool is not None:
+        try:
+            pool.shutdown(wait=wait, cancel_futures=True)
+        except Exception:
+            pass
+
+
+class ParallelContentScanner:
+    """内容搜索调度器：遍历线程只负责投递候选文件，读取/编码/匹配在进程池中并行完成。
+
+    进程数为 1 或进程池不可用时退化为当前线程串行扫描，对调用方暴露相同接口：
+    submit()/finish() 返回已完成的命中 [(path, encoding, locations), ...]，locations 见 scan_file_content。
+    投递时带 mtime_ns 的命中另在 hit_meta 中保留 path -> (size, mtime)，调用方取走即可免去再次 stat。"""
+
+    def __init__(self, matcher, workers=None, is_cancelled=None):
+        self.matcher = matcher
+        self.workers = resolve_content_search_workers() if workers is None else max(1, int(workers))
+        self.is_cancelled = is_cancelled or (lambda: False)
+        self.scan_limits = current_content_scan_limits()
+        self.detected_encodings = []  # 本次搜索新探测的 (path, mtime_ns, size, encodings)，结束后写入缓存
+        self.skipped_binary_files = 0
+        self.binary_extensions = set()  # 本次搜索学到的二进制扩展名：其余同扩展名文件无需任何 I/O 直接跳过
+        self._ext_verdicts = {}  # 扩展名 -> [文本数, 二进制数]
+        self.hit_meta = {}  # 命中路径 -> (size, mtime)，取自投递时遍历线程已有的 stat
+        self.max_inflight = self.workers * 4  # 在途任务上限，防止遍历远快于扫描时任务无限堆积
+        self._batch = []
+        self._pending = {}
+        self._pool = None
+        if self.workers > 1:
+            try:
+                self._pool = get_content_search_pool(self.workers)
+            except Exception as e:
+                debug_print(f"[Search] Content search pool unavailable, fallback to serial: {e}")
+                self._pool = None
+
+    def _run_inline(self, tasks):
+        matches, skipped, detected, ext_verdicts = _content_search_worker(tasks, self.matcher, self.scan_limits)
+        self.skipped_binary_files += skipped
+        self.detected_encodings.extend(detected)
+        self._learn_extensions(ext_verdicts)
+        self._remember_hit_meta(tasks, matches)
+        return matches
+
+    def _remember_hit_meta(self, tasks, matches):
+        if not matches:
+            return
+        task_meta = {task[0]: (task[1], task[3]) for task in tasks if task[3] is not None}
+        for file_path, _encoding, _locations in matches:
+            meta = task_meta.get(file_path)
+            if meta is not None:
+                # 与 os.stat().st_mtime 的浮点换算方式一致，结果缓存校验按相等比较
+                seconds, nanoseconds = divmod(meta[1], 1000000000)
+                self.hit_meta[file_path] = (meta[0], seconds + nanoseconds * 1e-9)
+
+    def _learn_extensions(self, ext_verdicts):
+        if CONTENT_SEARCH_BINARY_EXT_LEARN <= 0:
+            return
+        for ext, (text_count, binary_count) in ext_verdicts.items():
+            counts = self._ext_verdicts.setdefault(ext, [0, 0])
+            counts[0] += text_count
+            counts[1] += binary_count
+            # 无扩展名的文件（Makefile/LICENSE 与可执行文件混杂）不参与学习
+            if ext and counts[0] == 0 and counts[1] >= CONTENT_SEARCH_BINARY_EXT_LEARN:
+                if ext not in self.binary_extensions:
+                    self.binary_extensions.add(ext)
+                    debug_print(f"[Search] Learned binary extension: .{ext} ({counts[1]} files)")
+
+    def is_known_binary(self, file_ext):
+        """扩展名是否已在本次搜索中确定为二进制（调用方据此跳过 stat 与读取）。"""
+        return file_ext in self.binary_extensions
+
+    def _dispatch(self):
+        tasks, self._batch = self._batch, []
+        if not tasks:
+            return []
+        if self._pool is None:
+            return self._run_inline(tasks)
+        try:
+            future = self._pool.submit(
+                _content_search_worker, tasks, self.matcher, self.scan_limits
+            )
+        except Exception as e:
+            debug_print(f"[Search] Content search submit failed, fallback to serial: {e}")
+            self._on_pool_broken()
+            return self._run_inline(tasks)
+        self._pending[future] = tasks
+        return []
+
+    def _on_pool_broken(self):
+        self._pool = None
+        shutdown_content_search_pool()
+
+    def _collect(self, block):
+        if not self._pending:
+            return []
+        from concurrent.futures import wait, FIRST_COMPLETED
+        if block:
+            done, _ = wait(list(self._pending), timeout=0.2, return_when=FIRST_COMPLETED)
+        else:
+            done = [f for f in self._pending if f.done()]
+        results = []
+        for future in done:
+            tasks = self._pending.pop(future)
+            try:
+                matches, skipped, detected, ext_verdicts = future.result()
+                self.skipped_binary_files += skipped
+                self.detected_encodings.extend(detected)
+                self._learn_extensions(ext_verdicts)
+                self._remember_hit_meta(tasks, matches)
+            except Exception as e:
+                # 子进程异常退出（BrokenProcessPool 等）：本批改为串行重扫，后续任务不再投递进程池
+                debug_print(f"[Search] Content search worker failed, rescanning batch inline: {e}")
+                self._on_pool_broken()
+                matches = self._run_inline(tasks)
+            results.extend(matches)
+        return results
+
+    def submit(self, file_path, file_size, file_ext, mtime_ns=None, known_encodings=None):
+        """投递候选文件，返回此刻已完成的命中；在途任务达上限时阻塞等待（可被取消）。
+
+        mtime_ns 为 None 时不回传探测到的编码（无法写入按 mtime 失效的缓存）。"""
+        self._batch.append((file_path, file_size, file_ext, mtime_ns, known_encodings))
+        if self._pool is None:
+            return self._dispatch()
+        results = []
+        if len(self._batch) >= CONTENT_SEARCH_TASK_FILES:
+            results.extend(self._dispatch())
+        results.extend(self._collect(block=False))
+        while len(self._pending) >= self.max_inflight and not self.is_cancelled():
+            results.extend(self._collect(block=True))
+        return results
+
+    def finish(self):
+        """投递剩余候选并逐批产出命中，直到全部完成或被取消。"""
+        results = self._dispatch()
+        if results:
+            yield results
+        while self._pending:
+            if self.is_cancelled():
+                self.cancel()
+                return
+            results = self._collect(block=True)
+            if results:
+                yield results
+
+    def cancel(self):
+        """取消尚未开始的任务；已在子进程中运行的批次很小，会自然结束。"""
+        for future in list(self._pending):
+            future.cancel()
+        self._pending.clear()
+        self._batch = []
+
+
+def attach_hit_locations(item, locations):
+    """把内容命中位置写入结果 dict（hit_encoding / hit_lines），locations 为 None 时去掉旧位置。"""
+    if locations:
+        item['hit_encoding'], item['hit_lines'] = locations[0], [list(hit) for hit in locations[1]]
+    else:
+        item.pop('hit_encoding', None)
+        item.pop('hit_lines', None)
+    return item
+
+
+def parse_file_type_filter(file_types):
+    """解析文件类型过滤输入（*.ext / .ext / ext，逗号分隔），返回小写扩展名集合（不含点）。"""
+    file_extensions = set()
+    for ft in (file_types or '').split(','):
+        ft = ft.strip()
+        if ft.startswith('*.'):
+            file_extensions.add(ft[2:].lower())  # 去掉*.，只保留扩展名
+        elif ft.startswith('.'):
+            file_extensions.add(ft[1:].lower())  # 去掉.，只保留扩展名
+        elif ft:
+            file_extensions.add(ft.lower())  # 直接使用输入的扩展名
+    return file_extensions
+
+
+def parse_dir_exclude_patterns(text):
+    """解析排除目录输入（逗号/分号分隔的目录名或通配符），返回小写模式元组。"""
+    parts = str(text or '').replace(';', ',').split(',')
+    return tuple(p.strip().lower() for p in parts if p.strip())
+
+
+def make_dir_excluder(patterns):
+    """返回判断目录名是否被排除的函数（不区分大小写）；无模式时返回 None。"""
+    import fnmatch
+    patterns = tuple(p.lower() for p in patterns or ())
+    if not patterns:
+        return None
+    exact = {p for p in patterns if not any(ch in p for ch in '*?[')}
+    globs = tuple(p for p in patterns if p not in exact)
+
+    def is_excluded(name):
+        name = name.lower()
+        return name in exact or any(fnmatch.fnmatchcase(name, g) for g in globs)
+    return is_excluded
+
+
+class ScandirEntryMeta:
+    """scandir 目录项的元数据视图，接口与文件名索引的 entry_meta 相同（name -> (size, mtime)）。
+
+    Windows 上 scandir 已随目录枚举带回大小/时间，get() 直接使用，不再逐项 stat；
+    其他平台 DirEntry.stat() 需要一次系统调用，get() 返回 None，交给结果表格后台补齐。
+    stat() 总是返回完整 stat 结果（内容搜索需要大小与 mtime_ns）。"""
+
+    __slots__ = ('entries',)
+    STAT_IS_FREE = os.name == 'nt'
+
+    def __init__(self):
+        self.entries = {}
+
+    def __contains__(self, name):
+        return self.STAT_IS_FREE and name in self.entries
+
+    def __getitem__(self, name):
+        st = self.entries[name].stat()
+        return st.st_size, st.st_mtime
+
+    def get(self, name, default=None):
+        if not self.STAT_IS_FREE or name not in self.entries:
+            return default
+        try:
+            return self[name]
+        except OSError:
+            return default
+
+    def stat(self, name):
+        return self.entries[name].stat()
+
+
+def scandir_walk(top, is_excluded=None, max_depth=0, ignore=None, ignore_state=None):
+    """基于 os.scandir 的先序遍历，顺序与 os.walk(topdown=True, followlinks=False) 相同。
+
+    产出 (root, dirs, files, entry_meta)，entry_meta 为 ScandirEntryMeta，复用 DirEntry 已带回的
+    类型与 stat 信息。is_excluded(name) 为真的子目录既不产出也不进入；max_depth>0 时只遍历
+    根目录下 max_depth 层（1 表示只遍历根目录本身）。ignore 为 GitignoreFilter 时，被忽略的
+    目录在枚举前剪掉、被忽略的文件不产出；top 不是过滤器的搜索根时，ignore_state 传入
+    ignore.inherited_state(top)。调用方可原地修改 dirs 以剪枝。"""
+    if ignore is not None and ignore_state is None:
+        ignore_state = ignore.root_state
+    stack = [(top, 1, ignore_state)]
+    while stack:
+        root, depth, state = stack.pop()
+        try:
+            with os.scandir(root) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        if ignore is not None:
+            state = ignore.enter(root, {entry.name for entry in entries}, state)
+        dirs = []
+        files = []
+        meta = ScandirEntryMeta()
+        for entry in entries:
+            name = entry.name
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if is_dir:
+                if is_excluded is not None and is_excluded(name):
+                    continue
+                if ignore is not None and ignore.is_ignored(state, name, True):
+                    continue
+                dirs.append(name)
+            else:
+                if ignore is not None and ignore.is_ignored(state, name, False):
+                    continue
+                files.append(name)
+            meta.entries[name] = entry
+        yield root, dirs, files, meta
+        if max_depth and depth >= max_depth:
+            continue
+        for name in reversed(dirs):
+            entry = meta.entries.get(name)
+            try:
+                if entry is not None and entry.is_symlink():
+                    continue
+            except OSError:
+                continue
+            child_state = ignore.descend(state, name) if ignore is not None else None
+            stack.append((os.path.join(root, name), depth + 1, child_state))
+
+
+def prune_walk(walk_iter, top, is_excluded=None, max_depth=0, ignore=None):
+    """对不支持剪枝的遍历（如文件名索引）按排除目录、最大深度与忽略规则过滤产出。
+
+    walk_iter 须为先序遍历（父目录先于子目录产出），被剪掉目录的整棵子树都会跳过。"""
+    if is_excluded is None and not max_depth and ignore is None:
+        yield from walk_iter
+        return
+    top_len = len(top.rstrip('\\/'))
+    child_states = {}
+    for root, dirs, files, entry_meta in walk_iter:
+        rel = root[top_len:].strip('\\/')
+        parts = rel.replace('\\', '/').split('/') if rel else []
+        if ignore is not None:
+            if parts:
+                state = child_states.pop(root, None)
+                if state is None:
+                    continue  # 祖先目录已被忽略/排除
+            else:
+                state = ignore.root_state
+        if is_excluded is not None and any(is_excluded(part) for part in parts):
+            continue
+        if max_depth and len(parts) >= max_depth:
+            continue
+        if is_excluded is not None:
+            dirs[:] = [d for d in dirs if not is_excluded(d)]
+        if ignore is not None:
+            state = ignore.enter(root, set(dirs).union(files), state)
+            dirs[:] = [d for d in dirs if not ignore.is_ignored(state, d, True)]
+            files[:] = [f for f in files if not ignore.is_ignored(state, f, False)]
+            if not max_depth or len(parts) + 1 < max_depth:
+                for d in dirs:
+                    child_states[os.path.join(root, d)] = ignore.descend(state, d)
+        yield root, dirs, files, entry_meta
+
+
+def find_git_root(start_path):
+    """向上查找包含 .git 的目录，找到则返回仓库根路径，否则返回 None"""
+    if not start_path:
+        return None
+    path = os.path.abspath(start_path)
+    while True:
+        git_marker = os.path.join(path, '.git')
+        if os.path.isdir(git_marker):
+            return path
+        if os.path.isfile(git_marker):
+            try:
+                with open(git_marker, 'r', encoding='utf-8', errors='ignore') as f:
+                    line = f.readline().strip()
+                if line.lower().startswith('gitdir:'):
+                    gitdir_path = line[7:].strip()
+                    if not os.path.isabs(gitdir_path):
+                        gitdir_path = os.path.abspath(os.path.join(path, gitdir_path))
+                    if os.path.exists(gitdir_path):
+                        return path
+            except Exception:
+                pass
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return None
+
+
+def _gitignore_pattern_regex(pattern, anchored):
+    """把一条 gitignore 模式（已去掉 ! 与末尾 /）转换为匹配相对路径（/ 分隔）的正则。"""
+    import re
+    parts = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == '*':
+            if pattern.startswith('**', i) and (i == 0 or pattern[i - 1] == '/') and (i + 2 == n or pattern[i + 2] == '/'):
+                if i + 2 == n:
+                    parts.append('.*')  # 末尾 /**：目录下的一切
+                    i += 2
+                else:
+                    parts.append('(?:.*/)?')  # **/：零个或多个目录
+                    i += 3
+                continue
+            while i < n and pattern[i] == '*':
+                i += 1
+            parts.append('[^/]*')
+            continue
+        if c == '?':
+            parts.append('[^/]')
+        elif c == '\\' and i + 1 < n:
+            i += 1
+            parts.append(re.escape(pattern[i]))
+        elif c == '[':
+            j = i + 1
+            if j < n and pattern[j] in '!^':
+                j += 1
+            if j < n and pattern[j] == ']':
+                j += 1
+            j = pattern.find(']', j)
+            if j < 0:
+                parts.append(re.escape(c))
+            else:
+                body = pattern[i + 1:j]
+                if body[:1] in ('!', '^'):
+                    body = '^' + body[1:]
+                parts.append('[' + body.replace('\\', '\\\\') + ']')
+                i = j
+        else:
+            parts.append(re.escape(c))
+        i += 1
+    prefix = '' if anchored else '(?:.*/)?'
+    flags = re.IGNORECASE if os.name == 'nt' else 0  # Windows 上 git 默认 core.ignorecase=true
+    try:
+        return re.compile(prefix + ''.join(parts) + r'\Z', flags)
+    except re.error:
+        return None
+
+
+class GitignoreRules:
+    """一个忽略文件（.gitignore / .ignore / .git/info/exclude）编译后的规则。"""
+
+    __slots__ = ('rules',)
+
+    def __init__(self, lines):
+        rules = []
+        for line in lines:
+            line = line.rstrip('\r\n')
+            if not line or line.startswith('#'):
+                continue
+            stripped = line.rstrip(' ')
+            if stripped.endswith('\\') and len(stripped) < len(line):
+                stripped += ' '  # 转义的行尾空格保留
+            line = stripped
+            negate = line.startswith('!')
+            if negate:
+                line = line[1:]
+            elif line.startswith(('\\!', '\\#')):
+                line = line[1:]
+            dir_only = line.endswith('/')
+            line = line.rstrip('/')
+            if not line:
+                continue
+            anchored = '/' in line  # 含 / 的模式相对忽略文件所在目录
+            regex = _gitignore_pattern_regex(line.lstrip('/'), anchored)
+            if regex is not None:
+                rules.append((regex.match, negate, dir_only))
+        self.rules = tuple(rules)
+
+    def match(self, rel_path, is_dir):
+        """最后一条命中的规则生效：返回 True（忽略）、False（被 ! 重新包含）或 None（未命中）。"""
+        for match, negate, dir_only in reversed(self.rules):
+            if dir_only and not is_dir:
+                continue
+            if match(rel_path):
+                return not negate
+        return None
+
+
+_gitignore_rules_cache = OrderedDict()  # 忽略文件路径 -> ((mtime_ns, size), GitignoreRules 或 None)
+_gitignore_rules_lock = threading.Lock()
+
+
+def load_gitignore_rules(path):
+    """读取并编译忽略文件，按路径缓存（mtime/大小变化后重新编译）；文件不存在或无规则返回 None。"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    stamp = (st.st_mtime_ns, st.st_size)
+    with _gitignore_rules_lock:
+        cached = _gitignore_rules_cache.get(path)
+        if cached is not None and cached[0] == stamp:
+            _gitignore_rules_cache.move_to_end(path)
+            return cached[1]
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            rules = GitignoreRules(f)
+    except OSError:
+        return None
+    if not rules.rules:
+        rules = None
+    with _gitignore_rules_lock:
+        _gitignore_rules_cache[path] = (stamp, rules)
+        _gitignore_rules_cache.move_to_end(path)
+        while len(_gitignore_rules_cache) > GITIGNORE_CACHE_MAX_ENTRIES:
+            _gitignore_rules_cache.popitem(last=False)
+    return rules
+
+
+class GitignoreFilter:
+    """搜索遍历用的 .gitignore/.ignore 过滤器。
+
+    遍历状态为 (in_repo, chain)：chain 按由外到内排列 (相对前缀, GitignoreRules)，相对前缀是
+    规则所在目录到当前目录的路径（/ 结尾）。深层目录的规则优先；.gitignore 和 .git/info/exclude
+    只在 Git 仓库内生效，.ignore 任何位置都生效。搜索根目录位于仓库内部时，会先加载仓库根到
+    搜索根之间各级目录的规则。"""
+
+    IGNORE_FILES = ('.gitignore', '.ignore')
+
+    def __init__(self, top):
+        self.top = top
+        self.ignored_dirs = 0
+        self.ignored_files = 0
+        self._path_states = {}
+        self.root_state = (False, ())
+        abs_top = os.path.abspath(top)
+        repo_root = find_git_root(abs_top)
+        if repo_root is not None and os.path.normcase(repo_root) != os.path.normcase(abs_top):
+            rel_parts = [p for p in os.path.relpath(abs_top, repo_root).split(os.sep) if p]
+            state = self.enter(repo_root, None, self.root_state)
+            path = repo_root
+            for part in rel_parts:
+                if self.is_ignored(state, part, True):
+                    break  # 搜索根本身位于被忽略的目录中：照常搜索，只应用其下的规则
+                state = self.descend(state, part)
+                path = os.path.join(path, part)
+                if path != abs_top:
+                    state = self.enter(path, None, state)
+            else:
+                self.root_state = state
+                return
+            self.root_state = (True, ())
+
+    def enter(self, root, names, state):
+        """进入目录 root（names 为其直接子项名集合，None 表示按需探测），返回包含本目录规则的状态。"""
+        if names is None:
+            def has(name):
+                return os.path.lexists(os.path.join(root, name))
+        else:
+            has = names.__contains__
+        in_repo, chain = state
+        if has('.git'):
+            in_repo = True
+            chain = ()  # 嵌套仓库：外层仓库的规则不再适用
+            rules = load_gitignore_rules(os.path.join(root, '.git', 'info', 'exclude'))
+            if rules is not None:
+                chain += (('', rules),)
+        for filename in self.IGNORE_FILES:
+            if filename == '.gitignore' and not in_repo:
+                continue
+            if has(filename):
+                rules = load_gitignore_rules(os.path.join(root, filename))
+                if rules is not None:
+                    chain += (('', rules),)
+        return in_repo, chain
+
+    @staticmethod
+    def descend(state, name):
+        """返回子目录 name 的继承状态（尚未包含该子目录自身的规则）。"""
+        in_repo, chain = state
+        if chain:
+            suffix = name + '/'
+            chain = tuple((prefix + suffix, rules) for prefix, rules in chain)
+        return in_repo, chain
+
+    def is_ignored(self, state, name, is_dir):
+        in_repo, chain = state
+        if is_dir and in_repo and name == '.git':
+            self.ignored_dirs += 1
+            return True
+        for prefix, rules in reversed(chain):
+            verdict = rules.match(prefix + name, is_dir)
+            if verdict is not None:
+                if verdict:
+                    if is_dir:
+                        self.ignored_dirs += 1
+                    else:
+                        self.ignored_files += 1
+                return verdict
+        return False
+
+    def _rel_parts(self, path):
+        rel = path[len(self.top.rstrip('\\/')):].replace('\\', '/').strip('/')
+        return rel.split('/') if rel else []
+
+    def _dir_state(self, parts):
+        """返回搜索根下目录（parts 为逐级名称）包含其自身规则的状态，位于被忽略目录中时返回 False；逐级缓存。"""
+        key = ()
+        state = self._path_states.get(key)
+        if state is None:
+            state = self.enter(self.top, None, self.root_state)
+            self._path_states[key] = state
+        dir_path = self.top
+        for part in parts:
+            key += (part,)
+            dir_path = os.path.join(dir_path, part)
+            cached = self._path_states.get(key)
+            if cached is None:
+                if state is False or self.is_ignored(state, part, True):
+                    cached = False
+                else:
+                    cached = self.enter(dir_path, None, self.descend(state, part))
+                self._path_states[key] = cached
+            state = cached
+            if state is False:
+                return False
+        return state
+
+    def is_path_ignored(self, path, is_dir):
+        """判断搜索根下任意路径是否被忽略（用于不经遍历的结果，如 Everything），逐级目录状态会被缓存。"""
+        parts = self._rel_parts(path)
+        if not parts:
+            return False
+        state = self._dir_state(parts[:-1])
+        if state is False:
+            return True
+        return self.is_ignored(state, parts[-1], is_dir)
+
+    def inherited_state(self, dir_path):
+        """返回搜索根下目录 dir_path 从上级继承的状态（尚未包含其自身规则），用于从该目录开始遍历；
+        目录本身或其祖先被忽略时返回 None。"""
+        parts = self._rel_parts(dir_path)
+        if not parts:
+            return self.root_state
+        state = self._dir_state(parts[:-1])
+        if state is False or self.is_ignored(state, parts[-1], True):
+            return None
+        return self.descend(state, parts[-1])
+
+
+def touch_search_index_file(path):
+    """记录索引文件被使用：只更新访问时间（LRU 淘汰依据），修改时间保留为上次写入时间。"""
+    try:
+        st = os.stat(path)
+        os.utime(path, ns=(time.time_ns(), st.st_mtime_ns))
+    except OSError:
+        pass
+
+
+def prune_search_index_dir(keep_path=None):
+    """索引目录中 .fidx/.tgm 总大小超过 SEARCH_INDEX_MAX_BYTES 时按最近使用时间淘汰（keep_path 除外）。
+
+    正在被映射的索引在 Windows 上删除会失败，直接跳过，下次写入时再试。"""
+    index_dir = get_app_data_path(SEARCH_FILENAME_INDEX_DIR)
+    files = []
+    total = 0
+    try:
+        with os.scandir(index_dir) as it:
+            for entry in it:
+                if not entry.name.endswith(('.fidx', '.tgm')):
+                    continue
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                total += st.st_size
+                files.append((max(st.st_atime, st.st_mtime), st.st_size, entry.path))
+    except OSError:
+        return
+    if total <= SEARCH_INDEX_MAX_BYTES:
+        return
+    keep = os.path.normcase(os.path.abspath(keep_path)) if keep_path else None
+    files.sort()
+    for _used, size, path in files:
+        if keep is not None and os.path.normcase(os.path.abspath(path)) == keep:
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        debug_print(f"[SearchIndex] Evicted {path} ({size} bytes)")
+        if total <= SEARCH_INDEX_MAX_BYTES:
+            break
+
+
+class FilenameIndex:
+    """按搜索根目录持久化的文件名索引（紧凑二进制文件，mmap 只读访问）。
+
+    文件布局：魔数 + 根路径 + 目录数，随后按先序遍历顺序逐目录写入
+    [相对路径, 目录 mtime_ns, 条目数, 数据块长度, 条目...]，条目为 [标志, 大小, mtime_ns, 名称]。
+    查询时直接从映射区逐块解析，不常驻大量 Python 对象，并逐目录核对 mtime：变化的目录当场重新枚举，
+    新出现的子目录当场遍历，已删除的目录跳过，结果不依赖后台刷新是否完成。刷新时同样对比目录 mtime，
+    只重新枚举发生增删/重命名的目录，未变化目录的数据块原样复用。
+    注意：原地修改文件内容不会改变目录 mtime，命中项的大小/时间可能滞后，下次该目录变化时更新。"""
+
+    MAGIC = b'TBXFIDX1'
+    FLAG_DIR = 1
+    FLAG_SYMLINK = 2
+    _DIR_HEAD = struct.Struct('<qII')  # dir_mtime_ns, entry_count, block_len
+    _ENTRY_HEAD = struct.Struct('<BqqH')  # flags, size, mtime_ns, name_len
+
+    def __init__(self, root):
+        self.root = root
+        key = hashlib.md5(os.path.normcase(os.path.normpath(root)).encode('utf-8', errors='surrogatepass')).hexdigest()
+        self.index_path = get_app_data_path(SEARCH_FILENAME_INDEX_DIR, key + '.fidx')
+        self._lock = threading.Lock()
+        self._file = None
+        self._mm = None
+        self._dirs = None  # [(rel_dir, dir_mtime_ns, entry_count, block_offset, block_len), ...]
+        self._readers = 0
+        self._pending_swap = False
+        self._refresh_thread = None
+        self._changed_since_refresh = False  # 查询时发现过目录变化：下次刷新不受 SEARCH_FILENAME_INDEX_REFRESH_SECONDS 限制
+
+    # ---- 读取 ----
+    def _close_mapping(self):
+        if self._mm is not None:
+            try:
+                self._mm.close()
+            except Exception:
+                pass
+        if self._file is not None:
+            try:
+                self._file.close()
+            except Exception:
+                pass
+        self._mm = None
+        self._file = None
+        self._dirs = None
+
+    def _open_mapping(self):
+        """映射索引文件并解析目录表（只读目录头，条目数据块留在映射区）。"""
+        import mmap
+        self._close_mapping()
+        if not os.path.isfile(self.index_path):
+            return False
+        f = open(self.index_path, 'rb')
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            f.close()
+            return False
+        try:
+            if mm[:len(self.MAGIC)] != self.MAGIC:
+                raise ValueError("bad magic")
+            pos = len(self.MAGIC)
+            (root_len,) = struct.unpack_from('<H', mm, pos)
+            pos += 2
+            pos += root_len
+            (dir_count,) = struct.unpack_from('<I', mm, pos)
+            pos += 4
+            dirs = []
+            for _ in range(dir_count):
+                (rel_len,) = struct.unpack_from('<H', mm, pos)
+                pos += 2
+                rel_dir = mm[pos:pos + rel_len].decode('utf-8', errors='surrogatepass')
+                pos += rel_len
+                dir_mtime_ns, entry_count, block_len = self._DIR_HEAD.unpack_from(mm, pos)
+                pos += self._DIR_HEAD.size
+                dirs.append((rel_dir, dir_mtime_ns, entry_count, pos, block_len))
+                pos += block_len
+        except Exception as e:
+            debug_print(f"[FilenameIndex] Invalid index {self.index_path}: {e}")
+            mm.close()
+            f.close()
+            return False
+        self._file = f
+        self._mm = mm
+        self._dirs = dirs
+        return True
+
+    def load(self):
+        """确保索引已映射；索引文件不存在或损坏时返回 False。"""
+        with self._lock:
+            if self._dirs is not None:
+                return True
+            return self._open_mapping()
+
+    def _iter_block(self, mm, offset, count):
+        entry_head = self._ENTRY_HEAD
+        pos = offset
+        for _ in range(count):
+            flags, size, mtime_ns, name_len = entry_head.unpack_from(mm, pos)
+            pos += entry_head.size
+            name = mm[pos:pos + name_len].decode('utf-8', errors='surrogatepass')
+            pos += name_len
+            yield name, flags, size, mtime_ns
+
+    def walk(self):
+        """与 os.walk(topdown=True) 兼容的遍历：产出 (root, dirs, files, entry_meta)。
+
+        entry_meta 为 名称 -> (size, mtime)，可直接用于结果元数据，避免逐项 stat。
+        每个目录先 stat 一次：mtime 与索引记录不同则当场重新枚举，其下索引中没有的子目录随即当场遍历
+        （调用方原地剪掉的子目录不再进入）；目录已不存在则跳过。
+        遍历期间持有读引用，后台刷新完成的新索引会在最后一个读者退出后再替换。"""
+        with self._lock:
+            if self._dirs is None and not self._open_mapping():
+                return
+            mm = self._mm
+            dirs = self._dirs
+            self._readers += 1
+        touch_search_index_file(self.index_path)
+        try:
+            indexed = {d[0] for d in dirs}
+            for rel_dir, dir_mtime_ns, entry_count, offset, _block_len in dirs:
+                abs_dir = os.path.join(self.root, rel_dir) if rel_dir else self.root
+                try:
+                    changed = os.stat(abs_dir).st_mtime_ns != dir_mtime_ns
+                    entries = self._scan_directory(abs_dir) if changed else self._iter_block(mm, offset, entry_count)
+                except OSError:
+                    self._changed_since_refresh = True
+                    continue  # 目录已删除/改名/不可访问
+                if not changed:
+                    dir_names, file_names, entry_meta, _symlink_dirs = self._split_entries(entries)
+                    yield abs_dir, dir_names, file_names, entry_meta
+                    continue
+                self._changed_since_refresh = True
+                yield from self._walk_changed(rel_dir, abs_dir, entries, indexed)
+        finally:
+            with self._lock:
+                self._readers -= 1
+                if self._readers == 0 and self._pending_swap:
+                    self._install_pending_locked()
+
+    def _split_entries(self, entries):
+        """把目录条目拆成 (子目录名, 文件名, 名称 -> (size, mtime), 符号链接子目录名集合)。"""
+        dir_names = []
+        file_names = []
+        entry_meta = {}
+        symlink_dirs = set()
+        for name, flags, size, mtime_ns in entries:
+            if flags & self.FLAG_DIR:
+                dir_names.append(name)
+                if flags & self.FLAG_SYMLINK:
+                    symlink_dirs.add(name)
+            else:
+                file_names.append(name)
+            entry_meta[name] = (size, mtime_ns / 1e9)
+        return dir_names, file_names, entry_meta, symlink_dirs
+
+    def _walk_changed(self, rel_dir, abs_dir, entries, indexed):
+        """产出当场重新枚举的目录，并先序遍历其下索引中没有的（新建/改名而来的）子目录。"""
+        stack = [(rel_dir, abs_dir, entries)]
+        while stack:
+            rel_dir, abs_dir, entries = stack.pop()
+            dir_names, file_names, entry_meta, symlink_dirs = self._split_entries(entries)
+            yield abs_dir, dir_names, file_names, entry_meta
+            new_dirs = []
+            for name in dir_names:  # 调用方可能已原地剪枝
+                child_rel = os.path.join(rel_dir, name) if rel_dir else name
+                if name in symlink_dirs or child_rel in indexed:
+                    continue
+                child_abs = os.path.join(abs_dir, name)
+                try:
+                    new_dirs.append((child_rel, child_abs, self._scan_directory(child_abs)))
+                except OSError:
+                    continue
+            stack.extend(reversed(new_dirs))
+
+    # ---- 构建 / 增量刷新 ----
+    def _encode_block(self, rel_dir, dir_mtime_ns, entries):
+        parts = []
+        for name, flags, size, mtime_ns in entries:
+            name_bytes = name.encode('utf-8', errors='surrogatepass')[:0xFFFF]
+            parts.append(self._ENTRY_HEAD.pack(flags, size, mtime_ns, len(name_bytes)))
+            parts.append(name_bytes)
+        block = b''.join(parts)
+        rel_bytes = rel_dir.encode('utf-8', errors='surrogatepass')
+        return b''.join((
+            struct.pack('<H', len(rel_bytes)), rel_bytes,
+            self._DIR_HEAD.pack(dir_mtime_ns, len(entries), len(block)),
+            block,
+        ))
+
+    @classmethod
+    def _scan_directory(cls, abs_dir):
+        entries = []
+        with os.scandir(abs_dir) as it:
+            for entry in it:
+                try:
+                    flags = 0
+                    if entry.is_dir():
+                        flags |= cls.FLAG_DIR
+                    if entry.is_symlink():
+                        flags |= cls.FLAG_SYMLINK
+                    st = entry.stat()
+                    size = 0 if flags & cls.FLAG_DIR else st.st_size
+                    entries.append((entry.name, flags, size, st.st_mtime_ns))
+                except OSError:
+                    continue
+        return entries
+
+    def rebuild(self, is_cancelled=None):
+        """增量重建索引：目录 mtime 未变则复用旧数据块，否则重新枚举该目录。"""
+        self._changed_since_refresh = False
+        with self._lock:
+            if self._dirs is None:
+                self._open_mapping()
+            old_mm = self._mm
+            old_dirs = {d[0]: d for d in (self._dirs or [])}
+            self._readers += 1
+        reused_dirs = 0
+        rescanned_dirs = 0
+        blocks = []
+        try:
+            stack = ['']
+            while stack:
+                if is_cancelled is not None and is_cancelled():
+                    return False
+                rel_dir = stack.pop()
+                abs_dir = os.path.join(self.root, rel_dir) if rel_dir else self.root
+                try:
+                    dir_mtime_ns = os.stat(abs_dir).st_mtime_ns
+                except OSError:
+                    continue
+                old = old_dirs.get(rel_dir)
+                if old is not None and old[1] == dir_mtime_ns:
+                    entries = list(self._iter_block(old_mm, old[3], old[2]))
+                    reused_dirs += 1
+                else:
+                    try:
+                        entries = self._scan_directory(abs_dir)
+                    except OSError:
+                        continue
+                    rescanned_dirs += 1
+                blocks.append(self._encode_block(rel_dir, dir_mtime_ns, entries))
+                child_dirs = [
+                    name for name, flags, _size, _mtime in entries
+                    if flags & self.FLAG_DIR and not flags & self.FLAG_SYMLINK
+                ]
+                for name in reversed(child_dirs):
+                    stack.append(os.path.join(rel_dir, name) if rel_dir else name)
+        finally:
+            with self._lock:
+                self._readers -= 1
+
+        if old_mm is not None and rescanned_dirs == 0 and reused_dirs == len(old_dirs):
+            # 没有目录发生变化：不重写索引，只把修改时间更新为本次校验时间
+            try:
+                os.utime(self.index_path)
+            except OSError:
+                pass
+            debug_print(f"[FilenameIndex] Unchanged {self.root}: dirs={reused_dirs}")
+            return True
+
+        root_bytes = self.root.encode('utf-8', errors='surrogatepass')
+        tmp_path = self.index_path + '.tmp'
+        try:
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(self.MAGIC)
+                f.write(struct.pack('<H', len(root_bytes)))
+                f.write(root_bytes)
+                f.write(struct.pack('<I', len(blocks)))
+                for block in blocks:
+                    f.write(block)
+        except Exception as e:
+            debug_print(f"[FilenameIndex] Write failed {tmp_path}: {e}")
+            return False
+        with self._lock:
+            self._pending_swap = True
+            if self._readers == 0:
+                self._install_pending_locked()
+        debug_print(f"[FilenameIndex] Refreshed {self.root}: dirs={len(blocks)} reused={reused_dirs} rescanned={rescanned_dirs}")
+        return True
+
+    def _install_pending_locked(self):
+        # Windows 下被映射的文件无法被替换：先解除映射再原子替换，随后重新映射
+        self._pending_swap = False
+        self._close_mapping()
+        try:
+            os.replace(self.index_path + '.tmp', self.index_path)
+        except Exception as e:
+            debug_print(f"[FilenameIndex] Replace failed {self.index_path}: {e}")
+        self._open_mapping()
+        prune_search_index_dir(self.index_path)
+
+    def refresh_async(self):
+        """后台增量刷新（同一索引同时只运行一个刷新线程）。
+
+        索引在 SEARCH_FILENAME_INDEX_REFRESH_SECONDS 内刷新过且此后查询未发现目录变化时跳过：
+        查询本身会当场核对目录 mtime，刷新只是让后续查询少做重新枚举。"""
+        try:
+            age = time.time() - os.path.getmtime(self.index_path)
+        except OSError:
+            age = None
+        if (age is not None and 0 <= age < SEARCH_FILENAME_INDEX_REFRESH_SECONDS
+                and not self._changed_since_refresh):
+            return
+        with self._lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return
+            self._refresh_thread = threading.Thread(target=self.rebuild, name='filename-index', daemon=True)
+            self._refresh_thread.start()
+
+
+_filename_indexes = {}
+_filename_indexes_lock = threading.Lock()
+
+
+def get_filename_index(root):
+    """获取指定搜索根目录的文件名索引实例（同一根目录在进程内共享）。"""
+    key = os.path.normcase(os.path.normpath(root))
+    with _filename_indexes_lock:
+        index = _filename_indexes.get(key)
+        if index is None:
+            index = FilenameIndex(root)
+            _filename_indexes[key] = index
+        return index
+
+
+def content_trigram_keys(text):
+    """提取文本的 trigram 键集合（casefold 后按三个码位折叠为 32 位整数，冲突只会多出候选）。"""
+    keys = set()
+    if not text or len(text) < 3:
+        return keys
+    for gram in {text[i:i + 3] for i in range(len(text) - 2)}:
+        v = (ord(gram[0]) << 42) | (ord(gram[1]) << 21) | ord(gram[2])
+        keys.add((v ^ (v >> 32)) & 0xFFFFFFFF)
+    return keys
+
+
+def _content_index_texts(raw):
+    """按文件可能的编码解码出用于建立 trigram 的文本（内容搜索逐编码尝试的等价集合，去除明显的乱码解读）。
+
+    trigram 过滤必须是扫描可匹配内容的超集：UTF-8/GBK 解读总是保留（含 NULL/BOM 的文件也一样），
+    不是合法 UTF-8 时另加 latin-1，与 detect_text_encodings 的候选一致。"""
+    texts = {raw.decode('utf-8', errors='ignore'), raw.decode('gbk', errors='ignore')}
+    try:
+        raw.decode('utf-8')
+    except UnicodeDecodeError:
+        texts.add(raw.decode('latin-1'))
+    if raw.startswith((b'\xff\xfe', b'\xfe\xff')) or b'\x00' in raw:
+        texts.add(raw.decode('utf-16-le', errors='ignore'))
+        texts.add(raw.decode('utf-16-be', errors='ignore'))
+        # 对应 ASCII 快速路径中“去除 NULL 后再匹配”的规则
+        texts.add(raw.replace(b'\x00', b'').decode('latin-1'))
+    return [t.casefold() for t in texts]
+
+
+def _content_index_worker(tasks, max_file_bytes):
+    """为一批文件计算 trigram（可在子进程执行）。
+
+    tasks 为 [(file_path, file_size, mtime_ns, file_ext), ...]，
+    返回 [(file_path, file_size, mtime_ns, kind, trigram_bytes), ...]。"""
+    from array import array
+    results = []
+    for file_path, file_size, mtime_ns, file_ext in tasks:
+        kind = ContentTrigramIndex.KIND_UNINDEXED
+        data = b''
+        try:
+            # 二进制探测与建索引共用同一次读取：超过上限的文件只读开头样本
+            sniff = file_ext not in SEARCH_TEXT_FILE_EXTENSIONS
+            raw = None
+            if file_size <= max_file_bytes:
+                with open(file_path, 'rb') as bf:
+                    raw = bf.read(max_file_bytes + 1)
+                sample = raw[:BINARY_SNIFF_BYTES]
+            elif sniff:
+                with open(file_path, 'rb') as bf:
+                    sample = bf.read(BINARY_SNIFF_BYTES)
+            if sniff and sample_looks_binary(sample):
+                kind = ContentTrigramIndex.KIND_BINARY
+            elif raw is not None:
+                if len(raw) <= max_file_bytes:
+                    keys = set()
+                    for text in _content_index_texts(raw):
+                        keys |= content_trigram_keys(text)
+                    data = array('I', sorted(keys)).tobytes()
+                    kind = ContentTrigramIndex.KIND_TEXT
+        except Exception as e:
+            debug_print(f"[ContentIndex] Index failed {file_path}: {e}")
+            kind = ContentTrigramIndex.KIND_UNINDEXED
+            data = b''
+        results.append((file_path, file_size, mtime_ns, kind, data))
+    return results
+
+
+class ContentTrigramIndex:
+    """按搜索根目录持久化的内容 trigram 索引，用于在内容匹配前缩小候选文件集合。
+
+    每个文件记录 (大小, mtime_ns, 类型, 有序 trigram 键)，以文件大小+mtime 判定是否过期；
+    查询时关键词的全部 trigram 都出现的文件才需要真正读取匹配，已知二进制文件直接跳过。
+    索引文件 mmap 只读访问，过期/新增文件在搜索结束后由后台线程增量补录后整体替换。
+    布局：魔数 + 条目数，条目为 [相对路径, 大小, mtime_ns, 类型, 键数, 键...(uint32)]。"""
+
+    MAGIC = b'TBXTGM02'  # 02：含 NULL/BOM 的文件同样索引 UTF-8/GBK 解读，旧索引整体失效重建
+    KIND_TEXT = 0
+    KIND_BINARY = 1
+    KIND_UNINDEXED = 2  # 超过大小上限或读取失败：总是直接扫描
+    _ENTRY_HEAD = struct.Struct('<qqBI')  # size, mtime_ns, kind, key_count
+
+    def __init__(self, root):
+        self.root = root
+        key = hashlib.md5(os.path.normcase(os.path.normpath(root)).encode('utf-8', errors='surrogatepass')).hexdigest()
+        self.index_path = get_app_data_path(SEARCH_FILENAME_INDEX_DIR, key + '.tgm')
+        self._lock = threading.Lock()
+        self._file = None
+        self._mm = None
+        self._entries = None  # 相对路径 -> (size, mtime_ns, kind, key_offset, key_count)
+        self._readers = 0
+        self._pending_swap = False
+        self._update_thread = None
+
+    @staticmethod
+    def query_key_groups(matcher):
+        """把匹配器转换为 trigram 过滤条件：文件包含任一组的全部键即为候选。
+
+        返回有序键列表的列表；无法过滤（正则、过短的关键词）时返回 None。"""
+        if matcher.mode == ContentMatcher.MODE_REGEX:
+            return None
+        groups = [sorted(content_trigram_keys(k.casefold())) for k in matcher.keywords]
+        if matcher.require_all:
+            keys = set()
+            for group in groups:
+                keys.update(group)
+            return [sorted(keys)] if keys else None
+        if not all(groups):
+            return None
+        return groups
+
+    def _relpath(self, file_path):
+        return os.path.relpath(file_path, self.root)
+
+    # ---- 读取 ----
+    def _close_mapping(self):
+        if self._mm is not None:
+            try:
+                self._mm.close()
+            except Exception:
+                pass
+        if self._file is not None:
+            try:
+                self._file.close()
+            except Exception:
+                pass
+        self._mm = None
+        self._file = None
+        self._entries = None
+
+    def _open_mapping(self):
+        import mmap
+        self._close_mapping()
+        if not os.path.isfile(self.index_path) or os.path.getsize(self.index_path) <= len(self.MAGIC):
+            return False
+        f = open(self.index_path, 'rb')
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            f.close()
+            return False
+        try:
+            if mm[:len(self.MAGIC)] != self.MAGIC:
+                raise ValueError("bad magic")
+            pos = len(self.MAGIC)
+            (count,) = struct.unpack_from('<I', mm, pos)
+            pos += 4
+            entry_head = self._ENTRY_HEAD
+            entries = {}
+            for _ in range(count):
+                (rel_len,) = struct.unpack_from('<H', mm, pos)
+                pos += 2
+                rel_path = mm[pos:pos + rel_len].decode('utf-8', errors='surrogatepass')
+                pos += rel_len
+                size, mtime_ns, kind, key_count = entry_head.unpack_from(mm, pos)
+                pos += entry_head.size
+                entries[rel_path] = (size, mtime_ns, kind, pos, key_count)
+                pos += key_count * 4
+        except Exception as e:
+            debug_print(f"[ContentIndex] Invalid index {self.index_path}: {e}")
+            mm.close()
+            f.close()
+            return False
+        self._file = f
+        self._mm = mm
+        self._entries = entries
+        return True
+
+    def acquire(self):
+        """开始一次查询：映射索引（不存在时视为空索引）并持有读引用，结束后须调用 release()。"""
+        with self._lock:
+            if self._entries is None and not self._open_mapping():
+                self._entries = {}
+            self._readers += 1
+        touch_search_index_file(self.index_path)
+
+    def release(self):
+        with self._lock:
+            self._readers -= 1
+            if self._readers == 0 and self._pending_swap:
+                self._install_pending_locked()
+
+    def lookup(self, file_path, file_size, mtime_ns, key_groups):
+        """判断文件是否需要读取匹配（key_groups 见 query_key_groups）。
+
+        返回 'scan'（候选）、'skip'（缺少关键词 trigram，可排除）、'binary'（已知二进制）
+        或 None（无记录/已过期，需照常扫描并补录）。"""
+        entry = self._entries.get(self._relpath(file_path)) if self._entries else None
+        if entry is None or entry[0] != file_size or entry[1] != mtime_ns:
+            return None
+        kind = entry[2]
+        if kind == self.KIND_BINARY:
+            return 'binary'
+        if kind != self.KIND_TEXT or not key_groups:
+            return 'scan'
+        import bisect
+        offset, count = entry[3], entry[4]
+        if count == 0:
+            return 'skip'
+        with memoryview(self._mm)[offset:offset + count * 4] as raw_view, raw_view.cast('I') as file_keys:
+            for keys in key_groups:
+                for key in keys:
+                    i = bisect.bisect_left(file_keys, key)
+                    if i >= count or file_keys[i] != key:
+                        break
+                else:
+                    return 'scan'
+        return 'skip'
+
+    # ---- 增量更新 ----
+    def update(self, stale_tasks, is_cancelled=None):
+        """为新增/过期文件补录 trigram，并移除已不存在的文件，写入新索引后替换。"""
+        max_file_bytes = CONTENT_INDEX_MAX_FILE_BYTES
+        fresh = {}
+        batches = [stale_tasks[i:i + CONTENT_SEARCH_TASK_FILES] for i in range(0, len(stale_tasks), CONTENT_SEARCH_TASK_FILES)]
+        pool = None
+        if resolve_content_search_workers() > 1 and len(batches) > 1:
+            try:
+                pool = get_content_search_pool(resolve_content_search_workers())
+            except Exception as e:
+                debug_print(f"[ContentIndex] Pool unavailable, indexing inline: {e}")
+        if pool is not None:
+            futures = [pool.submit(_content_index_worker, batch, max_file_bytes) for batch in batches]
+            for future, batch in zip(futures, batches):
+                if is_cancelled is not None and is_cancelled():
+                    for f in futures:
+                        f.cancel()
+                    return False
+                try:
+                    rows = future.result()
+                except Exception as e:
+                    debug_print(f"[ContentIndex] Worker failed, indexing batch inline: {e}")
+                    rows = _content_index_worker(batch, max_file_bytes)
+                for row in rows:
+                    fresh[self._relpath(row[0])] = row[1:]
+        else:
+            for batch in batches:
+                if is_cancelled is not None and is_cancelled():
+                    return False
+                for row in _content_index_worker(batch, max_file_bytes):
+                    fresh[self._relpath(row[0])] = row[1:]
+
+        with self._lock:
+            if self._entries is None:
+                self._open_mapping()
+            old_mm = self._mm
+            old_entries = dict(self._entries or {})
+            self._readers += 1
+        tmp_path = self.index_path + '.tmp'
+        entry_head = self._ENTRY_HEAD
+        written = 0
+        dropped = 0
+        try:
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(self.MAGIC)
+                f.write(struct.pack('<I', 0))
+                for rel_path in sorted(set(old_entries) | set(fresh)):
+                    row = fresh.get(rel_path)
+                    if row is not None:
+                        size, mtime_ns, kind, data = row
+                        key_count = len(data) // 4
+                    else:
+                        # 沿用旧记录；文件已删除则丢弃
+                        if not os.path.isfile(os.path.join(self.root, rel_path)):
+                            dropped += 1
+                            continue
+                        size, mtime_ns, kind, offset, key_count = old_entries[rel_path]
+                        data = old_mm[offset:offset + key_count * 4]
+                    rel_bytes = rel_path.encode('utf-8', errors='surrogatepass')
+                    f.write(struct.pack('<H', len(rel_bytes)))
+                    f.write(rel_bytes)
+                    f.write(entry_head.pack(size, mtime_ns, kind, key_count))
+                    f.write(data)
+                    written += 1
+                f.seek(len(self.MAGIC))
+                f.write(struct.pack('<I', written))
+        except Exception as e:
+            debug_print(f"[ContentIndex] Write failed {tmp_path}: {e}")
+            return False
+        finally:
+            with self._lock:
+                self._readers -= 1
+        with self._lock:
+            self._pending_swap = True
+            if self._readers == 0:
+                self._install_pending_locked()
+        debug_print(f"[ContentIndex] Updated {self.root}: files={written} indexed={len(fresh)} dropped={dropped}")
+        return True
+
+    def _install_pending_locked(self):
+        # 与文件名索引相同：Windows 下需先解除映射再原子替换
+        self._pending_swap = False
+        self._close_mapping()
+        try:
+            os.replace(self.index_path + '.tmp', self.index_path)
+        except Exception as e:
+            debug_print(f"[ContentIndex] Replace failed {self.index_path}: {e}")
+        self._open_mapping()
+        prune_search_index_dir(self.index_path)
+
+    def update_async(self, stale_tasks):
+        """后台补录（同一索引同时只运行一个更新线程，正在更新时本次请求丢弃，下次搜索会再次发现过期项）。"""
+        if not stale_tasks:
+            return
+        with self._lock:
+            if self._update_thread is not None and self._update_thread.is_alive():
+                return
+            self._update_thread = threading.Thread(
+                target=self.update, args=(list(stale_tasks),), name='content-index', daemon=True
+            )
+            self._update_thread.start()
+
+
+_content_indexes = {}
+_content_indexes_lock = threading.Lock()
+
+
+def get_content_trigram_index(root):
+    """获取指定搜索根目录的内容 trigram 索引实例（同一根目录在进程内共享）。"""
+    key = os.path.normcase(os.path.normpath(root))
+    with _content_indexes_lock:
+        index = _content_indexes.get(key)
+        if index is None:
+            index = ContentTrigramIndex(root)
+            _content_indexes[key] = index
+        return index
+
+class SearchWatchScope:
+    """监视模式的搜索条件：按原搜索的关键词、类型过滤、排除目录、最大深度与忽略规则重新评估目录。
+
+    只做 I/O 与匹配，不触碰 Qt 对象，在后台线程调用。目录深度与 scandir_walk 一致（搜索根为 1）。"""
+
+    def __init__(self, root, keyword, search_filename, search_content, file_types="", match_case=False,
+                 match_whole_word=False, match_mode=ContentMatcher.MODE_LITERAL, exclude_dirs=(), max_depth=0,
+                 respect_gitignore=False):
+        self.root = root
+        self.keyword = keyword
+        self.search_filename = search_filename
+        self.search_content = search_content
+        self.file_extensions = parse_file_type_filter(file_types)
+        self.matcher = ContentMatcher(keyword, match_case=match_case, match_whole_word=match_whole_word, mode=match_mode)
+        self.max_depth = max_depth
+        self.respect_gitignore = respect_gitignore
+        self._is_excluded = make_dir_excluder(exclude_dirs)
+        self._ignore = None
+
+    def _ignore_filter(self):
+        """整个监视范围共用一个以搜索根为准的忽略过滤器：重扫子目录时沿用根目录及各级祖先的规则。"""
+        if self.respect_gitignore and self._ignore is None:
+            self._ignore = GitignoreFilter(self.root)
+        return self._ignore
+
+    @staticmethod
+    def watch_key(path):
+        return os.path.normcase(os.path.normpath(path))
+
+    def depth_of(self, dir_path):
+        rel = os.path.relpath(dir_path, self.root)
+        return 1 if rel == os.curdir else rel.count(os.sep) + 2
+
+    def walk(self, top, recursive=True):
+        """遍历 top（recursive=False 时只看其直接子项），产出 (目录, 结果行列表, 子目录路径列表)。
+
+        子目录只包含仍在搜索范围内的目录（未被排除/忽略、不是符号链接且未超过最大深度）。"""
+        depth = self.depth_of(top)
+        if self.max_depth and depth > self.max_depth:
+            return
+        levels = 1 if not recursive else (self.max_depth - depth + 1 if self.max_depth else 0)
+        ignore = self._ignore_filter()
+        ignore_state = None
+        if ignore is not None:
+            ignore_state = ignore.inherited_state(top)
+            if ignore_state is None:
+                return
+        scan_limits = current_content_scan_limits() if self.search_content else None
+        for root, dirs, files, entry_meta in scandir_walk(top, self._is_excluded, levels, ignore, ignore_state):
+            rows = self._evaluate(root, dirs, files, entry_meta, scan_limits)
+            subdirs = []
+            if not self.max_depth or self.depth_of(root) < self.max_depth:
+                for name in dirs:
+                    try:
+                        if entry_meta.entries[name].is_symlink():
+                            continue
+                    except OSError:
+                        continue
+                    subdirs.append(os.path.join(root, name))
+            yield root, rows, subdirs
+
+    def snapshot_dirs(self, limit):
+        """遍历搜索根，返回最多 limit + 1 个 (目录, 目录快照)，多出的一个用于判断是否截断。"""
+        ignore = self._ignore_filter()
+        found = []
+        for root, _dirs, _files, _entry_meta in scandir_walk(self.root, self._is_excluded, self.max_depth, ignore):
+            found.append((root, _compute_dir_snapshot(root)))
+            if len(found) > limit:
+                break
+        return found
+
+    def rescan(self, dirs, known):
+        """重新评估发生变化的目录。
+
+        dirs 为 [(目录, 上次快照), ...]，known 为 {规范化路径: 目录} 的已监视目录。快照未变的目录跳过；
+        新出现的子目录连同其子树一起评估。返回 (synced, gone)：synced 为 [(目录, 新快照, 结果行列表)]，
+        gone 为已删除或已移出搜索范围的目录。"""
+        synced = []
+        gone = []
+        children = {}
+        for key, path in known.items():
+            children.setdefault(os.path.dirname(key), []).append(path)
+        for path, old_snapshot in dirs:
+            snapshot = _compute_dir_snapshot(path)
+            if snapshot is None:
+                gone.append(path)
+                continue
+            if snapshot == old_snapshot:
+                continue
+            for root, rows, subdirs in self.walk(path, recursive=False):
+                synced.append((root, snapshot, rows))
+                current = {self.watch_key(subdir) for subdir in subdirs}
+                gone.extend(child for child in children.get(self.watch_key(root), ())
+                            if self.watch_key(child) not in current)
+                for subdir in subdirs:
+                    if self.watch_key(subdir) not in known:
+                        synced.extend((sub_root, _compute_dir_snapshot(sub_root), sub_rows)
+                                      for sub_root, sub_rows, _sub_subdirs in self.walk(subdir))
+        return synced, gone
+
+    def _evaluate(self, root, dirs, files, entry_meta, scan_limits):
+        matcher = self.matcher
+        rows = []
+        if self.search_filename and self.keyword:
+            for name in dirs:
+                if matcher.match_text(name):
+                    rows.append(self._result_item(os.path.join(root, name), name, True, entry_meta))
+        tasks = []
+        for name in files:
+            name_hit = self.search_filename and matcher.match_text(name)
+            if not name_hit and not self.search_content:
+                continue
+            file_ext = os.path.splitext(name)[1][1:].lower()
+            if self.file_extensions and file_ext not in self.file_extensions:
+                continue
+            file_path = os.path.join(root, name)
+            if name_hit:
+                rows.append(self._result_item(file_path, name, False, entry_meta))
+            elif file_ext not in SEARCH_BINARY_FILE_EXTENSIONS:
+                try:
+                    st = entry_meta.stat(name)
+                except OSError:
+                    continue
+                if st.st_size:
+                    tasks.append((file_path, st.st_size, file_ext, st.st_mtime_ns, None))
+        if tasks:
+            # 变化的目录通常只有少量文件：直接在当前线程扫描，不占用内容搜索进程池
+            for file_path, _encoding, locations in _content_search_worker(tasks, matcher, scan_limits)[0]:
+                item = self._result_item(file_path, os.path.basename(file_path), False, entry_meta)
+                rows.append(attach_hit_locations(item, locations))
+        return rows
+
+    @staticmethod
+    def _result_item(path, name, is_dir, entry_meta):
+        """构造与 do_search 相同格式的结果 dict（目录已枚举，直接带上大小/修改时间）。"""
+        try:
+            st = entry_meta.stat(name)
+            sort_date_ts = st.st_mtime
+            sort_size_bytes = None if is_dir else st.st_size
+        except OSError:
+            sort_date_ts = sort_size_bytes = None
+        date = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(sort_date_ts)) if sort_date_ts is not None else "-"
+        if is_dir:
+            return {
+                'path': path,
+                'name': f"📁 {name}",
+                'full_path': f"📁 {path}",
+                'file_type': tr('文件夹'),
+                'date': date,
+                'size': "-",
+                'sort_date_ts': sort_date_ts,
+                'sort_size_bytes': None,
+            }
+        path_without_ext, ext = os.path.splitext(path)
+        return {
+            'path': path,
+            'name': f"📄 {path_without_ext}",
+            'full_path': f"📄 {path}",
+            'file_type': ext[1:].upper() if ext else tr("无"),
+            'date': date,
+            'size': format_file_size(sort_size_bytes) if sort_size_bytes is not None else "-",
+            'sort_date_ts': sort_date_ts,
+            'sort_size_bytes': sort_size_bytes,
+        }
+
+
+# 搜索对话框
+class SearchDialog(QDialog):    
+    results_ready = pyqtSignal()  # 结果通道由空变为非空（可能来自搜索线程，跨线程排队投递）
+    preview_ready = pyqtSignal(object)  # 预览线程读取完成：(generation, path, hits, lines 或异常, matcher)
+    watch_ready = pyqtSignal(object)  # 监视线程评估完成：(generation, synced, gone, initial)
+
+    def __init__(self, search_path, parent=None, search_history=None):
+        super().__init__(parent)
+        self.setWindowTitle(tr("搜索 - {}").format(search_path))
+        # 设置为可调整大小，并显示最小化/最大化按钮
+        self.setWindowFlags(
+            Qt.Dialog
+            | Qt.WindowTitleHint
+            | Qt.WindowCloseButtonHint
+            | Qt.WindowMinimizeButtonHint
+            | Qt.WindowMaximizeButtonHint
+            | Qt.WindowSystemMenuHint
+        )
+        # 关闭时立即销毁 C++ 对象（释放所有 Qt 子控件占用的内存）
+        self.setAttribute(Qt.WA_DeleteOnClose)
+        self.resize(800, 500)  # 初始大小，但允许调整
+        self.search_path = search_path
+        self.main_window = parent
+        self.search_thread = None
+        self.is_searching = False
+        self.search_history = search_history or []  # 搜索历史列表
+        
+        # 检测Everything
+        self.everything_path = detect_everything()
+        self.search_backend = create_everything_backend(self.everything_path)
+        self.notepad_plus_plus_path = detect_notepad_plus_plus()
+        debug_print(f"[Search] Everything detected: {self.everything_path}, backend: {self.search_backend.describe() if self.search_backend else None}")
+        
+        # 线程安全的结果通道（限制大小防止内存溢出；有新结果时发信号唤醒UI，空闲时不轮询）
+        self.result_queue = SearchResultChannel(SEARCH_RESULT_QUEUE_MAXSIZE, wakeup=self.results_ready.emit)
+        self.ui_update_timer = None
+        self.queue_overflow_count = 0  # 队列溢出计数
+        
+        # 结果限制配置（使用虚拟滚动优化，支持更多结果）
+        self.max_results = 1000000  # 最多显示100万个结果（虚拟滚动优化）
+        self.current_result_count = 0
+        self.batch_insert_size = 500  # 批量插入大小
+        
+        layout = QVBoxLayout(self)
+        
+        # 搜索选项区域
+        search_options = QHBoxLayout()
+        search_options.setSpacing(5)  # 设置控件间距为5像素
+        
+        # 搜索关键词（改为QComboBox支持历史记录）
+        search_label = QLabel(tr("搜索:"))
+        search_label.setFixedWidth(40)  # 固定标签宽度
+        search_options.addWidget(search_label)
+        from PyQt5.QtWidgets import QComboBox
+        self.search_input = QComboBox()
+        self.search_input.setEditable(True)
+        self.search_input.setInsertPolicy(QComboBox.NoInsert)  # 不自动插入新条目
+        self.search_input.setMinimumWidth(300)  # 设置最小宽度300像素
         self.search_input.lineEdit().setPlaceholderText(tr("输入搜索关键词..."))
         self.search_input.lineEdit().returnPressed.connect(self.start_search)
         # 填充历史记录
@@ -1389,12 +5037,25 @@ class SearchDialog(QDialog):
         self.match_whole_word_cb = QCheckBox(tr("全词匹配"))
         self.match_whole_word_cb.setToolTip(tr("仅匹配完整单词，避免命中更长字符串的一部分"))
         type_options.addWidget(self.match_whole_word_cb)
+
+        # 匹配模式：单关键词 / 多关键词(OR/AND) / 正则表达式
+        self.match_mode_combo = QComboBox()
+        self.match_mode_combo.addItem(tr("单个关键词"), ContentMatcher.MODE_LITERAL)
+        self.match_mode_combo.addItem(tr("任一关键词(OR)"), ContentMatcher.MODE_ANY)
+        self.match_mode_combo.addItem(tr("全部关键词(AND)"), ContentMatcher.MODE_ALL)
+        self.match_mode_combo.addItem(tr("正则表达式"), ContentMatcher.MODE_REGEX)
+        self.match_mode_combo.setToolTip(tr("多关键词用空格、逗号或分号分隔，含空格的短语请加英文双引号"))
+        type_options.addWidget(self.match_mode_combo)
+
+        self.use_content_index_cb = QCheckBox(tr("使用内容索引"))
+        self.use_content_index_cb.setToolTip(tr("为该目录建立内容 trigram 索引，重复搜索时只读取可能包含关键词的文件\n新增或修改的文件会在搜索后自动补录"))
+        type_options.addWidget(self.use_content_index_cb)
         
         # Everything搜索选项
         self.use_everything_cb = QCheckBox(tr("使用 Everything (极速)"))
-        if self.everything_path:
+        if self.search_backend is not None:
             self.use_everything_cb.setChecked(True)  # 如果有Everything，默认启用
-            self.use_everything_cb.setToolTip(tr("使用Everything搜索引擎\n路径: {}\n只搜索文件名，速度极快").format(self.everything_path))
+            self.use_everything_cb.setToolTip(tr("使用Everything搜索引擎\n路径: {}\n只搜索文件名，速度极快").format(self.search_backend.describe()))
         else:
             self.use_everything_cb.setEnabled(False)
             self.use_everything_cb.setToolTip(tr("未检测到Everything，请从 https://www.voidtools.com/ 下载安装"))
@@ -1419,10 +5080,49 @@ class SearchDialog(QDialog):
         self.file_type_input.setStyleSheet("QLineEdit { padding: 5px; }")
         file_type_layout.addWidget(self.file_type_input)
         layout.addLayout(file_type_layout)
+
+        # 排除目录与最大深度
+        from PyQt5.QtWidgets import QSpinBox
+        exclude_layout = QHBoxLayout()
+        exclude_layout.addWidget(QLabel(tr("排除目录:")))
+        self.exclude_dirs_input = QLineEdit()
+        self.exclude_dirs_input.setPlaceholderText(tr("例如: .git,node_modules,build* (逗号分隔，支持通配符，留空表示不排除)"))
+        self.exclude_dirs_input.setText(",".join(SEARCH_EXCLUDE_DIR_PATTERNS))
+        self.exclude_dirs_input.setStyleSheet("QLineEdit { padding: 5px; }")
+        exclude_layout.addWidget(self.exclude_dirs_input)
+        exclude_layout.addWidget(QLabel(tr("最大深度:")))
+        self.max_depth_spin = QSpinBox()
+        self.max_depth_spin.setRange(0, 1000)
+        self.max_depth_spin.setSpecialValueText(tr("不限"))
+        self.max_depth_spin.setValue(SEARCH_MAX_DEPTH)
+        self.max_depth_spin.setToolTip(tr("1 表示只搜索当前文件夹本身，0 表示不限制"))
+        exclude_layout.addWidget(self.max_depth_spin)
+        self.respect_gitignore_cb = QCheckBox(tr("遵循 .gitignore"))
+        self.respect_gitignore_cb.setToolTip(tr("跳过 .gitignore / .ignore 中忽略的目录和文件（如 build、out 等构建输出）"))
+        self.respect_gitignore_cb.setChecked(SEARCH_RESPECT_GITIGNORE)
+        exclude_layout.addWidget(self.respect_gitignore_cb)
+        self.watch_cb = QCheckBox(tr("监视变化"))
+        self.watch_cb.setToolTip(tr("搜索完成后监视搜索路径下的目录，文件增删改时只重新评估变化的目录并增量更新结果"))
+        self.watch_cb.toggled.connect(self.on_watch_toggled)
+        exclude_layout.addWidget(self.watch_cb)
+        layout.addLayout(exclude_layout)
         
         # 状态标签
         self.status_label = QLabel(tr("就绪"))
         layout.addWidget(self.status_label)
+
+        # 结果快速筛选：只在已有结果中按路径过滤，不重新搜索
+        from PyQt5.QtCore import QTimer
+        self.result_filter_input = QLineEdit()
+        self.result_filter_input.setPlaceholderText(tr("筛选结果（路径包含的文字）..."))
+        self.result_filter_input.setClearButtonEnabled(True)
+        self.result_filter_input.setStyleSheet("QLineEdit { padding: 3px; }")
+        self._result_filter_timer = QTimer(self)
+        self._result_filter_timer.setSingleShot(True)
+        self._result_filter_timer.setInterval(200)  # 输入防抖
+        self._result_filter_timer.timeout.connect(self.apply_result_filter)
+        self.result_filter_input.textChanged.connect(lambda _text: self._result_filter_timer.start())
+        layout.addWidget(self.result_filter_input)
         
         # 结果表格
         self.result_model = SearchResultsTableModel(self)
@@ -1460,13 +5160,271 @@ class SearchDialog(QDialog):
                 font-weight: bold;
             }
         """)
-        layout.addWidget(self.result_list)
+
+        # 匹配上下文预览：选中内容命中的结果时，后台只读取命中行附近的几行
+        from PyQt5.QtWidgets import QSplitter, QTextEdit
+        self.preview_text = QTextEdit()
+        self.preview_text.setReadOnly(True)
+        self.preview_text.setLineWrapMode(QTextEdit.NoWrap)
+        self.preview_text.setPlaceholderText(tr("选中内容命中的结果后，在此预览匹配行"))
+        self._preview_reader = SearchPreviewReader()
+        self._preview_generation = 0
+        self.preview_matcher = None
+        self.preview_ready.connect(self._show_preview)
+        self._preview_timer = QTimer(self)
+        self._preview_timer.setSingleShot(True)
+        self._preview_timer.setInterval(80)  # 方向键快速移动时防抖
+        self._preview_timer.timeout.connect(self._load_preview)
+        self.result_list.selectionModel().currentRowChanged.connect(lambda *_args: self._preview_timer.start())
+        self.result_model.modelReset.connect(self._clear_preview)
+        results_splitter = QSplitter(Qt.Vertical)
+        results_splitter.addWidget(self.result_list)
+        results_splitter.addWidget(self.preview_text)
+        results_splitter.setStretchFactor(0, 3)
+        results_splitter.setStretchFactor(1, 1)
+        layout.addWidget(results_splitter)
         
         # 启动UI更新定时器
         from PyQt5.QtCore import QTimer
         self.ui_update_timer = QTimer(self)
+        self.ui_update_timer.setInterval(20)
         self.ui_update_timer.timeout.connect(self.update_ui_from_queue)
-        self.ui_update_timer.start(80)  # 搜索时动态提速，空闲时降频
+        # 定时器只在通道有数据时运行：由空变为非空时的信号启动，消费完即停
+        self.results_ready.connect(self._on_results_ready)
+
+        # 可见行元数据补齐：滚动、追加、排序、筛选后防抖请求
+        self._metadata_timer = QTimer(self)
+        self._metadata_timer.setSingleShot(True)
+        self._metadata_timer.setInterval(60)
+        self._metadata_timer.timeout.connect(self._request_visible_metadata)
+        for signal in (self.result_list.verticalScrollBar().valueChanged, self.result_model.layoutChanged,
+                       self.result_model.modelReset, self.result_model.rowsInserted, self.result_model.rowsRemoved):
+            signal.connect(self._schedule_visible_metadata)
+
+        # 监视模式：搜索完成后订阅各目录的变化，防抖后只重新评估变化的目录并增量增删结果行
+        self.dir_watcher = None  # 首次开启监视时创建的 QFileSystemWatcher
+        self._pending_scope = None  # 正在进行的搜索条件，完整完成后才可用于监视
+        self._search_scope = None  # 最近一次完整完成的搜索条件（SearchWatchScope）
+        self._watch_scope = None
+        self._watch_generation = 0
+        self._watched_dirs = {}  # 规范化路径 -> (目录, 上次快照)
+        self._watch_pending = set()
+        self._watch_busy = False
+        self.watch_ready.connect(self._apply_watch_changes)
+        self._watch_timer = QTimer(self)
+        self._watch_timer.setSingleShot(True)
+        self._watch_timer.setInterval(SEARCH_WATCH_DEBOUNCE_MS)
+        self._watch_timer.timeout.connect(self._flush_watch_changes)
+        self._watch_poll_timer = QTimer(self)
+        self._watch_poll_timer.setInterval(max(1000, SEARCH_WATCH_POLL_MS))
+        self._watch_poll_timer.timeout.connect(self._poll_watched_dirs)
+
+    def _schedule_visible_metadata(self, *_args):
+        # 节流而非防抖：搜索期间持续追加结果时也能按固定间隔补齐
+        if not self._metadata_timer.isActive():
+            self._metadata_timer.start()
+
+    def _request_visible_metadata(self):
+        count = self.result_model.rowCount()
+        if count == 0:
+            return
+        first = self.result_list.rowAt(0)
+        last = self.result_list.rowAt(self.result_list.viewport().height() - 1)
+        if first < 0:
+            first = 0
+        if last < 0:
+            last = count - 1
+        self.result_model.request_metadata(first, last + SEARCH_METADATA_PREFETCH_ROWS)
+
+    def _on_results_ready(self):
+        self._ensure_ui_update_timer()
+
+    # ---- 匹配上下文预览 ----
+    def _clear_preview(self):
+        self._preview_generation += 1
+        self.preview_text.clear()
+
+    def _load_preview(self):
+        index = self.result_list.currentIndex()
+        info = self.result_model.hits_for_row(index.row()) if index.isValid() else None
+        if info is None:
+            self._clear_preview()
+            return
+        self._preview_generation += 1
+        generation = self._preview_generation
+        path, encoding, hits = info
+        matcher = self.preview_matcher
+        context_lines = SEARCH_PREVIEW_CONTEXT_LINES
+        reader = self._preview_reader
+
+        def _worker():
+            try:
+                lines = reader.read_context(path, encoding, hits, context_lines)
+            except Exception as e:
+                lines = e
+            self.preview_ready.emit((generation, path, hits, lines, matcher))
+
+        threading.Thread(target=_worker, name="SearchPreview", daemon=True).start()
+
+    def _show_preview(self, payload):
+        import html
+        generation, path, hits, lines, matcher = payload
+        if generation != self._preview_generation:
+            return
+        title = tr("{} — {} 处匹配").format(path, len(hits))
+        if isinstance(lines, Exception):
+            self.preview_text.setHtml(
+                f"<b>{html.escape(title)}</b><br>{html.escape(tr('无法读取文件: {}').format(lines))}")
+            return
+        width = len(str(lines[-1][0])) if lines else 1
+        rows = []
+        previous = None
+        for number, text, is_hit in lines:
+            if previous is not None and number != previous + 1:
+                rows.append('<span style="color:#999;">' + ' ' * width + ' ⋯</span>')
+            previous = number
+            if is_hit and matcher is not None:
+                parts = []
+                cursor = 0
+                for start, end in matcher.iter_spans(text):
+                    if end <= start:
+                        continue
+                    parts.append(html.escape(text[cursor:start]))
+                    parts.append(f'<span style="background:#FFD54F;">{html.escape(text[start:end])}</span>')
+                    cursor = end
+                parts.append(html.escape(text[cursor:]))
+                body = ''.join(parts)
+            else:
+                body = html.escape(text)
+            gutter = f'<span style="color:#888;">{str(number).rjust(width)} │ </span>'
+            if is_hit:
+                body = f'<span style="background:#FFF8E1;">{body}</span>'
+            rows.append(gutter + body)
+        self.preview_text.setHtml(
+            f"<b>{html.escape(title)}</b>"
+            f"<pre style=\"font-family:Consolas,'Courier New',monospace;\">{'<br>'.join(rows)}</pre>")
+
+    # ---- 监视模式 ----
+    def on_watch_toggled(self, checked):
+        if not checked:
+            self._stop_watch()
+        elif self._search_scope is not None and not self.is_searching:
+            self._start_watch()
+
+    def _start_watch(self):
+        self._stop_watch()
+        if self.dir_watcher is None:
+            from PyQt5.QtCore import QFileSystemWatcher
+            self.dir_watcher = QFileSystemWatcher(self)
+            self.dir_watcher.directoryChanged.connect(self._on_watched_dir_changed)
+        self._watch_scope = self._search_scope
+        self._run_watch_worker(None, initial=True)
+        if SEARCH_WATCH_POLL_MS > 0:
+            self._watch_poll_timer.start()
+
+    def _stop_watch(self):
+        self._watch_generation += 1
+        self._watch_scope = None
+        self._watch_busy = False
+        self._watch_pending.clear()
+        self._watch_timer.stop()
+        self._watch_poll_timer.stop()
+        if self.dir_watcher is not None and self._watched_dirs:
+            self.dir_watcher.removePaths([path for path, _snapshot in self._watched_dirs.values()])
+        self._watched_dirs.clear()
+
+    def _run_watch_worker(self, dirs, initial=False):
+        self._watch_busy = True
+        generation = self._watch_generation
+        scope = self._watch_scope
+        known = {key: path for key, (path, _snapshot) in self._watched_dirs.items()}
+        limit = SEARCH_WATCH_MAX_DIRS
+
+        def _worker():
+            try:
+                if initial:
+                    synced = [(path, snapshot, None) for path, snapshot in scope.snapshot_dirs(limit)]
+                    gone = []
+                else:
+                    synced, gone = scope.rescan(dirs, known)
+            except Exception as e:
+                debug_print(f"[Search] Watch rescan failed: {e}")
+                synced, gone = [], []
+            try:
+                self.watch_ready.emit((generation, synced, gone, initial))
+            except RuntimeError:
+                pass  # 对话框已关闭
+
+        threading.Thread(target=_worker, name="SearchWatch", daemon=True).start()
+
+    def _on_watched_dir_changed(self, path):
+        if self._watch_scope is None:
+            return
+        self._watch_pending.add(path)
+        self._watch_timer.start()  # 重新计时：合并连续事件
+
+    def _flush_watch_changes(self):
+        if self._watch_scope is None or self._watch_busy or not self._watch_pending:
+            return
+        dirs = []
+        for path in self._watch_pending:
+            entry = self._watched_dirs.get(SearchWatchScope.watch_key(path))
+            if entry is not None:
+                dirs.append(entry)
+        self._watch_pending.clear()
+        if dirs:
+            self._run_watch_worker(dirs)
+
+    def _poll_watched_dirs(self):
+        # 兜底：部分平台修改文件内容不触发目录事件，后台比较全部已监视目录的快照
+        if self._watch_scope is None or self._watch_busy or not self._watched_dirs:
+            return
+        self._run_watch_worker(list(self._watched_dirs.values()))
+
+    def _unwatch_tree(self, path):
+        key = SearchWatchScope.watch_key(path)
+        prefix = os.path.join(key, '')
+        doomed = [k for k in self._watched_dirs if k == key or k.startswith(prefix)]
+        if doomed:
+            self.dir_watcher.removePaths([self._watched_dirs.pop(k)[0] for k in doomed])
+
+    def _apply_watch_changes(self, payload):
+        generation, synced, gone, initial = payload
+        if generation != self._watch_generation:
+            return
+        self._watch_busy = False
+        added = removed = 0
+        for path in gone:
+            removed += self.result_model.remove_under(path)
+            self._unwatch_tree(path)
+        new_paths = []
+        skipped = 0
+        for path, snapshot, rows in synced:
+            if rows is not None:
+                limit = self.max_results - self.result_model.total_count()
+                row_added, row_removed = self.result_model.sync_directory(path, rows, limit)
+                added += row_added
+                removed += row_removed
+            key = SearchWatchScope.watch_key(path)
+            if key not in self._watched_dirs:
+                if len(self._watched_dirs) >= SEARCH_WATCH_MAX_DIRS:
+                    skipped += 1
+                    continue
+                new_paths.append(path)
+            self._watched_dirs[key] = (path, snapshot)
+        if new_paths:
+            self.dir_watcher.addPaths(new_paths)
+        self.current_result_count = self.result_model.total_count()
+        if initial:
+            text = self.status_label.text() + tr("；正在监视 {} 个目录的变化").format(len(self._watched_dirs))
+            if skipped:
+                text += tr("（目录过多，另有 {} 个未监视）").format(skipped)
+            self.status_label.setText(text)
+        elif added or removed:
+            self.status_label.setText(tr("监视: 新增 {} 个，移除 {} 个结果，当前共 {} 个结果").format(
+                added, removed, self.current_result_count))
+        if self._watch_pending:
+            self._watch_timer.start()
 
     def _drain_result_queue(self):
         if not self.result_queue:
@@ -1479,8 +5437,11 @@ class SearchDialog(QDialog):
 
     def _release_search_resources(self):
         self.is_searching = False
+        if hasattr(self, '_watch_timer'):
+            self._stop_watch()
+        if self.search_backend is not None:
+            self.search_backend.cancel()
         self.queue_overflow_count = 0
-        self._queue_idle_ticks = 0
 
         if self.ui_update_timer:
             self.ui_update_timer.stop()
@@ -1495,6 +5456,9 @@ class SearchDialog(QDialog):
 
         if hasattr(self, 'result_model') and self.result_model:
             self.result_model.clear()
+            self.result_model.close()
+        if hasattr(self, '_preview_reader'):
+            self._preview_reader.clear()
         self.current_result_count = 0
         self.search_thread = None
 
@@ -1519,19 +5483,15 @@ class SearchDialog(QDialog):
             except Exception:
                 pending = 0
 
-            # 自适应轮询：有积压时提速，空闲时降频，减少空转开销
-            target_interval = 80
-            if self.is_searching:
-                if pending > 600:
-                    target_interval = 20
-                elif pending > 120:
-                    target_interval = 35
-                else:
-                    target_interval = 60
-            else:
-                target_interval = 220 if pending == 0 else 80
+            # 自适应消费节奏：积压多时提速；通道清空后定时器停止，等待下一次唤醒信号
+            target_interval = 60
+            if pending > 600:
+                target_interval = 20
+            elif pending > 120:
+                target_interval = 35
             if self.ui_update_timer.interval() != target_interval:
                 self.ui_update_timer.setInterval(target_interval)
+            self.result_queue.rearm()
 
             # 批量处理结果（一次处理最多200个，加快队列消费）
             batch_results = []
@@ -1568,19 +5528,23 @@ class SearchDialog(QDialog):
                     elif item['type'] == 'enable_sorting':
                         # 搜索完成后启用排序
                         self.result_list.setSortingEnabled(True)
+                        if self._pending_scope is not None:
+                            # 完整完成（未被停止）的搜索才能作为监视的基准结果
+                            self._search_scope, self._pending_scope = self._pending_scope, None
+                            if self.watch_cb.isChecked():
+                                self._start_watch()
                 except Exception:
                     break  # 队列为空
             
             # 批量添加结果到表格（性能优化）
             if batch_results:
+                apply_start = time.perf_counter()
                 self._append_results_to_table(batch_results)
-                self._queue_idle_ticks = 0
-            elif not self.is_searching:
-                self._queue_idle_ticks += 1
-                if self._queue_idle_ticks > 3 and pending == 0 and self.ui_update_timer.isActive():
-                    self.ui_update_timer.stop()
-                elif self._queue_idle_ticks > 1 and self.ui_update_timer.interval() != 250:
-                    self.ui_update_timer.setInterval(250)
+                self.result_queue.record_apply(time.perf_counter() - apply_start, len(batch_results))
+            if self.result_queue.empty() and self.ui_update_timer.isActive():
+                self.ui_update_timer.stop()
+            if not self.is_searching:
+                self.status_label.setToolTip(self.result_queue.stats_text())
                 
         except Exception as e:
             debug_print(f"[Search] UI update error: {e}")
@@ -1602,6 +5566,14 @@ class SearchDialog(QDialog):
         self.current_result_count += added_count
         self.result_list.setUpdatesEnabled(True)
     
+    def apply_result_filter(self):
+        """把快速筛选框的文字应用到结果模型（不重新搜索，不复制结果）。"""
+        text = self.result_filter_input.text()
+        self.result_model.set_filter_text(text)
+        if text.strip() and not self.is_searching:
+            self.status_label.setText(tr("筛选显示 {} / {} 个结果").format(
+                self.result_model.rowCount(), self.result_model.total_count()))
+
     def add_search_result(self, item):
         """添加单条搜索结果（通过队列，线程安全）。"""
         self.result_queue.put({'type': 'result', **item})
@@ -1622,6 +5594,112 @@ class SearchDialog(QDialog):
             # 禁用Everything时，恢复文件内容搜索选项
             self.search_content_cb.setEnabled(True)
     
+    def _replay_cached_results(self, cache_key):
+        """在搜索线程中查找可复用的缓存结果（内存 LRU → 持久化缓存），校验指纹后直接回放。
+
+        返回 True 表示已用缓存结果完成本次搜索。"""
+        source = tr("缓存")
+        entry = _search_cache.get(cache_key)
+        if entry is None and SEARCH_RESULT_CACHE_PERSISTENT:
+            entry = get_persistent_search_cache().get(cache_key)
+            source = tr("持久化缓存")
+            if entry is not None and entry[1].get('check_files'):
+                # 旧版本写入的内容搜索结果：无法发现原地修改带来的命中变化，不再复用
+                get_persistent_search_cache().discard(cache_key)
+                entry = None
+        if entry is None:
+            return False
+        results, fingerprint = entry
+        if fingerprint.get('limited') and len(results) < self.max_results:
+            return False
+        if not search_fingerprint_is_fresh(fingerprint, results):
+            debug_print(f"[Search] Cached results are stale: {cache_key}")
+            _search_cache.discard(cache_key)
+            if SEARCH_RESULT_CACHE_PERSISTENT:
+                get_persistent_search_cache().discard(cache_key)
+            return False
+        if len(results) <= MAX_CACHED_RESULTS_PER_QUERY:
+            _search_cache.put(cache_key, entry)
+
+        debug_print(f"[Search] 使用缓存结果，共 {len(results)} 个")
+        self._emit_cached_results(results, source)
+        return True
+
+    def _emit_cached_results(self, results, source):
+        """把缓存/筛选得到的结果集分批送入结果队列并发送完成状态。"""
+        shown = results[:self.max_results]
+        for start in range(0, len(shown), SEARCH_RESULT_BATCH_MAX):
+            if not self.is_searching:
+                return
+            try:
+                self.add_search_results_batch(shown[start:start + SEARCH_RESULT_BATCH_MAX], timeout=1)
+            except Exception:
+                self.queue_overflow_count += len(shown[start:start + SEARCH_RESULT_BATCH_MAX])
+        self.is_searching = False
+        try:
+            self.result_queue.put({'type': 'status', 'text': tr("搜索完成（{}），共显示 {} 个结果").format(source, len(shown))}, timeout=1)
+            self.result_queue.put({'type': 'button', 'button': 'search', 'enabled': True}, timeout=1)
+            self.result_queue.put({'type': 'button', 'button': 'stop', 'enabled': False}, timeout=1)
+            self.result_queue.put({'type': 'enable_sorting'}, timeout=1)
+        except Exception:
+            debug_print(tr('[Search] ⚠️ 队列满，最终状态更新失败'))
+
+    def _refine_cached_results(self, cache_key, query, matcher):
+        """新关键词是某次已缓存完整搜索关键词的扩展时，只在旧结果集里筛选，不再遍历目录。
+
+        文件名命中直接在内存中比对；内容搜索只重新扫描旧结果中的文件。
+        返回 True 表示已用筛选结果完成本次搜索。"""
+        found = _search_cache.find_refinable(query)
+        if found is None:
+            return False
+        parent_key, (parent_results, parent_fingerprint) = found
+        if not search_fingerprint_is_fresh(parent_fingerprint, parent_results):
+            _search_cache.discard(parent_key)
+            return False
+        debug_print(f"[Search] Refining {len(parent_results)} cached results of \"{parent_fingerprint['query']['keyword']}\"")
+
+        results = []
+        content_items = {}
+        for item in parent_results:
+            if not self.is_searching:
+                return True
+            path = item['path']
+            if query['filename'] and matcher.match_text(os.path.basename(path)):
+                results.append(item)
+            elif query['content'] and not item.get('full_path', '').startswith('📁'):
+                content_items[path] = item
+        if content_items:
+            # 内容复核交给进程池；命中顺序与完整搜索一样按完成先后
+            scanner = ParallelContentScanner(matcher, is_cancelled=lambda: not self.is_searching)
+            try:
+                for path, item in content_items.items():
+                    ext = os.path.splitext(path)[1][1:].lower()
+                    if scanner.is_known_binary(ext):
+                        continue
+                    size = item.get('sort_size_bytes')
+                    if size is None:  # 仅文件名命中的结果未取元数据
+                        try:
+                            size = os.path.getsize(path)
+                        except OSError:
+                            continue
+                    for hit_path, _encoding, locations in scanner.submit(path, size, ext):
+                        results.append(attach_hit_locations(dict(content_items[hit_path]), locations))
+                for hits in scanner.finish():
+                    results.extend(attach_hit_locations(dict(content_items[hit_path]), locations)
+                                   for hit_path, _encoding, locations in hits)
+            finally:
+                scanner.cancel()
+        if not self.is_searching:
+            return True
+
+        fingerprint = dict(parent_fingerprint)
+        fingerprint['query'] = query
+        fingerprint['limited'] = len(results) > self.max_results
+        if len(results) <= MAX_CACHED_RESULTS_PER_QUERY:
+            _search_cache.put(cache_key, (results, fingerprint))
+        self._emit_cached_results(results, tr("在上次结果中筛选"))
+        return True
+
     def clear_search_cache(self):
         """清除所有搜索缓存（内部使用，软件关闭时自动调用）"""
         global _search_cache
@@ -1680,6 +5758,16 @@ class SearchDialog(QDialog):
         # 获取文件类型过滤
         file_types = self.file_type_input.text().strip()
         
+        exclude_dirs = parse_dir_exclude_patterns(self.exclude_dirs_input.text())
+        max_depth = self.max_depth_spin.value()
+        respect_gitignore = self.respect_gitignore_cb.isChecked()
+
+        match_mode = self.match_mode_combo.currentData() or ContentMatcher.MODE_LITERAL
+        regex_error = ContentMatcher.validate(keyword, match_mode)
+        if regex_error:
+            show_toast(self, tr("提示"), tr("正则表达式无效: {}").format(regex_error), level="warning")
+            return
+        
         # 检查缓存
         global _search_cache
         force_metadata_degrade = self.force_lightweight_cb.isChecked()
@@ -1691,31 +5779,22 @@ class SearchDialog(QDialog):
             force_metadata_degrade,
             self.match_case_cb.isChecked(),
             self.match_whole_word_cb.isChecked(),
+            match_mode,
+            exclude_dirs,
+            max_depth,
+            respect_gitignore,
         )
-        cached_results = _search_cache.get(cache_key)
-        
-        if cached_results is not None:
-            # 使用缓存结果
-            debug_print(f"[Search] 使用缓存结果，共 {len(cached_results)} 个")
-            self.result_model.clear()
-            self.current_result_count = 0
-            self.status_label.setText(tr("正在加载缓存结果..."))
-            
-            # 批量添加缓存结果
-            sorting_enabled = self.result_list.isSortingEnabled()
-            self.result_list.setSortingEnabled(False)
-
-            self._append_results_to_table(cached_results)
-            
-            self.result_list.setSortingEnabled(sorting_enabled)
-            shown_count = min(len(cached_results), self.max_results)
-            self.status_label.setText(tr("搜索完成（缓存），共显示 {} 个结果").format(shown_count))
-            if self.ui_update_timer and self.ui_update_timer.isActive():
-                self.ui_update_timer.stop()
-            return
-        
-        # 清空之前的结果
+        self._stop_watch()
+        self._search_scope = None
+        self._pending_scope = SearchWatchScope(
+            search_path, keyword, do_search_filename, do_search_content, file_types,
+            self.match_case_cb.isChecked(), self.match_whole_word_cb.isChecked(), match_mode,
+            exclude_dirs, max_depth, respect_gitignore,
+        )
+        # 清空之前的结果（快速筛选随之复位，新结果不再沿用旧的筛选文字）
         self.result_model.clear()
+        self.result_filter_input.clear()
+        self._preview_reader.clear()
         self.current_result_count = 0  # 重置计数器
         
         # 搜索期间完全禁用排序（性能优化）
@@ -1729,133 +5808,43 @@ class SearchDialog(QDialog):
             self.status_label.setText(tr("列举文件中{}... (最多显示{}个结果)").format(file_types_hint, self.max_results))
         else:
             self.status_label.setText(tr("搜索中... (最多显示{}个结果)").format(self.max_results))
+        self.result_queue.reset_stats()
         if self.ui_update_timer:
-            self._queue_idle_ticks = 0
             self._ensure_ui_update_timer(20)
         
         # 在后台线程执行搜索
         import threading
-        use_everything = self.use_everything_cb.isChecked() if self.everything_path else False
+        use_everything = self.use_everything_cb.isChecked() if self.search_backend is not None else False
         match_case = self.match_case_cb.isChecked()
         match_whole_word = self.match_whole_word_cb.isChecked()
+        use_content_index = self.use_content_index_cb.isChecked()
         self.search_thread = threading.Thread(
             target=self.do_search,
-            args=(keyword, do_search_filename, do_search_content, file_types, cache_key, use_everything, force_metadata_degrade, match_case, match_whole_word)
+            args=(keyword, do_search_filename, do_search_content, file_types, cache_key, use_everything, force_metadata_degrade, match_case, match_whole_word, use_content_index, match_mode, exclude_dirs, max_depth, respect_gitignore)
         )
         self.search_thread.daemon = True
         self.search_thread.start()
     
     def stop_search(self):
         self.is_searching = False
+        self._pending_scope = None  # 中途停止的结果不完整，不作为监视基准
+        if self.search_backend is not None:
+            self.search_backend.cancel()
         self.search_btn.setEnabled(True)
         self.stop_btn.setEnabled(False)
         self.status_label.setText(tr("已停止"))
         if self.ui_update_timer:
-            self._queue_idle_ticks = 0
-            self._ensure_ui_update_timer(220)
-    
-    def search_with_everything(self, keyword, search_path, file_types="", match_case=False, match_whole_word=False):
-        """使用Everything进行搜索"""
-        import subprocess
-        import re
-
-        def _matches_filename(name):
-            if match_whole_word:
-                flags = 0 if match_case else re.IGNORECASE
-                return bool(re.search(rf'\b{re.escape(keyword)}\b', name, flags))
-            if match_case:
-                return keyword in name
-            return keyword.lower() in name.lower()
-        
-        try:
-            # 构建Everything命令
-            cmd = [self.everything_path]
-            
-            # 如果指定了搜索路径，添加路径过滤
-            if search_path and os.path.exists(search_path):
-                # Everything使用path:语法指定路径
-                search_pattern = f'path:"{search_path}" {keyword}'
-            else:
-                search_pattern = keyword
-            
-            # 添加文件类型过滤
-            if file_types:
-                extensions = []
-                for ft in file_types.split(','):
-                    ft = ft.strip()
-                    if ft.startswith('*.'):
-                        ft = ft[2:]  # 移除 *.
-                    extensions.append(f'ext:{ft}')
-                if extensions:
-                    search_pattern += ' ' + ' | '.join(extensions)
-            
-            cmd.append(search_pattern)
-            
-            # 执行Everything搜索
-            if _DEBUG_MODE:
-                debug_print(f"[Everything] Executing: {' '.join(cmd)}")
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                encoding='utf-8',
-                errors='ignore',
-                timeout=30
-            )
-            
-            if result.returncode == 0:
-                # 解析结果（每行一个文件路径）
-                lines = result.stdout.strip().split('\n')
-                results = []
-                for line in lines:
-                    line = line.strip()
-                    # es.exe 输出本身来自索引，避免逐条 exists 造成大量额外 I/O
-                    if line and _matches_filename(os.path.basename(line)):
-                        results.append(line)
-                
-                debug_print(f"[Everything] Found {len(results)} results")
-                return results
-            else:
-                debug_print(f"[Everything] Error: {result.stderr}")
-                return []
-        
-        except subprocess.TimeoutExpired:
-            debug_print("[Everything] Search timeout")
-            return []
-        except Exception as e:
-            debug_print(f"[Everything] Error: {e}")
-            return []
+            self._ensure_ui_update_timer()
     
-    def do_search(self, keyword, search_filename, search_content, file_types="", cache_key=None, use_everything=False, force_metadata_degrade=False, match_case=False, match_whole_word=False):
-        import re
-
+    def do_search(self, keyword, search_filename, search_content, file_types="", cache_key=None, use_everything=False, force_metadata_degrade=False, match_case=False, match_whole_word=False, use_content_index=False, match_mode=ContentMatcher.MODE_LITERAL, exclude_dirs=(), max_depth=0, respect_gitignore=False):
         metadata_degrade_count = 0
-        whole_word_pattern = None
-        whole_word_pattern_bytes = None
-        if match_whole_word:
-            whole_word_flags = 0 if match_case else re.IGNORECASE
-            whole_word_pattern = re.compile(rf'\b{re.escape(keyword)}\b', whole_word_flags)
-            if keyword.isascii():
-                byte_flags = 0 if match_case else re.IGNORECASE
-                whole_word_pattern_bytes = re.compile(rb'\b' + re.escape(keyword.encode('ascii', errors='ignore')) + rb'\b', byte_flags)
-
-        def _matches_text(value):
-            if not isinstance(value, str) or not value:
-                return False
-            if whole_word_pattern is not None:
-                return bool(whole_word_pattern.search(value))
-            if match_case:
-                return keyword in value
-            return keyword.lower() in value.lower()
-
-        def _matches_bytes(value):
-            if not value:
-                return False
-            if whole_word_pattern_bytes is not None:
-                return bool(whole_word_pattern_bytes.search(value))
-            if match_case:
-                return keyword_bytes in value
-            return keyword_bytes_lower in value.lower()
+        is_excluded_dir = make_dir_excluder(exclude_dirs)
+        self.preview_matcher = None  # 结果预览高亮用的匹配器，只在内容搜索时设置
+        gitignore = GitignoreFilter(self.search_path) if respect_gitignore else None
+        matcher = ContentMatcher(keyword, match_case=match_case, match_whole_word=match_whole_word, mode=match_mode)
+        _matches_text = matcher.match_text
+        if search_content:
+            self.preview_matcher = matcher
 
         def _should_degrade_metadata():
             if force_metadata_degrade:
@@ -1870,58 +5859,84 @@ class SearchDialog(QDialog):
                 return False
 
         # 如果使用Everything搜索
-        if use_everything and self.everything_path:
+        if use_everything and self.search_backend is not None:
             self.result_queue.put({'type': 'status', 'text': tr('Using Everything搜索引擎...')})
             
+            def _everything_file_item(file_path, known_size, known_mtime):
+                name_without_ext, file_ext = os.path.splitext(os.path.basename(file_path))
+                path_without_ext = os.path.join(os.path.dirname(file_path), name_without_ext)
+                file_type = file_ext[1:].upper() if file_ext else tr("无")
+                sort_date_ts = None
+                sort_size_bytes = None
+                if known_size is not None and known_mtime is not None:
+                    # SDK 已在同一次查询中返回大小/修改时间，无需逐条 stat
+                    mtime = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(known_mtime))
+                    sort_date_ts = known_mtime
+                    sort_size_bytes = known_size
+                    size_str = format_file_size(known_size)
+                else:
+                    # es.exe 只返回路径：大小/修改时间由表格模型按可见行在后台补齐
+                    mtime = "-"
+                    size_str = "-"
+                return {
+                    'path': file_path,
+                    'name': f"📄 {path_without_ext}",
+                    'full_path': f"📄 {file_path}",
+                    'file_type': file_type,
+                    'date': mtime,
+                    'size': size_str,
+                    'sort_date_ts': sort_date_ts,
+                    'sort_size_bytes': sort_size_bytes,
+                }
+
+            search_root_len = len(self.search_path.rstrip('\\/'))
+
+            def _outside_walk_scope(file_path, is_dir):
+                # Everything 按整个路径树返回结果：与本地遍历一致地应用排除目录与最大深度
+                rel = file_path[search_root_len:].replace('\\', '/').strip('/')
+                parts = rel.split('/') if rel else []
+                parent_parts = parts[:-1]
+                if max_depth and len(parent_parts) >= max_depth:
+                    return True
+                if is_excluded_dir is not None and any(is_excluded_dir(part) for part in (parts if is_dir else parent_parts)):
+                    return True
+                return gitignore is not None and gitignore.is_path_ignored(file_path, is_dir)
+
+            found_count = 0
             try:
-                results = self.search_with_everything(keyword, self.search_path, file_types, match_case=match_case, match_whole_word=match_whole_word)
-                
-                if not self.is_searching:
-                    return
-                
-                # 将Everything结果添加到显示队列
+                # 边读边发：按数量或时间间隔刷新批次，首批结果无需等待后端结束
                 batch_size = 200
                 batch_items = []
-                for file_path in results:
+                last_flush = time.time()
+                results = self.search_backend.search(matcher, self.search_path, file_types, max_results=self.max_results)
+                for file_path, is_dir, known_size, known_mtime in results:
                     if not self.is_searching:
                         break
                     
                     try:
+                        if (is_excluded_dir is not None or max_depth or gitignore is not None) and _outside_walk_scope(file_path, is_dir):
+                            continue
                         basename = os.path.basename(file_path)
-                        name_without_ext, file_ext = os.path.splitext(basename)
-                        path_without_ext = os.path.join(os.path.dirname(file_path), name_without_ext)
-                        file_type = file_ext[1:].upper() if file_ext else tr("无")
-                        sort_date_ts = None
-                        sort_size_bytes = None
-                        if _should_degrade_metadata():
-                            metadata_degrade_count += 1
-                            mtime = "-"
-                            size_str = "-"
+                        if is_dir:
+                            # 后端明确标记的文件夹：与本地搜索的文件夹结果格式一致
+                            batch_items.append({
+                                'path': file_path,
+                                'name': f"📁 {basename}",
+                                'full_path': f"📁 {file_path}",
+                                'file_type': tr('文件夹'),
+                                'date': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(known_mtime)) if known_mtime is not None else "-",
+                                'size': "-",
+                                'sort_date_ts': known_mtime,
+                                'sort_size_bytes': None,
+                            })
                         else:
-                            try:
-                                stat_info = os.stat(file_path)
-                                mtime = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(stat_info.st_mtime))
-                                size_bytes = stat_info.st_size
-                                sort_date_ts = stat_info.st_mtime
-                                sort_size_bytes = size_bytes
-                                size_str = format_file_size(size_bytes)
-                            except Exception:
-                                mtime = "-"
-                                size_str = "-"
-
-                        batch_items.append({
-                            'path': file_path,
-                            'name': f"📄 {path_without_ext}",
-                            'full_path': f"📄 {file_path}",
-                            'file_type': file_type,
-                            'date': mtime,
-                            'size': size_str,
-                            'sort_date_ts': sort_date_ts,
-                            'sort_size_bytes': sort_size_bytes,
-                        })
-                        if len(batch_items) >= batch_size:
+                            batch_items.append(_everything_file_item(file_path, known_size, known_mtime))
+                        found_count += 1
+                        now = time.time()
+                        if len(batch_items) >= batch_size or now - last_flush >= 0.1:
                             self.add_search_results_batch(batch_items, timeout=0.5)
                             batch_items = []
+                            last_flush = now
                     except Exception:
                         pass
 
@@ -1932,26 +5947,55 @@ class SearchDialog(QDialog):
                         pass
                 
                 # 搜索完成
-                final_count = len(results)
-                degrade_note = tr("，元数据降级 {} 条").format(metadata_degrade_count) if metadata_degrade_count > 0 else ""
-                self.result_queue.put({'type': 'status', 'text': tr("Everything搜索完成，共找到 {} 个结果{}").format(final_count, degrade_note)})
+                self.result_queue.put({'type': 'status', 'text': tr("Everything搜索完成，共找到 {} 个结果").format(found_count)})
                 
             except Exception as e:
                 self.result_queue.put({'type': 'error', 'text': f'Everything搜索错误: {str(e)}'})
-            
+            finally:
+                self.search_backend.cancel()
+
+            # 已停止的搜索由 stop_search 负责恢复按钮状态
+            if self.is_searching:
+                self.is_searching = False
+                try:
+                    self.result_queue.put({'type': 'button', 'button': 'search', 'enabled': True}, timeout=1)
+                    self.result_queue.put({'type': 'button', 'button': 'stop', 'enabled': False}, timeout=1)
+                    self.result_queue.put({'type': 'enable_sorting'}, timeout=1)
+                except Exception:
+                    debug_print(tr('[Search] ⚠️ 队列满，最终状态更新失败'))
             return
         
+        # 相同条件的搜索且所涉目录未变化：直接回放缓存结果，不再遍历；
+        # 关键词只是在上次搜索基础上追加字符时，在上次的完整结果集中筛选
+        search_query = {
+            'path': self.search_path,
+            'keyword': keyword,
+            'filename': bool(search_filename),
+            'content': bool(search_content),
+            'types': file_types,
+            'degrade': bool(force_metadata_degrade),
+            'case': bool(match_case),
+            'word': bool(match_whole_word),
+            'mode': match_mode,
+            'exclude': tuple(exclude_dirs or ()),
+            'depth': max_depth,
+            'gitignore': bool(respect_gitignore),
+        }
+        if cache_key and (self._replay_cached_results(cache_key)
+                          or self._refine_cached_results(cache_key, search_query, matcher)):
+            return
+
         # 原有的搜索逻辑
         found_count = 0
-        keyword_lower = keyword.lower()
-        keyword_is_ascii = keyword.isascii()
-        keyword_bytes = keyword.encode('ascii', errors='ignore') if keyword_is_ascii else b''
-        keyword_bytes_lower = keyword_lower.encode('ascii', errors='ignore') if keyword_is_ascii else b''
         results_buffer = []  # 结果缓冲区
         base_buffer_size = SEARCH_RESULT_BATCH_BASE
-        max_cached_results = MAX_CACHED_RESULTS_PER_QUERY
-        all_results = [] if cache_key else None  # 仅在需要缓存时保存结果
-        ext_encoding_cache = {}  # 扩展名 -> 最近成功编码（减少重复试错）
+        all_results = [] if cache_key else None  # 仅在需要缓存时保存结果（超过 cache_results_cap 即放弃缓存）
+        # 内容搜索只进内存缓存；文件名搜索可写入持久化缓存
+        if SEARCH_RESULT_CACHE_PERSISTENT and not search_content:
+            cache_results_cap = max(MAX_CACHED_RESULTS_PER_QUERY, SEARCH_RESULT_CACHE_MAX_RESULTS)
+        else:
+            cache_results_cap = MAX_CACHED_RESULTS_PER_QUERY
+        cache_dirs = []  # 遍历过的目录及其 mtime_ns，作为缓存校验指纹
 
         def _adaptive_buffer_size():
             """根据结果队列积压动态调整发送批次，降低高压场景争用。"""
@@ -1986,49 +6030,94 @@ class SearchDialog(QDialog):
         # 结果限制（防止内存溢出和UI卡死）
         max_results = self.max_results
         results_limited = False
-        
-        # 二进制文件扩展名黑名单（这些文件肯定不搜索内容）
-        binary_file_extensions = {
-            # 可执行文件
-            'exe', 'dll', 'so', 'dylib', 'bin', 'com', 'app',
-            # 归档/压缩文件
-            'zip', 'rar', '7z', 'tar', 'gz', 'bz2', 'xz', 'iso', 'dmg',
-            # 图片文件
-            'jpg', 'jpeg', 'png', 'gif', 'bmp', 'ico', 'svg', 'webp', 'tiff', 'psd', 'ai',
-            # 音频文件
-            'mp3', 'wav', 'flac', 'aac', 'ogg', 'wma', 'm4a',
-            # 视频文件
-            'mp4', 'avi', 'mkv', 'mov', 'wmv', 'flv', 'webm', 'mpeg', 'mpg',
-            # Office文件（二进制格式）
-            'doc', 'xls', 'ppt', 'docx', 'xlsx', 'pptx', 'pdf',
-            # 数据库文件
-            'db', 'sqlite', 'mdb', 'accdb',
-            # 其他二进制
-            'obj', 'o', 'a', 'lib', 'pyc', 'pyo', 'class', 'jar', 'war',
-        }
 
-        # 文本扩展名白名单：命中时跳过二进制探测，减少一次额外文件读取
-        text_file_extensions = {
-            'txt', 'md', 'rst', 'log', 'ini', 'cfg', 'conf', 'toml', 'yaml', 'yml', 'json', 'xml',
-            'csv', 'tsv', 'sql', 'bat', 'ps1', 'sh', 'c', 'h', 'cpp', 'hpp', 'cc', 'cs', 'java',
-            'py', 'js', 'ts', 'jsx', 'tsx', 'html', 'htm', 'css', 'scss', 'less', 'go', 'rs', 'php',
-            'rb', 'swift', 'kt', 'm', 'mm', 'vue', 'svelte', 'dockerfile', 'gitignore', 'arxml', 'xdm'
-        }
-        
-        # 对于文件内容搜索，使用编译的正则表达式可能更快（可选优化）
-        # 但Python的内置字符串搜索已经很快，这里保持简单
+        def _emit_file_result(file_path, match_type, known_meta=None, need_meta=False, locations=None):
+            """记录一个命中文件（文件名命中与内容进程池回传的命中共用）。
+
+            known_meta=(size, mtime) 时直接使用（来自文件名索引或内容扫描投递时的 stat）；否则只有 need_meta=True
+            （内容命中：大小/时间是结果缓存的校验依据）才在此 stat，其余留给表格模型在后台按可见行补齐。
+            locations 为内容命中的匹配位置，随结果保存供预览窗格使用。"""
+            nonlocal found_count, results_limited, metadata_degrade_count, all_results
+            if found_count >= max_results:
+                results_limited = True
+                return
+            found_count += 1
+
+            # 获取文件信息
+            sort_date_ts = None
+            sort_size_bytes = None
+            if known_meta is not None:
+                sort_size_bytes, sort_date_ts = known_meta
+                mtime = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(sort_date_ts))
+                size_str = format_file_size(sort_size_bytes)
+            elif not need_meta:
+                mtime = "-"
+                size_str = "-"
+            elif _should_degrade_metadata():
+                metadata_degrade_count += 1
+                mtime = "-"
+                size_str = "-"
+            else:
+                try:
+                    stat_info = os.stat(file_path)
+                    mtime = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(stat_info.st_mtime))
+                    size_bytes = stat_info.st_size
+                    sort_date_ts = stat_info.st_mtime
+                    sort_size_bytes = size_bytes
+                    # 格式化大小
+                    size_str = format_file_size(size_bytes)
+                except Exception:
+                    mtime = "-"
+                    size_str = "-"
+
+            # 获取不带扩展名的完整路径
+            path_without_ext, ext = os.path.splitext(file_path)
+            file_ext = ext[1:].lower() if ext else ''
+            file_type = file_ext.upper() if file_ext else tr("无")
+
+            result_item = {
+                'path': file_path,
+                'name': f"{match_type} {path_without_ext}",
+                'full_path': f"{match_type} {file_path}",
+                'file_type': file_type,
+                'date': mtime,
+                'size': size_str,
+                'sort_date_ts': sort_date_ts,
+                'sort_size_bytes': sort_size_bytes,
+            }
+            if locations:
+                attach_hit_locations(result_item, locations)
+            results_buffer.append(result_item)
+            if all_results is not None:
+                if need_meta and sort_size_bytes is None:
+                    all_results = None  # 内容命中缺少大小/时间（降级或 stat 失败）：无法校验，本次结果不缓存
+                elif len(all_results) >= cache_results_cap:
+                    all_results = None  # 结果过多：不缓存，释放结果副本
+                else:
+                    all_results.append(result_item)  # 保存到缓存列表
+
+            # 批量更新UI（队列满时等待）
+            _flush_results_buffer()
+
+        # 内容匹配交给进程池；遍历线程只做目录枚举与候选过滤
+        content_scanner = None
+        if search_content:
+            content_scanner = ParallelContentScanner(matcher, is_cancelled=lambda: not self.is_searching)
+            encoding_cache = get_file_encoding_cache() if CONTENT_SEARCH_DETECT_ENCODING else None
+            debug_print(f"[Search] Content scan workers: {content_scanner.workers}")
+
+        # 内容 trigram 索引：命中记录且未过期的文件按 trigram 排除，过期/新增文件照常扫描并在结束后补录
+        content_index = None
+        content_index_keys = None
+        content_index_stale = []
+        content_index_skipped = 0
+        if search_content and use_content_index:
+            content_index = get_content_trigram_index(self.search_path)
+            content_index.acquire()
+            content_index_keys = content_index.query_key_groups(matcher)
         
         # 解析文件类型过滤（支持*.ext格式，逗号分隔）
-        file_extensions = set()
-        if file_types:
-            for ft in file_types.split(','):
-                ft = ft.strip()
-                if ft.startswith('*.'):
-                    file_extensions.add(ft[2:].lower())  # 去掉*.，只保留扩展名
-                elif ft.startswith('.'):
-                    file_extensions.add(ft[1:].lower())  # 去掉.，只保留扩展名
-                elif ft:
-                    file_extensions.add(ft.lower())  # 直接使用输入的扩展名
+        file_extensions = parse_file_type_filter(file_types)
         
         # 调试信息：输出搜索路径
         debug_print(tr("[Search] 开始搜索路径: {}").format(self.search_path))
@@ -2036,17 +6125,36 @@ class SearchDialog(QDialog):
         debug_print(tr("[Search] 搜索文件名: {}, 搜索内容: {}").format(search_filename, search_content))
         debug_print(tr("[Search] 文件类型过滤: {}").format(file_extensions if file_extensions else '所有类型'))
         
+        # 纯文件名搜索/列举：优先从持久化文件名索引回答，无索引时照常遍历并在结束后后台建立索引
+        filename_index = None
+        answered_from_index = False
+        if search_filename and not search_content and SEARCH_FILENAME_INDEX_ENABLED:
+            filename_index = get_filename_index(self.search_path)
+            answered_from_index = filename_index.load()
+        if answered_from_index:
+            walk_iter = prune_walk(filename_index.walk(), self.search_path, is_excluded_dir, max_depth, gitignore)
+            debug_print(f"[Search] Answering from filename index: {filename_index.index_path}")
+            all_results = None  # 索引本身即持久化且会后台刷新，其目录 mtime 可能滞后，不作为结果缓存指纹
+        else:
+            walk_iter = scandir_walk(self.search_path, is_excluded_dir, max_depth, gitignore)
+        search_root_len = len(self.search_path)
+
+        scanned_files = 0
+        skipped_binary_files = 0  # 跳过的二进制文件数
         try:
-            scanned_files = 0
             folder_count = 0
-            skipped_binary_files = 0  # 跳过的二进制文件数
             last_status_update_ms = int(time.time() * 1000)
-            for root, dirs, files in os.walk(self.search_path):
+            for root, dirs, files, entry_meta in walk_iter:
                 if not self.is_searching:
                     debug_print(tr("[Search] 搜索被中断"))
                     break
                 
                 folder_count += 1
+                if all_results is not None:
+                    try:
+                        cache_dirs.append((root[search_root_len:], os.stat(root).st_mtime_ns))
+                    except OSError:
+                        all_results = None  # 目录不可访问，本次结果不缓存
                 
                 # 搜索文件夹名（空关键词时跳过目录，因为目录无扩展名无法匹配文件类型过滤）
                 if search_filename and keyword:
@@ -2064,22 +6172,15 @@ class SearchDialog(QDialog):
                             found_count += 1
                             dir_path = os.path.join(root, dirname)
                             
-                            # 获取文件夹信息
-                            if _should_degrade_metadata():
-                                metadata_degrade_count += 1
+                            # 获取文件夹信息（无索引数据时由表格模型后台补齐修改时间）
+                            if entry_meta is not None and dirname in entry_meta:
+                                mtime_ts = entry_meta[dirname][1]
+                                mtime = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(mtime_ts))
+                                sort_date_ts = mtime_ts
+                            else:
                                 mtime = "-"
-                                size_str = "-"
                                 sort_date_ts = None
-                            else:
-                                try:
-                                    stat_info = os.stat(dir_path)
-                                    mtime = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(stat_info.st_mtime))
-                                    size_str = "-"  # 文件夹不显示大小
-                                    sort_date_ts = stat_info.st_mtime
-                                except Exception:
-                                    mtime = "-"
-                                    size_str = "-"
-                                    sort_date_ts = None
+                            size_str = "-"  # 文件夹不显示大小
                             
                             result_item = {
                                 'path': dir_path,
@@ -2092,8 +6193,11 @@ class SearchDialog(QDialog):
                                 'sort_size_bytes': None,
                             }
                             results_buffer.append(result_item)
-                            if all_results is not None and len(all_results) < max_cached_results:
-                                all_results.append(result_item)  # 保存到缓存列表
+                            if all_results is not None:
+                                if len(all_results) >= cache_results_cap:
+                                    all_results = None  # 结果过多：不缓存，释放结果副本
+                                else:
+                                    all_results.append(result_item)  # 保存到缓存列表
                             
                             # 批量更新UI（队列满时等待）
                             _flush_results_buffer()
@@ -2109,7 +6213,6 @@ class SearchDialog(QDialog):
                         debug_print(tr("[Search] 搜索被中断（文件循环）"))
                         break
 
-                    filename_lower = filename.lower()
                     name_without_ext, ext = os.path.splitext(filename)
                     file_ext = ext[1:].lower() if ext else ''
                     
@@ -2150,183 +6253,71 @@ class SearchDialog(QDialog):
                             pass  # 超时后继续搜索
                     
                     file_path = os.path.join(root, filename)
-                    matched = False
-                    match_type = ""
                     
                     # 搜索文件名（Python内置优化）
                     if search_filename and _matches_text(filename):
-                        matched = True
-                        match_type = "📄"
+                        _emit_file_result(file_path, "📄", entry_meta.get(filename) if entry_meta is not None else None)
+                        continue
                     
                     # 搜索文件内容（智能检测文本文件）
-                    if search_content and not matched:
-                        # 1. 首先检查黑名单（明确的二进制文件）
-                        if file_ext in binary_file_extensions:
+                    if content_scanner is not None:
+                        # 1. 首先检查黑名单与本次搜索学到的二进制扩展名（不做任何 I/O）
+                        if file_ext in SEARCH_BINARY_FILE_EXTENSIONS or content_scanner.is_known_binary(file_ext):
                             skipped_binary_files += 1
                             continue
 
-                        # 2. 预取文件大小：空文件不可能命中关键词，直接跳过；同时复用size避免重复stat
+                        # 2. 预取文件大小与mtime：空文件不可能命中关键词，直接跳过；
+                        #    mtime 同时用于内容索引和文件编码缓存的失效判断
                         try:
-                            file_size = os.path.getsize(file_path)
+                            file_stat = entry_meta.stat(filename)  # 复用 scandir 目录项（Windows 上无额外系统调用）
+                            file_size = file_stat.st_size
                         except OSError:
                             continue
                         if file_size == 0:
                             continue
 
-                        # 3. 文本白名单直接通过；其余文件走探测
-                        if file_ext not in text_file_extensions and not is_text_file(file_path):
-                            skipped_binary_files += 1
-                            continue
-                        
-                        try:
-                            # 文件大小已在上方预取（file_size）
-
-                            # 分块读取与单文件扫描上限
-                            chunk_size = CONTENT_SEARCH_CHUNK_SIZE
-                            max_scan_bytes = CONTENT_SEARCH_MAX_BYTES_PER_FILE
-                            in_memory_threshold = CONTENT_SEARCH_IN_MEMORY_THRESHOLD
-
-                            # ASCII关键词快速路径：直接按字节匹配，跳过多编码解码
-                            if keyword_is_ascii and keyword_bytes:
-                                read_limit = min(file_size, max_scan_bytes)
-                                if read_limit <= in_memory_threshold:
-                                    with open(file_path, 'rb') as bf:
-                                        raw_content = bf.read(read_limit)
-                                    # 兼容 UTF-16(无BOM) 等含 NULL 字节文本：移除 NULL 后再匹配一次
-                                    raw_no_null = raw_content.replace(b'\x00', b'')
-                                    if (
-                                        _matches_bytes(raw_content)
-                                        or _matches_bytes(raw_no_null)
-                                    ):
-                                        matched = True
-                                        match_type = "📄"
-                                else:
-                                    overlap_bytes = max(1, len(keyword_bytes) * 2)
-                                    scanned_bytes = 0
-                                    with open(file_path, 'rb') as bf:
-                                        while True:
-                                            if scanned_bytes >= max_scan_bytes:
-                                                break
-                                            chunk = bf.read(chunk_size)
-                                            if not chunk:
-                                                break
-                                            scanned_bytes += len(chunk)
-                                            chunk_no_null = chunk.replace(b'\x00', b'')
-                                            if (
-                                                _matches_bytes(chunk)
-                                                or _matches_bytes(chunk_no_null)
-                                            ):
-                                                matched = True
-                                                match_type = "📄"
-                                                break
-                                            if len(chunk) == chunk_size:
-                                                bf.seek(bf.tell() - overlap_bytes)
-
-                            # 编码顺序：优先使用该扩展名最近成功编码
-                            if not matched:  # 跳过编码尝试如果已匹配
-                                preferred_encoding = ext_encoding_cache.get(file_ext)
-                                if preferred_encoding and preferred_encoding in CONTENT_SEARCH_ENCODINGS:
-                                    encodings = [preferred_encoding] + [enc for enc in CONTENT_SEARCH_ENCODINGS if enc != preferred_encoding]
-                                else:
-                                    encodings = list(CONTENT_SEARCH_ENCODINGS)
-                                content_matched = False
-                                
-                                for encoding in encodings:
-                                    try:
-                                        read_limit = min(file_size, max_scan_bytes)
-                                        if read_limit <= in_memory_threshold:
-                                            # 小文件优化：只读一次二进制，再在内存中尝试不同编码，避免重复磁盘I/O
-                                            if encoding == encodings[0]:
-                                                with open(file_path, 'rb') as bf:
-                                                    raw_content = bf.read(read_limit)
-                                            content = raw_content.decode(encoding, errors='ignore')
-                                            if _matches_text(content):
-                                                matched = True
-                                                match_type = "📄"
-                                                content_matched = True
-                                                if file_ext:
-                                                    ext_encoding_cache[file_ext] = encoding
-                                                break
-                                        else:
-                                            with open(file_path, 'r', encoding=encoding, errors='ignore') as f:
-                                                # 大文件分块读取（有总扫描上限）
-                                                overlap = len(keyword) * 2  # 重叠区域，防止关键词被分割
-                                                scanned_bytes = 0
-                                                while True:
-                                                    if scanned_bytes >= max_scan_bytes:
-                                                        break
-                                                    chunk = f.read(chunk_size)
-                                                    if not chunk:
-                                                        break
-                                                    scanned_bytes += len(chunk)
-                                                    if _matches_text(chunk):
-                                                        matched = True
-                                                        match_type = "📄"
-                                                        content_matched = True
-                                                        if file_ext:
-                                                            ext_encoding_cache[file_ext] = encoding
-                                                        break
-                                                    # 回退overlap字节，避免关键词跨块
-                                                    if len(chunk) == chunk_size:
-                                                        f.seek(f.tell() - overlap)
-                                                if content_matched:
-                                                    break
-                                    except UnicodeError:
-                                        continue
-                                    except Exception as e:
-                                        # 其他错误，记录日志并尝试下一个编码
-                                        debug_print(tr("[Search] 读取文件失败 {} (编码 {}): {}").format(file_path, encoding, e))
-                                        continue
-                        except Exception as e:
-                            # 如果无法以文本方式读取，记录日志并跳过该文件
-                            debug_print(tr("[Search] 无法读取文件 {}: {}").format(file_path, e))
-                            pass
-                    
-                    if matched:
-                        found_count += 1
-                        
-                        # 获取文件信息
-                        sort_date_ts = None
-                        sort_size_bytes = None
-                        if _should_degrade_metadata():
-                            metadata_degrade_count += 1
-                            mtime = "-"
-                            size_str = "-"
-                        else:
-                            try:
-                                stat_info = os.stat(file_path)
-                                mtime = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(stat_info.st_mtime))
-                                size_bytes = stat_info.st_size
-                                sort_date_ts = stat_info.st_mtime
-                                sort_size_bytes = size_bytes
-                                # 格式化大小
-                                size_str = format_file_size(size_bytes)
-                            except Exception:
-                                mtime = "-"
-                                size_str = "-"
-                        
-                        # 获取不带扩展名的完整路径
-                        path_without_ext = os.path.join(root, name_without_ext)
-                        file_type = file_ext.upper() if file_ext else tr("无")
-                        
-                        result_item = {
-                            'path': file_path,
-                            'name': f"{match_type} {path_without_ext}",
-                            'full_path': f"{match_type} {file_path}",
-                            'file_type': file_type,
-                            'date': mtime,
-                            'size': size_str,
-                            'sort_date_ts': sort_date_ts,
-                            'sort_size_bytes': sort_size_bytes,
-                        }
-                        results_buffer.append(result_item)
-                        if all_results is not None and len(all_results) < max_cached_results:
-                            all_results.append(result_item)  # 保存到缓存列表
-                        
-                        # 批量更新UI（每20个结果更新一次）
-                        _flush_results_buffer()
+                        if content_index is not None:
+                            verdict = content_index.lookup(file_path, file_size, file_stat.st_mtime_ns, content_index_keys)
+                            if verdict is None:
+                                content_index_stale.append((file_path, file_size, file_stat.st_mtime_ns, file_ext))
+                            elif verdict == 'skip':
+                                content_index_skipped += 1
+                                continue
+                            elif verdict == 'binary':
+                                skipped_binary_files += 1
+                                continue
+
+                        # 3. 二进制探测（复用首次读取）与内容匹配在进程池中完成，这里只回收已完成的命中
+                        known_encodings = encoding_cache.lookup(file_path, file_stat.st_mtime_ns, file_size) if encoding_cache is not None else None
+                        for hit_path, _encoding, locations in content_scanner.submit(
+                                file_path, file_size, file_ext, file_stat.st_mtime_ns, known_encodings):
+                            _emit_file_result(hit_path, "📄", known_meta=content_scanner.hit_meta.pop(hit_path, None),
+                                              need_meta=True, locations=locations)
+
+            # 遍历结束后等待进程池剩余任务（停止搜索或结果达上限时直接取消）
+            if content_scanner is not None:
+                if self.is_searching and not results_limited:
+                    for hits in content_scanner.finish():
+                        for hit_path, _encoding, locations in hits:
+                            _emit_file_result(hit_path, "📄", known_meta=content_scanner.hit_meta.pop(hit_path, None),
+                                              need_meta=True, locations=locations)
+                        if results_limited:
+                            break
+                content_scanner.cancel()
         except Exception as e:
             debug_print(f"[Search] error: {e}")
+            if content_scanner is not None:
+                content_scanner.cancel()
+        if content_scanner is not None:
+            skipped_binary_files += content_scanner.skipped_binary_files
+            if encoding_cache is not None and content_scanner.detected_encodings:
+                encoding_cache.record_many(content_scanner.detected_encodings)
+                encoding_cache.save()
+        if content_index is not None:
+            content_index.release()
+            debug_print(f"[Search] Content index: skipped={content_index_skipped} stale={len(content_index_stale)}")
+            if self.is_searching:
+                content_index.update_async(content_index_stale)
         
         # 添加剩余的结果（队列满时等待）
         if results_buffer:
@@ -2338,13 +6329,29 @@ class SearchDialog(QDialog):
             debug_print(tr("[Search] 跳过 {} 个二进制文件（不搜索内容）").format(skipped_binary_files))
         if self.queue_overflow_count > 0:
             debug_print(tr("[Search] ⚠️ 队列溢出 {} 次（部分结果未显示）").format(self.queue_overflow_count))
+        if gitignore is not None:
+            debug_print(f"[Search] Gitignore pruned dirs={gitignore.ignored_dirs} files={gitignore.ignored_files}")
+        debug_print(f"[Search] Result channel: {self.result_queue.stats_text()}")
         
-        # 将结果存入缓存（限制缓存大小，防止内存溢出）
-        if cache_key and all_results:
+        # 完整完成的搜索存入缓存：内存只保留小结果集，完整结果集写入持久化缓存
+        if all_results is not None and self.is_searching:
             global _search_cache
-            cached_results = all_results
-            _search_cache.put(cache_key, cached_results)
-            debug_print(f"[Search] 已将 {len(cached_results)} 个结果存入缓存")
+            fingerprint = {
+                'root': self.search_path,
+                'dirs': cache_dirs,
+                'check_files': bool(search_content),
+                'limited': results_limited,
+                'query': search_query,
+            }
+            if len(all_results) <= MAX_CACHED_RESULTS_PER_QUERY:
+                _search_cache.put(cache_key, (all_results, fingerprint))
+            if SEARCH_RESULT_CACHE_PERSISTENT and not search_content:
+                get_persistent_search_cache().put(cache_key, all_results, fingerprint)
+            debug_print(f"[Search] 已将 {len(all_results)} 个结果存入缓存")
+
+        # 完整完成的文件名搜索后在后台建立/增量刷新索引（仅重扫mtime变化的目录）
+        if filename_index is not None and self.is_searching:
+            filename_index.refresh_async()
         
         # 重置搜索状态（先重置，避免后续更新被跳过）
         self.is_searching = False
@@ -2357,6 +6364,10 @@ class SearchDialog(QDialog):
             final_status = tr("搜索完成，共找到 {} 个结果（扫描了 {} 个文件）").format(found_count, scanned_files)
         if metadata_degrade_count > 0:
             final_status += tr("，元数据降级 {} 条").format(metadata_degrade_count)
+        if answered_from_index:
+            final_status += tr("（来自文件名索引）")
+        if content_index_skipped > 0:
+            final_status += tr("，内容索引排除 {} 个文件").format(content_index_skipped)
         
         # 使用超时put，防止队列满时卡死
         try:
@@ -3259,8 +7270,213 @@ class FolderSizeChecker(QThread):
         self._mutex.unlock()
 
 
+def file_op_volume_key(path):
+    """返回路径所在卷的标识：Windows 为盘符或 UNC 共享根，其它平台为挂载点。"""
+    try:
+        full = os.path.abspath(path)
+    except Exception:
+        return ''
+    if os.name == 'nt':
+        drive = os.path.splitdrive(full)[0]
+        return drive.upper() if drive else full
+    current = full
+    while not os.path.ismount(current):
+        parent = os.path.dirname(current)
+        if parent == current:
+            break
+        current = parent
+    return current
+
+
+class FileOpConcurrencyMemory:
+    """记住每个卷（复制时为 源卷>目标卷）上实测吞吐最高的 I/O 并发数，持久化到 file_op_concurrency.json。"""
+
+    MAX_ENTRIES = 256
+
+    def __init__(self):
+        self.path = get_app_data_path(FILE_OP_CONCURRENCY_FILENAME)
+        self._lock = threading.Lock()
+        self._entries = None  # volume_key -> [concurrency, updated_at]
+
+    def _ensure_loaded_locked(self):
+        if self._entries is not None:
+            return
+        self._entries = OrderedDict()
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for key, row in (data.get('volumes') or {}).items():
+                if isinstance(row, list) and len(row) == 2:
+                    self._entries[key] = row
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            debug_print(f"[FileOp] Load concurrency memory failed {self.path}: {e}")
+
+    def lookup(self, volume_key):
+        with self._lock:
+            self._ensure_loaded_locked()
+            row = self._entries.get(volume_key)
+        if not row:
+            return 0
+        try:
+            return max(1, int(row[0]))
+        except Exception:
+            return 0
+
+    def remember(self, volume_key, concurrency):
+        """记录并立即原子写盘（先写临时文件再替换）。"""
+        if not volume_key or concurrency <= 0:
+            return
+        with self._lock:
+            self._ensure_loaded_locked()
+            self._entries.pop(volume_key, None)
+            self._entries[volume_key] = [int(concurrency), int(time.time())]
+            while len(self._entries) > self.MAX_ENTRIES:
+                self._entries.popitem(last=False)
+            payload = json.dumps({'version': 1, 'volumes': self._entries}, ensure_ascii=False, indent=1)
+        tmp_path = self.path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(payload)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            debug_print(f"[FileOp] Save concurrency memory failed {self.path}: {e}")
+
+
+_file_op_concurrency_memory = None
+_file_op_concurrency_memory_lock = threading.Lock()
+
+
+def get_file_op_concurrency_memory():
+    global _file_op_concurrency_memory
+    with _file_op_concurrency_memory_lock:
+        if _file_op_concurrency_memory is None:
+            _file_op_concurrency_memory = FileOpConcurrencyMemory()
+        return _file_op_concurrency_memory
+
+
+class AdaptiveIoConcurrency:
+    """按 AIMD 调节后台文件操作的 I/O 并发数。
+
+    线程池按上限开线程，工作线程在 acquire() 处按当前 limit 放行；调度线程每完成一个文件调用
+    record()。每个采样窗口计算吞吐（字节数 + 每文件固定开销折算）与平均单文件延迟，与目前最佳窗口比较：
+    - 吞吐创新高：记为 best_limit，沿当前方向继续（向上 +1，向下乘性减小）；
+    - 向上试探没有提升：乘性减小到 best_limit 的 3/4 试探更低并发（机械盘/网络盘过量并发反而变慢）；
+    - 向下试探吞吐持平：采用更低并发继续向下；明显变差：回到 best_limit 并保持若干窗口后再向上试探；
+    - 停在 best_limit 时吞吐明显下降或延迟膨胀：并发减半，以当前状况重新寻找最佳点。"""
+
+    WINDOW_SECONDS = 0.5
+    MIN_WINDOW_FILES = 8
+    PER_FILE_COST_BYTES = 64 * 1024
+    GAIN_RATIO = 1.05
+    DROP_RATIO = 0.85
+    LATENCY_INFLATION = 1.5
+    DECREASE_FACTOR = 0.75
+    HOLD_WINDOWS = 4
+
+    def __init__(self, initial_limit, max_limit):
+        self.max_limit = max(1, int(max_limit))
+        self.limit = min(self.max_limit, max(1, int(initial_limit)))
+        self.best_limit = self.limit
+        self.windows = 0
+        self._best_rate = 0.0
+        self._best_latency = 0.0
+        self._direction = 1
+        self._hold = 0
+        self._active = 0
+        self._cond = threading.Condition()
+        self._reset_window(time.monotonic())
+
+    def _reset_window(self, now):
+        self._window_start = now
+        self._window_files = 0
+        self._window_bytes = 0
+        self._window_latency = 0.0
+
+    def acquire(self):
+        with self._cond:
+            while self._active >= self.limit:
+                self._cond.wait(0.2)
+            self._active += 1
+
+    def release(self):
+        with self._cond:
+            self._active -= 1
+            self._cond.notify()
+
+    def _set_limit(self, limit):
+        with self._cond:
+            self.limit = min(self.max_limit, max(1, int(limit)))
+            self._cond.notify_all()
+
+    def record(self, nbytes, latency, files=1):
+        """记录一批成功完成的文件任务（latency 为整批耗时）；只在调度线程调用。"""
+        files = max(1, int(files))
+        self._window_files += files
+        self._window_bytes += max(0, int(nbytes or 0)) + self.PER_FILE_COST_BYTES * files
+        self._window_latency += max(0.0, latency)
+        now = time.monotonic()
+        elapsed = now - self._window_start
+        if elapsed < self.WINDOW_SECONDS or self._window_files < max(self.MIN_WINDOW_FILES, self.limit):
+            return
+        rate = self._window_bytes / elapsed
+        latency_avg = self._window_latency / self._window_files
+        self._reset_window(now)
+        self._adjust(rate, latency_avg)
+
+    def _adjust(self, rate, latency):
+        self.windows += 1
+        if rate > self._best_rate * self.GAIN_RATIO:
+            self._best_rate = rate
+            self._best_latency = latency
+            self.best_limit = self.limit
+            if self._direction > 0:
+                self._set_limit(self.limit + 1)
+            elif self.limit > 1:
+                self._set_limit(self.limit * self.DECREASE_FACTOR)
+            else:
+                self._direction = 1
+                self._hold = self.HOLD_WINDOWS
+            return
+        if self.limit > self.best_limit:
+            lower = int(self.best_limit * self.DECREASE_FACTOR)
+            if 1 <= lower < self.best_limit:
+                self._direction = -1
+                self._set_limit(lower)
+            else:
+                self._hold = self.HOLD_WINDOWS
+                self._set_limit(self.best_limit)
+            return
+        if self.limit < self.best_limit:
+            if rate * self.GAIN_RATIO >= self._best_rate:
+                # 更低并发吞吐持平：采用更低并发，减少对磁盘与其它程序的争用
+                self.best_limit = self.limit
+                self._best_latency = latency
+                if self.limit > 1:
+                    self._set_limit(self.limit * self.DECREASE_FACTOR)
+                    return
+            self._direction = 1
+            self._hold = self.HOLD_WINDOWS
+            self._set_limit(self.best_limit)
+            return
+        congested = rate < self._best_rate * self.DROP_RATIO or (
+            self._best_latency > 0 and latency > self._best_latency * self.LATENCY_INFLATION
+        )
+        if congested and self.limit > 1:
+            self._best_rate = rate
+            self._best_latency = latency
+            self._direction = -1
+            self._set_limit(self.limit // 2)
+        elif self._hold > 0:
+            self._hold -= 1
+        else:
+            self._direction = 1
+            self._set_limit(self.limit + 1)
+
+
 class FileBatchOpWorker(QThread):
-    """后台执行批量复制/删除，避免系统 Shell 弹框阻塞 UI。"""
+    """后台执行批量复制/移动/删除，避免系统 Shell 弹框阻塞 UI。"""
     finished = pyqtSignal(str, int, int, list)  # op_type, ok_count, fail_count, errors
     progress = pyqtSignal(str, int, int, str)  # op_type, done_count, total_count, current_name
 
@@ -3277,6 +7493,8 @@ class FileBatchOpWorker(QThread):
         self.done_units = 0
         self.total_units = 0
         self.started_at = 0.0
+        self._io_controller = None
+        self._io_volume_key = ''
 
     def request_cancel(self):
         self._cancel_requested = True
@@ -3289,7 +7507,10 @@ class FileBatchOpWorker(QThread):
     def _emit_progress(self, current_name):
         self.progress.emit(self.op_type, self.done_units, max(1, self.total_units), current_name or "")
 
-    def _get_io_workers(self, task_count):
+    def _get_io_workers(self, task_count=None):
+        """task_count 为 None 表示任务数未知（边遍历边提交）。"""
+        if task_count is None:
+            task_count = 1 << 30
         if task_count <= 1:
             return 1
         if self.max_workers > 0:
@@ -3297,6 +7518,32 @@ class FileBatchOpWorker(QThread):
         cpu = os.cpu_count() or 4
         return max(2, min(8, cpu * 2, task_count))
 
+    def _get_io_controller(self):
+        """并发数为自动且启用自适应时返回本次操作共用的 AdaptiveIoConcurrency，否则返回 None。"""
+        if self.max_workers > 0 or not FILE_OP_ADAPTIVE_CONCURRENCY:
+            return None
+        if self._io_controller is None:
+            src_key = file_op_volume_key(self.src_paths[0]) if self.src_paths else ''
+            if self.op_type in ('copy', 'move') and self.dst_dir:
+                self._io_volume_key = f"{src_key}>{file_op_volume_key(self.dst_dir)}"
+            else:
+                self._io_volume_key = src_key
+            initial = get_file_op_concurrency_memory().lookup(self._io_volume_key) or self._get_io_workers()
+            self._io_controller = AdaptiveIoConcurrency(initial, FILE_OP_MAX_IO_WORKERS)
+            debug_print(f"[FileOp] Adaptive concurrency for {self._io_volume_key}: start={self._io_controller.limit}")
+        return self._io_controller
+
+    def _remember_io_concurrency(self):
+        """操作正常结束且采样足够时，按卷记住吞吐最高的并发数。"""
+        controller = self._io_controller
+        if controller is None or self.cancelled or controller.windows < 2:
+            return
+        debug_print(
+            f"[FileOp] Adaptive concurrency for {self._io_volume_key}: "
+            f"best={controller.best_limit} final={controller.limit} windows={controller.windows}"
+        )
+        get_file_op_concurrency_memory().remember(self._io_volume_key, controller.best_limit)
+
     @staticmethod
     def _make_unique_path(target_path):
         """避免覆盖：若目标已存在，自动追加 " - copy" 后缀。"""
@@ -3372,150 +7619,352 @@ class FileBatchOpWorker(QThread):
 
         shutil.rmtree(path, onerror=_onerror)
 
-    @staticmethod
-    def _estimate_path_units(path):
-        """估算工作量：文件/目录总条目数（用于更细粒度进度显示）。"""
-        try:
-            if os.path.isfile(path):
-                return 1
-            if not os.path.isdir(path):
-                return 1
-            total = 1  # 根目录本身
-            for root, dirs, files in os.walk(path):
-                total += len(dirs) + len(files)
-            return max(1, total)
-        except Exception:
-            return 1
-
-    def _estimate_total_units(self):
-        total = 0
-        for p in self.src_paths:
-            total += self._estimate_path_units(p)
-        return max(1, total)
+    def _iter_copy_tasks(self, src_dir, dst_dir):
+        """单次遍历源目录：目录在遍历线程中即时创建，文件复制任务按批产出。
 
-    @staticmethod
-    def _collect_copy_tasks(src_dir, dst_dir):
-        """收集目录复制任务：目录创建顺序执行，文件复制可并发。"""
-        dirs_to_create = [dst_dir]
-        file_tasks = []
-        for root, dirs, files in os.walk(src_dir):
+        每遍历到一层目录就把其子项计入 total_units，进度总数随遍历逐步修正。小于 FILE_OP_SMALL_FILE_BYTES
+        的文件合并成批（每批最多 FILE_OP_SMALL_FILE_BATCH 个），其余文件单独成批；批内每项为
+        (源路径, 目标路径, 文件名, 遍历得到的 stat)。目标根目录写入续传标记，复制中断后再次复制同一目录时可跳过已完成的文件。
+        """
+        self._raise_if_cancelled()
+        os.makedirs(dst_dir, exist_ok=True)
+        self._write_resume_marker(dst_dir, src_dir)
+        self.done_units += 1
+        self._emit_progress(os.path.basename(dst_dir.rstrip('\\/')) or dst_dir)
+        batch = []
+        for root, dirs, files, meta in scandir_walk(src_dir):
+            self._raise_if_cancelled()
+            self.total_units += len(dirs) + len(files)
             rel = os.path.relpath(root, src_dir)
             dst_root = dst_dir if rel == '.' else os.path.join(dst_dir, rel)
             for dname in dirs:
-                dirs_to_create.append(os.path.join(dst_root, dname))
+                self._raise_if_cancelled()
+                os.makedirs(os.path.join(dst_root, dname), exist_ok=True)
+                self.done_units += 1
+                self._emit_progress(dname)
+            for fname in files:
+                try:
+                    src_stat = meta.stat(fname)
+                except OSError:
+                    src_stat = None
+                item = (os.path.join(root, fname), os.path.join(dst_root, fname), fname, src_stat)
+                if src_stat is None or src_stat.st_size >= FILE_OP_SMALL_FILE_BYTES:
+                    yield [item]
+                    continue
+                batch.append(item)
+                if len(batch) >= FILE_OP_SMALL_FILE_BATCH:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+
+    def _iter_delete_tasks(self, src_dir, dirs_to_remove):
+        """单次遍历源目录：文件删除任务按 FILE_OP_SMALL_FILE_BATCH 个一批产出，子目录按发现顺序记入 dirs_to_remove。
+
+        自顶向下遍历时父目录先于子目录记录，调用方逆序删除即可保证先删子目录。
+        """
+        batch = []
+        for root, dirs, files in os.walk(src_dir):
+            self._raise_if_cancelled()
+            self.total_units += len(dirs) + len(files)
+            for dname in dirs:
+                dirs_to_remove.append((os.path.join(root, dname), dname))
             for fname in files:
-                src_file = os.path.join(root, fname)
-                dst_file = os.path.join(dst_root, fname)
-                file_tasks.append((src_file, dst_file, fname))
-        return dirs_to_create, file_tasks
+                batch.append((os.path.join(root, fname), fname))
+                if len(batch) >= FILE_OP_SMALL_FILE_BATCH:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
 
     @staticmethod
-    def _collect_delete_tasks(src_dir):
-        """收集目录删除任务：文件可并发删除，目录按深度逆序删除。"""
-        file_tasks = []
-        dirs_to_remove = []
-        for root, dirs, files in os.walk(src_dir, topdown=False):
-            for fname in files:
-                fpath = os.path.join(root, fname)
-                file_tasks.append((fpath, fname))
-            for dname in dirs:
-                dpath = os.path.join(root, dname)
-                dirs_to_remove.append((dpath, dname))
-        dirs_to_remove.append((src_dir, os.path.basename(src_dir.rstrip('\\/')) or src_dir))
-        return file_tasks, dirs_to_remove
+    def _write_resume_marker(dst_dir, src_dir):
+        try:
+            with open(os.path.join(dst_dir, FILE_OP_RESUME_MARKER), 'w', encoding='utf-8') as f:
+                json.dump({'src': os.path.abspath(src_dir)}, f, ensure_ascii=False)
+        except OSError as e:
+            debug_print(f"[FileOp] Write resume marker failed {dst_dir}: {e}")
+
+    @staticmethod
+    def _remove_resume_marker(dst_dir):
+        try:
+            os.remove(os.path.join(dst_dir, FILE_OP_RESUME_MARKER))
+        except OSError:
+            pass
+
+    @staticmethod
+    def _find_resumable_copy_dir(src_dir, target_path):
+        """在 target_path 及其 " - copy" 系列候选中查找上次未完成的同源目录复制，没有则返回 None。"""
+        src_abs = os.path.abspath(src_dir)
+        base, ext = os.path.splitext(target_path)
+        candidate = target_path
+        index = 0
+        while os.path.isdir(candidate):
+            try:
+                with open(os.path.join(candidate, FILE_OP_RESUME_MARKER), 'r', encoding='utf-8') as f:
+                    if json.load(f).get('src') == src_abs:
+                        return candidate
+            except (OSError, ValueError, AttributeError):
+                pass
+            index += 1
+            suffix = " - copy" if index == 1 else f" - copy{index}"
+            candidate = f"{base}{suffix}{ext}"
+        return None
+
+    @staticmethod
+    def _is_already_copied(src_stat, dst_file):
+        """续传时判断目标是否已完整复制：大小相同且修改时间一致（copy2 复制完成后才写入 mtime，容差 2 秒兼容 FAT）。"""
+        try:
+            dst_stat = os.stat(dst_file)
+        except OSError:
+            return False
+        return dst_stat.st_size == src_stat.st_size and abs(dst_stat.st_mtime - src_stat.st_mtime) < 2
 
-    def _copy_file_task(self, src_file, dst_file):
+    def _copy_file_task(self, src_file, dst_file, resume=False, src_stat=None):
+        """复制单个文件，返回复制的字节数（供自适应并发统计吞吐）。
+
+        目标父目录由调用方保证已存在（目录复制在遍历时已逐层创建）；src_stat 为遍历时取得的 stat，
+        大文件复制前会重新获取，避免遍历后文件增长导致截断。
+        """
         self._raise_if_cancelled()
-        parent = os.path.dirname(dst_file)
-        if parent:
-            os.makedirs(parent, exist_ok=True)
+        if src_stat is None or src_stat.st_size >= FILE_OP_CHUNKED_COPY_THRESHOLD:
+            src_stat = os.stat(src_file)
+        if resume and self._is_already_copied(src_stat, dst_file):
+            return 0
+        if src_stat.st_size >= FILE_OP_CHUNKED_COPY_THRESHOLD:
+            return self._copy_file_chunked(src_file, dst_file, src_stat)
         shutil.copy2(src_file, dst_file)
+        return src_stat.st_size
+
+    @staticmethod
+    def _load_copy_checkpoint(journal_path, part_path, identity):
+        """读取断点日志；源文件未变化且临时文件完整时返回可续传的字节数，否则返回 0。"""
+        try:
+            with open(journal_path, 'r', encoding='utf-8') as f:
+                journal = json.load(f)
+            if any(journal.get(key) != value for key, value in identity.items()):
+                return 0
+            copied = int(journal.get('copied', 0))
+            if 0 < copied <= identity['size'] and copied <= os.path.getsize(part_path):
+                return copied
+        except (OSError, ValueError, TypeError, AttributeError):
+            pass
+        return 0
+
+    @staticmethod
+    def _save_copy_checkpoint(journal_path, identity, copied):
+        tmp_path = journal_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(dict(identity, copied=copied), f, ensure_ascii=False)
+        os.replace(tmp_path, journal_path)
+
+    def _emit_byte_progress(self, name, copied, total):
+        """大文件复制中的字节级进度，附加在当前文件名后（信号的计数参数仍为条目数）。"""
+        self.progress.emit(
+            self.op_type, self.done_units, max(1, self.total_units),
+            f"{name} ({format_file_size(copied)} / {format_file_size(total)})"
+        )
+
+    def _copy_file_chunked(self, src_file, dst_file, src_stat):
+        """大文件分块复制到 <目标>.tabex-part，完成后再替换为目标文件。
+
+        优先用 os.copy_file_range 在内核内复制，不支持或提前返回 0 时退回页对齐缓冲区读写；每块之间检查取消并上报字节进度，
+        每隔 FILE_OP_COPY_CHECKPOINT_MS 落盘并写断点日志。取消或出错时保留临时文件和日志，
+        下次复制同一源文件到同一目标时从断点继续。
+        """
+        import mmap
+
+        part_path = dst_file + FILE_OP_PART_SUFFIX
+        journal_path = part_path + '.json'
+        total = src_stat.st_size
+        identity = {'src': os.path.abspath(src_file), 'size': total, 'mtime_ns': src_stat.st_mtime_ns}
+        copied = self._load_copy_checkpoint(journal_path, part_path, identity)
+        if copied:
+            debug_print(f"[FileOp] Resume {src_file} at {copied}/{total}")
+        name = os.path.basename(dst_file)
+        chunk_size = max(64 * 1024, int(FILE_OP_COPY_CHUNK_SIZE)) // (64 * 1024) * (64 * 1024)
+        use_copy_range = hasattr(os, 'copy_file_range')
+        buffer = None
+        last_checkpoint = last_emit = time.monotonic()
+
+        with open(src_file, 'rb', buffering=0) as fsrc, open(part_path, 'r+b' if copied else 'wb', buffering=0) as fdst:
+            fdst.truncate(copied)
+            try:
+                while copied < total:
+                    self._raise_if_cancelled()
+                    want = min(chunk_size, total - copied)
+                    got = 0
+                    if use_copy_range:
+                        try:
+                            got = os.copy_file_range(fsrc.fileno(), fdst.fileno(), want, copied, copied)
+                        except OSError:
+                            got = 0
+                        if got <= 0:
+                            # 跨文件系统/不支持，或部分文件系统（procfs、部分网络盘）未到 EOF 就返回 0：
+                            # 退回缓冲区读写并重试本块，是否真的到达 EOF 以 readinto 的结果为准
+                            use_copy_range = False
+                    if not use_copy_range:
+                        if buffer is None:
+                            buffer = memoryview(mmap.mmap(-1, chunk_size))
+                        fsrc.seek(copied)
+                        got = fsrc.readinto(buffer[:want]) or 0
+                        fdst.seek(copied)
+                        written = 0
+                        while written < got:
+                            written += fdst.write(buffer[written:got])
+                    if got <= 0:
+                        raise OSError(tr("源文件在复制过程中变小: {}").format(src_file))
+                    copied += got
+
+                    now = time.monotonic()
+                    if now - last_emit >= 0.25:
+                        last_emit = now
+                        self._emit_byte_progress(name, copied, total)
+                    if now - last_checkpoint >= FILE_OP_COPY_CHECKPOINT_MS / 1000.0 and copied < total:
+                        last_checkpoint = now
+                        os.fsync(fdst.fileno())
+                        self._save_copy_checkpoint(journal_path, identity, copied)
+            except BaseException:
+                # 保留已落盘部分的断点，供下次续传
+                try:
+                    os.fsync(fdst.fileno())
+                    self._save_copy_checkpoint(journal_path, identity, copied)
+                except Exception:
+                    pass
+                raise
+
+        shutil.copystat(src_file, part_path)
+        os.replace(part_path, dst_file)
+        try:
+            os.remove(journal_path)
+        except OSError:
+            pass
+        return total
 
     def _delete_file_task(self, src_file):
         self._raise_if_cancelled()
         self._retry_remove_once_cleared(os.remove, src_file)
+        return 0
 
-    def _run_parallel_file_tasks(self, tasks, task_runner, task_name_getter):
-        """并发执行文件级任务，按完成顺序回传逐项进度。"""
-        if not tasks:
-            return []
+    def _run_file_batch(self, batch, task_runner, task_name_getter):
+        """顺序执行一批文件任务，单个文件失败不影响同批其余文件。
+
+        返回 (字节数, [(文件名, 异常), ...])；取消时直接抛出 FILE_OP_CANCELLED。
+        """
+        nbytes = 0
+        failures = []
+        for task in batch:
+            try:
+                nbytes += task_runner(task) or 0
+            except RuntimeError as e:
+                if str(e) == "FILE_OP_CANCELLED":
+                    raise
+                failures.append((task_name_getter(task), e))
+            except Exception as e:
+                failures.append((task_name_getter(task), e))
+        return nbytes, failures
 
+    def _finish_file_batch(self, batch, failures, error, task_name_getter, errors):
+        """记录一批文件任务的结果并按批推进进度；返回 False 表示该批因取消而中止。"""
+        if isinstance(error, RuntimeError) and str(error) == "FILE_OP_CANCELLED":
+            self.cancelled = True
+            return False
+        if error is not None:
+            errors.extend(f"{task_name_getter(task)}: {error}" for task in batch)
+        for name, e in failures or ():
+            errors.append(f"{name}: {e}")
+        self.done_units += len(batch)
+        self._emit_progress(task_name_getter(batch[-1]))
+        return True
+
+    def _run_streaming_file_tasks(self, batches, task_runner, task_name_getter):
+        """边遍历边执行文件级任务：batches 为产出任务批的生成器，线程池中最多排队 FILE_OP_MAX_INFLIGHT_TASKS 批。
+
+        遍历与 I/O 流水线并行，不预先构建完整任务列表；每批作为一个线程池任务执行，按完成顺序逐批回传进度。
+        """
         errors = []
-        max_workers = self._get_io_workers(len(tasks))
+        controller = self._get_io_controller()
+        max_workers = controller.max_limit if controller is not None else self._get_io_workers()
         if max_workers <= 1:
-            for task in tasks:
+            for batch in batches:
                 self._raise_if_cancelled()
-                name = task_name_getter(task)
                 try:
-                    task_runner(task)
-                    self.done_units += 1
-                    self._emit_progress(name)
-                except RuntimeError as e:
-                    if str(e) == "FILE_OP_CANCELLED":
-                        self.cancelled = True
-                        break
-                    errors.append(f"{name}: {e}")
-                    self.done_units += 1
-                    self._emit_progress(name)
+                    _, failures = self._run_file_batch(batch, task_runner, task_name_getter)
+                    error = None
                 except Exception as e:
-                    errors.append(f"{name}: {e}")
-                    self.done_units += 1
-                    self._emit_progress(name)
+                    failures, error = None, e
+                if not self._finish_file_batch(batch, failures, error, task_name_getter, errors):
+                    break
             return errors
 
-        from concurrent.futures import ThreadPoolExecutor, as_completed
-        future_to_task = {}
-        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='file-op') as executor:
-            for task in tasks:
-                self._raise_if_cancelled()
-                future = executor.submit(task_runner, task)
-                future_to_task[future] = task
+        from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+        max_inflight = max(max_workers * 2, int(FILE_OP_MAX_INFLIGHT_TASKS or 0))
+        pending = {}
+
+        def run_batch(batch):
+            if controller is None:
+                return self._run_file_batch(batch, task_runner, task_name_getter) + (0.0,)
+            controller.acquire()
+            try:
+                started = time.monotonic()
+                nbytes, failures = self._run_file_batch(batch, task_runner, task_name_getter)
+                return nbytes, failures, time.monotonic() - started
+            finally:
+                controller.release()
 
-            for future in as_completed(future_to_task):
-                task = future_to_task[future]
-                name = task_name_getter(task)
+        def _drain(return_when):
+            done, _ = wait(list(pending), return_when=return_when)
+            for future in done:
+                batch = pending.pop(future)
                 try:
-                    future.result()
-                except RuntimeError as e:
-                    if str(e) == "FILE_OP_CANCELLED":
-                        self.cancelled = True
-                    else:
-                        errors.append(f"{name}: {e}")
+                    nbytes, failures, elapsed = future.result()
+                    error = None
+                    if controller is not None:
+                        controller.record(nbytes, elapsed, len(batch))
                 except Exception as e:
-                    errors.append(f"{name}: {e}")
+                    failures, error = None, e
+                self._finish_file_batch(batch, failures, error, task_name_getter, errors)
 
-                self.done_units += 1
-                self._emit_progress(name)
-
-                if self._cancel_requested:
-                    self.cancelled = True
-                    break
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='file-op') as executor:
+            try:
+                for batch in batches:
+                    if self._cancel_requested:
+                        self.cancelled = True
+                        break
+                    if len(pending) >= max_inflight:
+                        _drain(FIRST_COMPLETED)
+                    pending[executor.submit(run_batch, batch)] = batch
+                while pending and not self._cancel_requested:
+                    _drain(FIRST_COMPLETED)
+            finally:
+                # 取消/遍历异常时撤销尚未开始的任务，避免退出线程池时逐个执行完排队任务
+                for future in pending:
+                    future.cancel()
+            if self._cancel_requested:
+                self.cancelled = True
 
         return errors
 
-    def _copy_dir_cancelable(self, src_dir, dst_dir):
-        dirs_to_create, file_tasks = self._collect_copy_tasks(src_dir, dst_dir)
-
-        for dpath in dirs_to_create:
-            self._raise_if_cancelled()
-            os.makedirs(dpath, exist_ok=True)
-            self.done_units += 1
-            self._emit_progress(os.path.basename(dpath.rstrip('\\/')) or dpath)
-
-        copy_errors = self._run_parallel_file_tasks(
-            file_tasks,
-            task_runner=lambda t: self._copy_file_task(t[0], t[1]),
+    def _copy_dir_cancelable(self, src_dir, dst_dir, resume=False):
+        copy_errors = self._run_streaming_file_tasks(
+            self._iter_copy_tasks(src_dir, dst_dir),
+            task_runner=lambda t: self._copy_file_task(t[0], t[1], resume, t[3]),
             task_name_getter=lambda t: t[2]
         )
+        # 只有取消时才保留标记供续传；跑完的复制即使有失败项也已逐个报告，不应让下次复制误判为续传
+        if not self.cancelled:
+            self._remove_resume_marker(dst_dir)
         return copy_errors
 
     def _delete_dir_cancelable(self, src_dir):
-        file_tasks, dirs_to_remove = self._collect_delete_tasks(src_dir)
-        delete_errors = self._run_parallel_file_tasks(
-            file_tasks,
+        dirs_to_remove = []
+        delete_errors = self._run_streaming_file_tasks(
+            self._iter_delete_tasks(src_dir, dirs_to_remove),
             task_runner=lambda t: self._delete_file_task(t[0]),
             task_name_getter=lambda t: t[1]
         )
+        dirs_to_remove.reverse()
+        dirs_to_remove.append((src_dir, os.path.basename(src_dir.rstrip('\\/')) or src_dir))
 
         for dpath, dname in dirs_to_remove:
             self._raise_if_cancelled()
@@ -3528,14 +7977,80 @@ class FileBatchOpWorker(QThread):
 
         return delete_errors
 
-    def run(self):
-        import shutil
+    def _copy_top_level_item(self, src_norm, name):
+        """把一个顶层文件/目录复制到 dst_dir 下（重名时按 _make_unique_path 改名），目录内有失败项时抛出汇总错误。"""
+        if os.path.isdir(src_norm):
+            # 上次未完成的同源目录复制直接续传，不再另建 " - copy" 副本
+            dst_path = self._find_resumable_copy_dir(src_norm, os.path.join(self.dst_dir, name))
+            resume = dst_path is not None
+            if not resume:
+                dst_path = self._make_unique_path(os.path.join(self.dst_dir, name))
+            dir_errors = self._copy_dir_cancelable(src_norm, dst_path, resume)
+            if dir_errors:
+                raise RuntimeError("; ".join(dir_errors[:5]))
+        else:
+            # 目标不存在时 _make_unique_path 返回原路径，同名 .tabex-part 断点可直接续传
+            dst_path = self._make_unique_path(os.path.join(self.dst_dir, name))
+            self._copy_file_task(src_norm, dst_path)
+            self.done_units += 1
+            self._emit_progress(name)
+
+    def _move_by_rename(self, src_norm, name):
+        """同卷移动：整项 os.replace 到 dst_dir 下（重名时按 _make_unique_path 改名）。
+
+        源与目标不在同一卷（st_dev 不同或系统返回 EXDEV）时返回 False，由调用方改走复制+删除。
+        """
+        import errno
+        try:
+            if os.lstat(src_norm).st_dev != os.stat(self.dst_dir).st_dev:
+                return False
+        except OSError:
+            return False
+        dst_path = self._make_unique_path(os.path.join(self.dst_dir, name))
+        try:
+            os.replace(src_norm, dst_path)
+        except OSError as e:
+            if e.errno == errno.EXDEV:
+                return False
+            raise
+        self.done_units += 1
+        self._emit_progress(name)
+        return True
+
+    @staticmethod
+    def _is_link_or_junction(path):
+        """符号链接或 Windows 目录联接（junction）。OneDrive 占位文件等其他重解析点不算。"""
+        if os.path.islink(path):
+            return True
+        try:
+            st = os.lstat(path)
+        except OSError:
+            return False
+        return getattr(st, 'st_reparse_tag', 0) == 0xA0000003  # IO_REPARSE_TAG_MOUNT_POINT
+
+    def _move_link(self, src_norm, name):
+        """跨卷移动链接本身：在目标处按原指向重建符号链接后删除源链接，绝不经由链接复制或删除其目标内容。
+
+        目录联接无法可靠地在另一卷重建，直接拒绝。"""
+        if not os.path.islink(src_norm):
+            raise RuntimeError(tr("不支持跨卷移动目录联接（junction），请手动处理"))
+        target = os.readlink(src_norm)
+        if not os.path.isabs(target):
+            # 相对指向以源链接所在目录为基准，换了位置须改成绝对路径才能指向原目标
+            target = os.path.normpath(os.path.join(os.path.dirname(src_norm), target))
+        dst_path = self._make_unique_path(os.path.join(self.dst_dir, name))
+        os.symlink(target, dst_path, target_is_directory=os.path.isdir(src_norm))
+        os.remove(src_norm)  # 只删除链接；Windows 上目录符号链接同样由 os.remove 删除
+        self.done_units += 1
+        self._emit_progress(name)
 
+    def run(self):
         self.started_at = time.monotonic()
         self.ok_count = 0
         self.fail_count = 0
         errors = []
-        self.total_units = self._estimate_total_units()
+        # 每个顶层项先计 1 个单位，目录的子项在遍历过程中逐步累加
+        self.total_units = max(1, len(self.src_paths))
         self.done_units = 0
 
         self._emit_progress("")
@@ -3551,15 +8066,54 @@ class FileBatchOpWorker(QThread):
                         self._raise_if_cancelled()
                         src_norm = os.path.normpath(src)
                         name = os.path.basename(src_norm) or os.path.basename(os.path.dirname(src_norm)) or 'item'
-                        dst_path = self._make_unique_path(os.path.join(self.dst_dir, name))
-                        if os.path.isdir(src_norm):
-                            dir_errors = self._copy_dir_cancelable(src_norm, dst_path)
-                            if dir_errors:
-                                raise RuntimeError("; ".join(dir_errors[:5]))
-                        else:
-                            shutil.copy2(src_norm, dst_path)
+                        self._copy_top_level_item(src_norm, name)
+                        self.ok_count += 1
+                    except RuntimeError as e:
+                        if str(e) == "FILE_OP_CANCELLED":
+                            break
+                        self.fail_count += 1
+                        errors.append(f"{src}: {e}")
+                    except Exception as e:
+                        self.fail_count += 1
+                        errors.append(f"{src}: {e}")
+
+            elif self.op_type == 'move':
+                if not self.dst_dir or not os.path.isdir(self.dst_dir):
+                    self.finished.emit(self.op_type, 0, len(self.src_paths), [tr("移动失败：目标目录无效")])
+                    return
+
+                dst_abs = os.path.normcase(os.path.abspath(self.dst_dir))
+                for src in self.src_paths:
+                    try:
+                        self._raise_if_cancelled()
+                        src_norm = os.path.normpath(src)
+                        name = os.path.basename(src_norm) or os.path.basename(os.path.dirname(src_norm)) or 'item'
+                        src_abs = os.path.normcase(os.path.abspath(src_norm))
+                        if os.path.dirname(src_abs) == dst_abs:
+                            # 已在目标目录中，无需移动
                             self.done_units += 1
                             self._emit_progress(name)
+                            self.ok_count += 1
+                            continue
+                        if dst_abs == src_abs or dst_abs.startswith(src_abs.rstrip('\\/') + os.sep):
+                            raise RuntimeError(tr("不能将文件夹移动到其自身或子文件夹中"))
+                        if self._move_by_rename(src_norm, name):
+                            self.ok_count += 1
+                            continue
+                        if self._is_link_or_junction(src_norm):
+                            # 跨卷的链接：只移动链接本身，复制+删除会经由链接删掉目标中的真实文件
+                            self._move_link(src_norm, name)
+                        else:
+                            # 跨卷：流式复制完整成功后再删除源；复制被取消时保留源
+                            self._copy_top_level_item(src_norm, name)
+                            self._raise_if_cancelled()
+                            if os.path.isdir(src_norm):
+                                self.total_units += 1  # 源根目录的删除（顶层单位已计入复制）
+                                dir_errors = self._delete_dir_cancelable(src_norm)
+                                if dir_errors:
+                                    raise RuntimeError("; ".join(dir_errors[:5]))
+                            else:
+                                self._retry_remove_once_cleared(os.remove, src_norm)
                         self.ok_count += 1
                     except RuntimeError as e:
                         if str(e) == "FILE_OP_CANCELLED":
@@ -3603,6 +8157,11 @@ class FileBatchOpWorker(QThread):
         if self.cancelled and self.done_units < self.total_units:
             errors.append(tr("操作已取消"))
 
+        try:
+            self._remember_io_concurrency()
+        except Exception as e:
+            debug_print(f"[FileOp] Remember concurrency failed: {e}")
+
         self.finished.emit(self.op_type, self.ok_count, self.fail_count, errors)
 
 
@@ -6192,7 +10751,7 @@ class FileExplorerTab(QWidget):
             "QPushButton:pressed { background: #e5e5e5; }"
             "QPushButton:disabled { color: #9a9a9a; background: #f4f4f4; }"
         )
-        self.cancel_file_op_btn.setToolTip(tr("取消当前后台复制/删除（等效 Alt+Q）"))
+        self.cancel_file_op_btn.setToolTip(tr("取消当前后台复制/移动/删除（等效 Alt+Q）"))
         self.cancel_file_op_btn.clicked.connect(self.cancel_current_file_batch_op)
         self.cancel_file_op_btn.hide()
         status_row = QHBoxLayout()
@@ -6591,30 +11150,7 @@ class FileExplorerTab(QWidget):
 
     def _find_git_root(self, start_path):
         """向上查找包含 .git 的目录，找到则返回仓库根路径，否则返回 None"""
-        if not start_path:
-            return None
-        path = os.path.abspath(start_path)
-        while True:
-            git_marker = os.path.join(path, '.git')
-            if os.path.isdir(git_marker):
-                return path
-            if os.path.isfile(git_marker):
-                try:
-                    with open(git_marker, 'r', encoding='utf-8', errors='ignore') as f:
-                        line = f.readline().strip()
-                    if line.lower().startswith('gitdir:'):
-                        gitdir_path = line[7:].strip()
-                        if not os.path.isabs(gitdir_path):
-                            gitdir_path = os.path.abspath(os.path.join(path, gitdir_path))
-                        if os.path.exists(gitdir_path):
-                            return path
-                except Exception:
-                    pass
-            parent = os.path.dirname(path)
-            if parent == path:
-                break
-            path = parent
-        return None
+        return find_git_root(start_path)
 
     def _request_git_status_async(self, dir_path):
         """异步请求 Git 状态（不阻塞 UI 线程）"""
@@ -9007,9 +13543,12 @@ class FileExplorerTab(QWidget):
             self.cancel_file_op_btn.show()
         if op_type == 'copy':
             show_toast(self, tr("提示"), tr("后台复制已开始，可继续操作其他标签页（Alt+Q 可取消）"), level="info", duration=2600)
+        elif op_type == 'move':
+            show_toast(self, tr("提示"), tr("后台移动已开始，可继续操作其他标签页（Alt+Q 可取消）"), level="info", duration=2600)
         elif op_type == 'delete':
             show_toast(self, tr("提示"), tr("后台删除已开始，可继续操作其他标签页（Alt+Q 可取消）"), level="info", duration=2600)
         worker.start()
+        return True
 
     def cancel_current_file_batch_op(self):
         worker = getattr(self, '_file_op_worker', None)
@@ -9043,6 +13582,10 @@ class FileExplorerTab(QWidget):
             msg = tr("后台复制: {}/{} ({}%) 剩余{} | 用时 {} | 成功{} 失败{} | 当前: {}" ).format(
                 done_count, total_count, percent, remain_count, elapsed_text, ok_count, fail_count, current_label
             )
+        elif op_type == 'move':
+            msg = tr("后台移动: {}/{} ({}%) 剩余{} | 用时 {} | 成功{} 失败{} | 当前: {}" ).format(
+                done_count, total_count, percent, remain_count, elapsed_text, ok_count, fail_count, current_label
+            )
         elif op_type == 'delete':
             msg = tr("后台删除: {}/{} ({}%) 剩余{} | 用时 {} | 成功{} 失败{} | 当前: {}" ).format(
                 done_count, total_count, percent, remain_count, elapsed_text, ok_count, fail_count, current_label
@@ -9072,6 +13615,13 @@ class FileExplorerTab(QWidget):
                 show_toast(self, tr("成功"), tr("复制完成，共 {} 项").format(ok_count), level="success")
             else:
                 show_toast(self, tr("警告"), tr("复制完成：成功 {} 项，失败 {} 项").format(ok_count, fail_count), level="warning")
+        elif op_type == 'move':
+            if cancelled:
+                show_toast(self, tr("提示"), tr("移动已取消：成功 {} 项，失败 {} 项").format(ok_count, fail_count), level="warning")
+            elif fail_count == 0:
+                show_toast(self, tr("成功"), tr("移动完成，共 {} 项").format(ok_count), level="success")
+            else:
+                show_toast(self, tr("警告"), tr("移动完成：成功 {} 项，失败 {} 项").format(ok_count, fail_count), level="warning")
         elif op_type == 'delete':
             if cancelled:
                 show_toast(self, tr("提示"), tr("删除已取消：成功 {} 项，失败 {} 项").format(ok_count, fail_count), level="warning")
@@ -13161,8 +17711,25 @@ class MainWindow(QMainWindow):
         self._quick_clipboard_mode = 'copy'
         show_toast(self, tr("复制"), tr("已复制 {} 项，按 Alt+V 粘贴到当前目录").format(len(paths)), level="info")
 
+    def quick_cut_selected_items_for_background_paste(self):
+        """Alt+Shift+C：剪切当前选中项到 TabEx 内部剪贴板（Alt+V 时后台移动到当前目录）。"""
+        current_tab = self.get_active_pane()
+        if not current_tab or not hasattr(current_tab, '_get_selected_paths'):
+            show_toast(self, tr("提示"), tr("当前标签不支持快速剪切"), level="warning")
+            return
+
+        paths = current_tab._get_selected_paths()
+        paths = [p for p in (paths or []) if p and os.path.exists(p)]
+        if not paths:
+            show_toast(self, tr("提示"), tr("请先选择要移动的文件或文件夹"), level="warning")
+            return
+
+        self._quick_clipboard_paths = list(paths)
+        self._quick_clipboard_mode = 'move'
+        show_toast(self, tr("剪切"), tr("已剪切 {} 项，按 Alt+V 移动到当前目录").format(len(paths)), level="info")
+
     def quick_paste_to_current_directory(self):
-        """Alt+V：将 TabEx 内部剪贴板的内容后台复制到当前目录。"""
+        """Alt+V：将 TabEx 内部剪贴板的内容后台复制（剪切时为移动）到当前目录。"""
         paths = list(getattr(self, '_quick_clipboard_paths', []) or [])
         if not paths:
             show_toast(self, tr("提示"), tr("内部剪贴板为空，请先按 Alt+C"), level="warning")
@@ -13183,7 +17750,15 @@ class MainWindow(QMainWindow):
             show_toast(self, tr("提示"), tr("源文件不存在，请重新 Alt+C"), level="warning")
             return
 
-        current_tab._run_file_batch_op('copy', alive_paths, dst_dir)
+        if getattr(current_tab, '_file_op_worker', None) and current_tab._file_op_worker.isRunning():
+            show_toast(self, tr("提示"), tr("已有后台文件操作进行中，请稍后"), level="warning")
+            return
+
+        op_type = 'move' if getattr(self, '_quick_clipboard_mode', 'copy') == 'move' else 'copy'
+        if current_tab._run_file_batch_op(op_type, alive_paths, dst_dir) and op_type == 'move':
+            # 源已移走，剪切内容只能粘贴一次
+            self._quick_clipboard_paths = []
+            self._quick_clipboard_mode = 'copy'
 
     def quick_delete_selected_items(self):
         """Alt+Delete：快速删除选中项（不弹确认框，直接后台删除）。"""
@@ -13382,6 +17957,20 @@ class MainWindow(QMainWindow):
             
             hotkeys = self.config.get("hotkeys", {})
 
+            # Alt+Shift+C - 剪切选中项到 TabEx 内部剪贴板（Alt+V 后台移动）；须先于 Alt+C 判断，
+            # 且无论剪切是否启用都在此返回，避免禁用剪切时按下 Alt+Shift+C 落入 Alt+C 变成复制
+            if (is_key_pressed(VK_MENU, require_down=True) and is_key_pressed(VK_SHIFT, require_down=True)
+                    and is_key_pressed(0x43)):
+                key_combo = "Alt+Shift+C"
+                if not self._last_keys_state.get(key_combo, False) and hotkeys.get("quick_cut", True):
+                    debug_print("[Shortcut Poll] Detected Alt+Shift+C")
+                    self.quick_cut_selected_items_for_background_paste()
+                self._last_keys_state[key_combo] = True
+                self._last_keys_state["Alt+C"] = True
+                return
+            else:
+                self._last_keys_state["Alt+Shift+C"] = False
+
             # Alt+C - 复制选中项到 TabEx 内部剪贴板（后台粘贴用）
             if is_key_pressed(VK_MENU, require_down=True) and is_key_pressed(0x43) and hotkeys.get("quick_copy", True):
                 key_combo = "Alt+C"
@@ -13661,6 +18250,7 @@ class MainWindow(QMainWindow):
             self.config["hotkeys"]["refresh"] = dlg.hotkey_refresh.isChecked()
             self.config["hotkeys"]["add_bookmark"] = dlg.hotkey_add_bookmark.isChecked()
             self.config["hotkeys"]["quick_copy"] = dlg.hotkey_quick_copy.isChecked()
+            self.config["hotkeys"]["quick_cut"] = dlg.hotkey_quick_cut.isChecked()
             self.config["hotkeys"]["quick_paste"] = dlg.hotkey_quick_paste.isChecked()
             self.config["hotkeys"]["quick_delete"] = dlg.hotkey_quick_delete.isChecked()
             self.config["hotkeys"]["cancel_file_op"] = dlg.hotkey_cancel_file_op.isChecked()
@@ -14110,6 +18700,7 @@ class MainWindow(QMainWindow):
                 "refresh": True,           # F5
                 "add_bookmark": True,      # Ctrl+D
                 "quick_copy": True,        # Alt+C - 快速复制选中项
+                "quick_cut": True,         # Alt+Shift+C - 快速剪切选中项（Alt+V 后台移动）
                 "quick_paste": True,       # Alt+V - 快速粘贴到当前目录
                 "quick_delete": True,      # Alt+Delete - 快速删除
                 "cancel_file_op": True,    # Alt+Q - 取消后台复制/删除
@@ -14132,12 +18723,39 @@ class MainWindow(QMainWindow):
             "content_search_chunk_size": CONTENT_SEARCH_CHUNK_SIZE,
             "content_search_max_bytes_per_file": CONTENT_SEARCH_MAX_BYTES_PER_FILE,
             "content_search_in_memory_threshold": CONTENT_SEARCH_IN_MEMORY_THRESHOLD,
+            "content_search_workers": CONTENT_SEARCH_WORKERS,
+            "content_search_detect_encoding": CONTENT_SEARCH_DETECT_ENCODING,
+            "content_search_binary_ext_learn": CONTENT_SEARCH_BINARY_EXT_LEARN,
+            "content_search_hit_locations": CONTENT_SEARCH_HIT_LOCATIONS,
+            "search_preview_context_lines": SEARCH_PREVIEW_CONTEXT_LINES,
+            "search_result_cache_persistent": SEARCH_RESULT_CACHE_PERSISTENT,
+            "search_result_cache_max_bytes": SEARCH_RESULT_CACHE_MAX_BYTES,
+            "search_result_cache_max_results": SEARCH_RESULT_CACHE_MAX_RESULTS,
+            "search_filename_index_enabled": SEARCH_FILENAME_INDEX_ENABLED,
+            "search_filename_index_refresh_seconds": SEARCH_FILENAME_INDEX_REFRESH_SECONDS,
+            "search_index_max_bytes": SEARCH_INDEX_MAX_BYTES,
+            "search_exclude_dirs": SEARCH_EXCLUDE_DIR_PATTERNS,
+            "search_max_depth": SEARCH_MAX_DEPTH,
+            "search_respect_gitignore": SEARCH_RESPECT_GITIGNORE,
+            "gitignore_cache_max_entries": GITIGNORE_CACHE_MAX_ENTRIES,
+            "search_watch_max_dirs": SEARCH_WATCH_MAX_DIRS,
+            "search_watch_poll_ms": SEARCH_WATCH_POLL_MS,
+            "content_index_max_file_bytes": CONTENT_INDEX_MAX_FILE_BYTES,
+            "everything_backend": EVERYTHING_BACKEND,
             "search_result_queue_maxsize": SEARCH_RESULT_QUEUE_MAXSIZE,
             "search_result_batch_base": SEARCH_RESULT_BATCH_BASE,
             "search_result_batch_min": SEARCH_RESULT_BATCH_MIN,
             "search_result_batch_max": SEARCH_RESULT_BATCH_MAX,
             "search_metadata_degrade_enabled": SEARCH_METADATA_DEGRADE_ENABLED,
             "search_metadata_degrade_queue_ratio": SEARCH_METADATA_DEGRADE_QUEUE_RATIO,
+            "search_metadata_hydrate_workers": SEARCH_METADATA_HYDRATE_WORKERS,
+            "file_op_max_inflight_tasks": FILE_OP_MAX_INFLIGHT_TASKS,
+            "file_op_adaptive_concurrency": FILE_OP_ADAPTIVE_CONCURRENCY,
+            "file_op_max_io_workers": FILE_OP_MAX_IO_WORKERS,
+            "file_op_small_file_bytes": FILE_OP_SMALL_FILE_BYTES,
+            "file_op_small_file_batch": FILE_OP_SMALL_FILE_BATCH,
+            "file_op_chunked_copy_threshold": FILE_OP_CHUNKED_COPY_THRESHOLD,
+            "file_op_copy_chunk_size": FILE_OP_COPY_CHUNK_SIZE,
         }
         
         try:
@@ -15583,6 +20201,7 @@ class MainWindow(QMainWindow):
             debug_print(tr("[App] 程序关闭，已清除搜索缓存"))
         except Exception as e:
             print(f"Error clearing search cache: {e}")
+        shutdown_content_search_pool()
         
         # 停止服务器
         self.server_running = False
@@ -16067,7 +20686,7 @@ class SettingsDialog(QDialog):
         self.file_op_workers_spin.setSingleStep(1)
         self.file_op_workers_spin.setSpecialValueText(tr("自动"))
         self.file_op_workers_spin.setValue(int(config.get("file_op_max_workers", 0) or 0))
-        self.file_op_workers_spin.setToolTip(tr("后台复制/删除的并发文件任务数。0=自动，建议机械盘 2-4，SSD 4-8"))
+        self.file_op_workers_spin.setToolTip(tr("后台复制/删除的并发文件任务数。0=自动（按实测吞吐动态调节，并记住每个磁盘的最佳值），建议机械盘 2-4，SSD 4-8"))
         file_op_workers_layout.addWidget(self.file_op_workers_spin)
         file_op_workers_layout.addStretch(1)
         debug_layout.addLayout(file_op_workers_layout)
@@ -16229,6 +20848,9 @@ class SettingsDialog(QDialog):
         self.hotkey_quick_copy = QCheckBox(tr("Alt+C - 快速复制选中项（后台）"))
         self.hotkey_quick_copy.setChecked(hotkeys.get("quick_copy", True))
         hotkey_layout.addWidget(self.hotkey_quick_copy)
+        self.hotkey_quick_cut = QCheckBox(tr("Alt+Shift+C - 快速剪切选中项（Alt+V 后台移动）"))
+        self.hotkey_quick_cut.setChecked(hotkeys.get("quick_cut", True))
+        hotkey_layout.addWidget(self.hotkey_quick_cut)
         self.hotkey_quick_paste = QCheckBox(tr("Alt+V - 快速粘贴到当前目录（后台）"))
         self.hotkey_quick_paste.setChecked(hotkeys.get("quick_paste", True))
         hotkey_layout.addWidget(self.hotkey_quick_paste)
@@ -16598,6 +21220,7 @@ class SettingsDialog(QDialog):
                 "refresh": self.hotkey_refresh.isChecked(),
                 "add_bookmark": self.hotkey_add_bookmark.isChecked(),
                 "quick_copy": self.hotkey_quick_copy.isChecked(),
+                "quick_cut": self.hotkey_quick_cut.isChecked(),
                 "quick_paste": self.hotkey_quick_paste.isChecked(),
                 "quick_delete": self.hotkey_quick_delete.isChecked(),
                 "cancel_file_op": self.hotkey_cancel_file_op.isChecked(),
@@ -17280,6 +21903,10 @@ def _build_te_icon():
 
 
 def main():
+    # 打包版（PyInstaller）中内容搜索进程池的子进程需要先走 freeze_support 分流
+    import multiprocessing
+    multiprocessing.freeze_support()
+
     # 支持命令行参数：打开指定路径
     import sys
     import os
@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+搜索性能基准测试（无界面）
+
+在临时目录生成合成目录树（文件数、深度、文本/二进制比例、UTF-8/GBK/UTF-16 编码、文件大小均可配置），
+对每个性能配置（config.json 中 "performance" 段的参数组，由 apply_runtime_performance_config 应用）
+在独立子进程中运行 SearchDialog.do_search，报告 文件/秒、MB/秒、首个结果耗时与峰值内存，
+用于有依据地调整 CONTENT_SEARCH_* 与 SEARCH_RESULT_BATCH_* 等参数。
+
+不创建任何窗口：搜索核心在后台线程运行，本进程代替界面消费结果通道。每个配置独占一个子进程，
+运行时常量、进程池与峰值内存互不影响；持久化缓存/索引写入临时目录，不污染程序目录。
+
+用法:
+    python search_benchmark.py
+    python search_benchmark.py --files 20000 --depth 4 --binary-ratio 0.2 --encodings utf-8,gbk
+    python search_benchmark.py --profiles my_profiles.json --modes content --output bench_output.txt
+    python search_benchmark.py --tree D:\\bench_tree --keep     # 复用/保留生成的目录树
+
+--profiles 文件为 {"配置名": {"content_search_workers": 4, ...}, ...}；也可直接传入 config.json，
+此时使用其中的 "performance" 段作为名为 "config" 的配置。
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+# 内置配置：键与 config.json 的 "performance" 段相同，未列出的参数保持程序默认值
+BUILTIN_PROFILES = {
+    "default": {},
+    "single_process": {"content_search_workers": 1},
+    "no_encoding_detect": {"content_search_detect_encoding": False},
+    "small_chunks": {
+        "content_search_chunk_size": 1024 * 1024,
+        "content_search_in_memory_threshold": 256 * 1024,
+    },
+    "small_batches": {
+        "search_result_batch_base": 40,
+        "search_result_batch_min": 20,
+        "search_result_batch_max": 100,
+    },
+    "large_batches": {
+        "search_result_batch_base": 500,
+        "search_result_batch_min": 200,
+        "search_result_batch_max": 2000,
+    },
+}
+
+# 所有配置共用的隔离设置：关闭结果缓存与文件名索引，保证每次都真实遍历/读取
+ISOLATED_SETTINGS = {
+    "search_result_cache_persistent": False,
+    "search_filename_index_enabled": False,
+    "search_exclude_dirs": [],
+    "search_max_depth": 0,
+    "search_respect_gitignore": False,
+}
+
+# 搜索模式：(搜索文件名, 搜索内容, 使用进程内 Everything 替身, 使用关键词)
+MODES = {
+    "content": (True, True, False, True),  # 对话框默认：文件名 + 内容，测读取与匹配
+    "list": (True, False, False, False),  # 空关键词列举全部文件，测遍历与结果批量
+    "pipeline": (True, False, True, False),  # FakeSearchBackend 列举全部条目，只测结果批量/通道
+}
+
+TEXT_EXTENSIONS = ['c', 'h', 'xml', 'arxml', 'txt']
+BINARY_EXTENSIONS = ['bin', 'dat']  # bin 在二进制黑名单中，dat 需要读取探测
+DEFAULT_KEYWORD = "基准关键词"
+MANIFEST_NAME = "bench_manifest.json"
+
+_WORDS = [
+    "static", "uint32", "return", "config", "buffer", "signal", "handler", "timeout",
+    "init", "value", "index", "status", "端口", "配置", "信号", "缓冲区", "超时", "状态",
+]
+
+
+def _text_body(rng, size, keyword, hit):
+    """生成约 size 个字符的类源码文本；hit 为真时在随机一行插入关键词。"""
+    lines = []
+    length = 0
+    while length < size:
+        line = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(3, 12)))
+        lines.append(line)
+        length += len(line) + 1
+    if hit:
+        lines.insert(rng.randrange(len(lines) + 1), f"/* {keyword} */")
+    return "\n".join(lines) + "\n"
+
+
+def generate_tree(root, files, depth, fanout, binary_ratio, encodings, min_size, max_size, hit_ratio, keyword, seed):
+    """在 root 下生成合成目录树，返回清单 dict（总文件数、字节数、预期命中数等）。"""
+    rng = random.Random(seed)
+    dirs = [root]
+    level = [root]
+    for d in range(depth):
+        next_level = []
+        for parent in level:
+            for i in range(fanout):
+                path = os.path.join(parent, f"dir{d}_{i}")
+                os.makedirs(path, exist_ok=True)
+                next_level.append(path)
+        dirs.extend(next_level)
+        level = next_level
+
+    text_files = binary_files = total_bytes = text_bytes = content_hits = 0
+    by_encoding = {}
+    log_min, log_max = math.log(max(1, min_size)), math.log(max(min_size, max_size, 1))
+    for n in range(files):
+        folder = dirs[n % len(dirs)]
+        size = int(math.exp(rng.uniform(log_min, log_max)))
+        if rng.random() < binary_ratio:
+            ext = rng.choice(BINARY_EXTENSIONS)
+            data = bytes(rng.getrandbits(8) for _ in range(min(size, 4096)))
+            data = (data * (size // max(1, len(data)) + 1))[:size]
+            binary_files += 1
+        else:
+            ext = rng.choice(TEXT_EXTENSIONS)
+            encoding = rng.choice(encodings)
+            hit = rng.random() < hit_ratio
+            data = _text_body(rng, size, keyword, hit).encode(encoding)
+            text_files += 1
+            text_bytes += len(data)
+            content_hits += hit
+            by_encoding[encoding] = by_encoding.get(encoding, 0) + 1
+        with open(os.path.join(folder, f"file{n}.{ext}"), 'wb') as f:
+            f.write(data)
+        total_bytes += len(data)
+
+    manifest = {
+        "files": files,
+        "dirs": len(dirs),
+        "text_files": text_files,
+        "binary_files": binary_files,
+        "bytes": total_bytes,
+        "text_bytes": text_bytes,
+        "content_hits": content_hits,
+        "encodings": by_encoding,
+        "keyword": keyword,
+        "seed": seed,
+    }
+    # 清单放在树内：保持 ASCII 转义，避免清单自身命中关键词
+    with open(os.path.join(root, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def peak_rss_mb():
+    """本进程峰值常驻内存（MB）；无法获取时返回 None。"""
+    if os.name == 'nt':
+        try:
+            import ctypes
+            from ctypes import wintypes
+
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [
+                    ('cb', wintypes.DWORD),
+                    ('PageFaultCount', wintypes.DWORD),
+                    ('PeakWorkingSetSize', ctypes.c_size_t),
+                    ('WorkingSetSize', ctypes.c_size_t),
+                    ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                    ('PagefileUsage', ctypes.c_size_t),
+                    ('PeakPagefileUsage', ctypes.c_size_t),
+                ]
+
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(counters)
+            kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+            psapi = ctypes.WinDLL('psapi', use_last_error=True)
+            kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+            psapi.GetProcessMemoryInfo.argtypes = [wintypes.HANDLE, ctypes.POINTER(PROCESS_MEMORY_COUNTERS), wintypes.DWORD]
+            if psapi.GetProcessMemoryInfo(kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+                return round(counters.PeakWorkingSetSize / (1024 * 1024), 1)
+        except Exception:
+            return None
+        return None
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024, 1)
+    except Exception:
+        return None
+
+
+class HeadlessSearch:
+    """不创建任何 Qt 对象地运行 SearchDialog.do_search：复用对话框的搜索方法，结果通道由本对象消费。"""
+
+    def __init__(self, tabex, search_path, backend=None):
+        self._dialog_class = tabex.SearchDialog
+        self.search_path = search_path
+        self.max_results = 1000000
+        self.is_searching = True
+        self.queue_overflow_count = 0
+        self.everything_path = None
+        self.search_backend = backend
+        self._wakeup = threading.Event()
+        self.result_queue = tabex.SearchResultChannel(tabex.SEARCH_RESULT_QUEUE_MAXSIZE, wakeup=self._wakeup.set)
+
+    def __getattr__(self, name):
+        func = self._dialog_class.__dict__.get(name)
+        if callable(func):
+            return func.__get__(self)
+        raise AttributeError(name)
+
+    def run(self, keyword, search_filename, search_content, file_types=""):
+        """运行一次搜索并像界面一样边搜边取结果，返回 (结果数, 首个结果耗时, 总耗时, 最后状态文字)。"""
+        use_everything = self.search_backend is not None
+        start = time.perf_counter()
+        thread = threading.Thread(
+            target=self.do_search,
+            args=(keyword, search_filename, search_content, file_types),
+            kwargs={'use_everything': use_everything},
+            daemon=True,
+        )
+        thread.start()
+        rows = 0
+        first_result = None
+        status = ""
+        while True:
+            self._wakeup.wait(0.05)
+            self._wakeup.clear()
+            self.result_queue.rearm()
+            while True:
+                try:
+                    item = self.result_queue.get_nowait()
+                except Exception:
+                    break
+                if item['type'] == 'result_batch':
+                    if first_result is None and item.get('items'):
+                        first_result = time.perf_counter() - start
+                    rows += len(item.get('items') or ())
+                elif item['type'] == 'result':
+                    if first_result is None:
+                        first_result = time.perf_counter() - start
+                    rows += 1
+                elif item['type'] == 'status':
+                    status = item['text']
+            if not thread.is_alive() and self.result_queue.empty():
+                break
+        return rows, first_result, time.perf_counter() - start, status
+
+
+def run_child(spec):
+    """子进程入口：应用一个性能配置，跑一次搜索，以 JSON 输出测量结果。"""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import TabEx
+
+    data_dir = tempfile.mkdtemp(prefix="tabex_bench_data_")
+    TabEx.get_app_base_dir = lambda: data_dir  # 编码缓存/索引等持久化文件写入临时目录
+    try:
+        TabEx.apply_runtime_performance_config(dict(ISOLATED_SETTINGS, **spec['profile']))
+        search_filename, search_content, use_backend, use_keyword = MODES[spec['mode']]
+        backend = TabEx.FakeSearchBackend(root=spec['tree']) if use_backend else None
+        if backend is not None:
+            backend.entries = backend._load_entries()  # 枚举不计入耗时，只测结果管线
+        host = HeadlessSearch(TabEx, spec['tree'], backend)
+        keyword = spec['keyword'] if use_keyword else ""
+        rows, first_result, elapsed, status = host.run(keyword, search_filename, search_content, spec['file_types'])
+        stats = host.result_queue.stats()
+        if search_content:
+            TabEx.shutdown_content_search_pool(wait=True)
+        result = {
+            "rows": rows,
+            "first_result_s": first_result,
+            "elapsed_s": elapsed,
+            "status": status,
+            "peak_rss_mb": peak_rss_mb(),
+            "dropped_rows": stats.get('dropped_rows', 0),
+            "put_wait_s": stats.get('put_wait_s', 0.0),
+        }
+        if os.name != 'nt':
+            try:
+                import resource
+                result["workers_peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1)
+            except Exception:
+                pass
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+    sys.stdout.write("BENCH_RESULT " + json.dumps(result) + "\n")
+
+
+def load_profiles(path):
+    if not path:
+        return dict(BUILTIN_PROFILES)
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data.get("performance"), dict):
+        return {"config": data["performance"]}
+    return {str(name): dict(values) for name, values in data.items()}
+
+
+def run_profile(tree, name, profile, mode, keyword, file_types):
+    spec = {"tree": tree, "profile": profile, "mode": mode, "keyword": keyword, "file_types": file_types}
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", json.dumps(spec, ensure_ascii=False)],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, encoding='utf-8', errors='replace',
+    )
+    for line in proc.stdout.splitlines():
+        if line.startswith("BENCH_RESULT "):
+            return json.loads(line[len("BENCH_RESULT "):])
+    raise RuntimeError(f"{name}/{mode} failed (exit {proc.returncode}):\n{proc.stderr.strip()[-2000:]}")
+
+
+def _fmt(value, pattern):
+    return "-" if value is None else pattern.format(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TabEx 搜索性能基准测试（无界面）")
+    parser.add_argument("--files", type=int, default=5000, help="生成的文件数")
+    parser.add_argument("--depth", type=int, default=3, help="目录深度")
+    parser.add_argument("--fanout", type=int, default=4, help="每级子目录数")
+    parser.add_argument("--binary-ratio", type=float, default=0.1, help="二进制文件比例 0~1")
+    parser.add_argument("--encodings", default="utf-8,gbk,utf-16", help="文本文件编码（逗号分隔，随机分配）")
+    parser.add_argument("--min-size", type=int, default=512, help="最小文件大小（字节，按对数均匀分布）")
+    parser.add_argument("--max-size", type=int, default=256 * 1024, help="最大文件大小（字节）")
+    parser.add_argument("--hit-ratio", type=float, default=0.05, help="包含关键词的文本文件比例 0~1")
+    parser.add_argument("--keyword", default=DEFAULT_KEYWORD, help="搜索关键词")
+    parser.add_argument("--file-types", default="", help="文件类型过滤，与对话框相同（例如 *.c,*.h）")
+    parser.add_argument("--seed", type=int, default=1, help="随机种子（相同参数生成相同目录树）")
+    parser.add_argument("--modes", default="content,list,pipeline", help="搜索模式: " + ",".join(MODES))
+    parser.add_argument("--profiles", help="性能配置 JSON 文件（或 config.json）；默认使用内置配置")
+    parser.add_argument("--only", help="只运行这些配置（逗号分隔）")
+    parser.add_argument("--repeat", type=int, default=1, help="每个配置重复次数，报告耗时中位数的那一次")
+    parser.add_argument("--tree", help="目录树位置；已有清单文件时直接复用")
+    parser.add_argument("--keep", action="store_true", help="结束后保留生成的目录树")
+    parser.add_argument("--output", help="同时把结果以 JSON 写入此文件")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(json.loads(args.child))
+        return
+
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    unknown = [m for m in modes if m not in MODES]
+    if unknown:
+        parser.error(f"未知模式: {', '.join(unknown)}")
+    profiles = load_profiles(args.profiles)
+    if args.only:
+        wanted = [name.strip() for name in args.only.split(",") if name.strip()]
+        profiles = {name: profiles[name] for name in wanted if name in profiles}
+    if not profiles:
+        parser.error("没有可运行的配置")
+
+    tree = os.path.abspath(args.tree) if args.tree else tempfile.mkdtemp(prefix="tabex_bench_tree_")
+    manifest_path = os.path.join(tree, MANIFEST_NAME)
+    created = not os.path.exists(manifest_path)
+    if created:
+        os.makedirs(tree, exist_ok=True)
+        print(f"生成目录树: {tree}")
+        gen_start = time.perf_counter()
+        manifest = generate_tree(
+            tree, args.files, args.depth, args.fanout, args.binary_ratio,
+            [e.strip() for e in args.encodings.split(",") if e.strip()],
+            args.min_size, args.max_size, args.hit_ratio, args.keyword, args.seed,
+        )
+        print(f"  用时 {time.perf_counter() - gen_start:.1f}s")
+    else:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        print(f"复用目录树: {tree}")
+    print("  {files} 个文件（文本 {text_files} / 二进制 {binary_files}），{dirs} 个目录，"
+          "{mb:.1f} MB，编码 {encodings}，预期内容命中 {content_hits}".format(mb=manifest['bytes'] / 1048576, **manifest))
+
+    results = []
+    header = f"{'配置':<20}{'模式':<10}{'结果数':>8}{'文件/秒':>11}{'MB/秒':>9}{'首个结果':>10}{'总耗时':>9}{'峰值内存':>10}{'丢弃':>6}"
+    print()
+    print(header)
+    print("-" * len(header))
+    try:
+        for name, profile in profiles.items():
+            for mode in modes:
+                runs = [run_profile(tree, name, profile, mode, args.keyword, args.file_types)
+                        for _ in range(max(1, args.repeat))]
+                runs.sort(key=lambda r: r['elapsed_s'])
+                run = runs[len(runs) // 2]
+                elapsed = max(run['elapsed_s'], 1e-9)
+                scanned_bytes = manifest['text_bytes'] if MODES[mode][1] else 0
+                row = dict(run, profile=name, mode=mode,
+                           files_per_s=manifest['files'] / elapsed,
+                           mb_per_s=scanned_bytes / 1048576 / elapsed if scanned_bytes else None)
+                results.append(row)
+                first_ms = None if run['first_result_s'] is None else run['first_result_s'] * 1000
+                print(f"{name:<20}{mode:<10}{run['rows']:>8}{row['files_per_s']:>11.0f}"
+                      f"{_fmt(row['mb_per_s'], '{:.1f}'):>9}{_fmt(first_ms, '{:.0f}ms'):>10}"
+                      f"{elapsed:>8.2f}s{_fmt(run['peak_rss_mb'], '{:.0f}MB'):>10}{run['dropped_rows']:>6}")
+    finally:
+        if created and not args.keep:
+            shutil.rmtree(tree, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"manifest": manifest, "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已写入 {args.output}")
+
+
+if __name__ == "__main__":
+    main()